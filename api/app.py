@@ -1,13 +1,21 @@
 from typing import List, Dict
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import aiofiles
 import tempfile
+import json
+import shutil
 import os
 from pathlib import Path
+from langchain_core.documents import Document
 from services.document_service import DocumentService
+from services.job_service import JobManager, JobQueueFullError, Job
+from loaders.base import PROCESSING_MODES
+from config.settings import UPLOAD_CONFIG
 
 app = FastAPI(title="Document Parser API")
 doc_service = DocumentService()
+job_manager = JobManager(doc_service)
 
 # 添加云函数处理器
 def create_lambda_handler():
@@ -27,48 +35,238 @@ def create_azure_handler():
 # AWS Lambda handler
 handler = create_lambda_handler()
 
+# Endpoints that accept file uploads
+UPLOAD_PATHS = ("/process", "/process/stream", "/jobs")
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject uploads whose Content-Length exceeds the request limit before the body is read"""
+    max_request_bytes = UPLOAD_CONFIG["max_request_bytes"]
+    content_length = request.headers.get("content-length")
+    if max_request_bytes > 0 and request.method == "POST" and request.url.path in UPLOAD_PATHS \
+            and content_length and content_length.isdigit() and int(content_length) > max_request_bytes:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request too large: {content_length} bytes, limit is {max_request_bytes} bytes"}
+        )
+    return await call_next(request)
+
 @app.post("/process")
-async def process_documents(files: List[UploadFile] = File(...)):
-    """Process multiple documents"""
+async def process_documents(files: List[UploadFile] = File(...), mode: str = Form("full")):
+    """Process multiple documents, mode "text_only" skips the vision model"""
+    _check_mode(mode)
+    # 使用/tmp目录用于云函数环境, 每个请求使用独立目录, 处理结束后删除
+    request_dir = tempfile.mkdtemp(prefix="process_", dir=_get_temp_dir())
     try:
-        results = {}
-        
-        # 使用/tmp目录用于云函数环境
-        temp_dir = "/tmp" if os.getenv("ENV") in ["lambda", "cloud"] else tempfile.gettempdir()
-        os.makedirs(temp_dir, exist_ok=True)
-        
         # Save uploaded files
-        file_paths = []
-        for file in files:
-            temp_path = Path(temp_dir) / file.filename
-            with open(temp_path, "wb") as f:
-                f.write(await file.read())
-            file_paths.append(str(temp_path))
+        file_paths = await _save_uploads(files, request_dir)
         
         # Process documents
-        doc_results = doc_service.process_documents(file_paths)
+        doc_results = doc_service.process_documents(file_paths, {"mode": mode})
         
-        # Clean up
-        for path in file_paths:
-            try:
-                os.remove(path)
-            except:
-                pass
-            
-        # Convert Document objects to dict for JSON response
-        for file_path, documents in doc_results.items():
-            results[Path(file_path).name] = [
-                {
+        return JSONResponse(content=_serialize_results(doc_results, file_paths))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        shutil.rmtree(request_dir, ignore_errors=True)
+
+@app.post("/process/stream")
+async def process_documents_stream(files: List[UploadFile] = File(...), mode: str = Form("full")):
+    """Process documents and stream one NDJSON record per page/slide/sheet as it finishes"""
+    _check_mode(mode)
+    # Each request gets its own directory, removed once the stream ends
+    request_dir = tempfile.mkdtemp(prefix="stream_", dir=_get_temp_dir())
+    try:
+        file_paths = await _save_uploads(files, request_dir)
+    except HTTPException:
+        shutil.rmtree(request_dir, ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(request_dir, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    result_names = _result_names(file_paths)
+    
+    def generate_records():
+        try:
+            for file_path, doc in doc_service.iter_documents(file_paths, mode):
+                record = {
+                    "file": result_names[file_path],
                     "content": doc.page_content,
                     "metadata": doc.metadata
                 }
-                for doc in documents
-            ]
-        
-        return JSONResponse(content=results)
-        
+                yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        finally:
+            shutil.rmtree(request_dir, ignore_errors=True)
+    
+    return StreamingResponse(generate_records(), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def create_job(files: List[UploadFile] = File(...), mode: str = Form("full")):
+    """Queue documents for background processing and return a job id immediately"""
+    _check_mode(mode)
+    # Each job gets its own directory, kept until a worker has finished with it
+    job_dir = tempfile.mkdtemp(prefix="job_", dir=_get_temp_dir())
+    try:
+        file_paths = await _save_uploads(files, job_dir)
+        job = job_manager.submit(
+            file_paths,
+            on_finished=lambda job: shutil.rmtree(job_dir, ignore_errors=True),
+            mode=mode
+        )
+    except HTTPException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    except JobQueueFullError as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Queue full: {str(e)}. Retry later.",
+            headers={"Retry-After": "30"}
+        )
     except Exception as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return job status, and the results once the job has completed"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    response = job.to_dict()
+    if job.status == Job.COMPLETED:
+        response["results"] = _serialize_results(job.results, job.file_paths)
+    return JSONResponse(content=response)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    
+    job_manager.cancel(job_id)
+    return job.to_dict()
+
+def _check_mode(mode: str):
+    """Reject unknown processing modes before any upload is stored"""
+    if mode not in PROCESSING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported mode: {mode}. Expected one of: {', '.join(PROCESSING_MODES)}"
+        )
+
+def _get_temp_dir() -> str:
+    """Directory for uploaded files, /tmp in cloud function environments"""
+    temp_dir = "/tmp" if os.getenv("ENV") in ["lambda", "cloud"] else tempfile.gettempdir()
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
+async def _save_uploads(files: List[UploadFile], temp_dir: str) -> List[str]:
+    """
+    Copy uploaded files to temp_dir in chunks and return their paths
+    
+    Every file gets its own unique subdirectory, so uploads with the same name
+    never overwrite each other, and keeps its original base name, which loaders
+    report as file_name. Files over the per-file limit, or that push the request
+    over the per-request limit, are rejected with 413 as soon as the limit is
+    crossed; the caller removes temp_dir.
+    
+    Args:
+        files: Uploaded files
+        temp_dir: Directory owned by the request
+        
+    Returns:
+        List[str]: Paths of the saved files, in upload order
+        
+    Raises:
+        HTTPException: 413 if a size limit is exceeded
+    """
+    max_file_bytes = UPLOAD_CONFIG["max_file_bytes"]
+    max_request_bytes = UPLOAD_CONFIG["max_request_bytes"]
+    chunk_bytes = max(UPLOAD_CONFIG["chunk_bytes"], 1)
+    
+    file_paths = []
+    request_bytes = 0
+    for file in files:
+        # Only the base name is kept, so a crafted name cannot leave temp_dir
+        file_name = Path(file.filename or "").name or "upload"
+        
+        # The multipart parser already knows the size, reject before copying anything
+        if max_file_bytes > 0 and file.size is not None and file.size > max_file_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large: {file_name} ({file.size} bytes), limit is {max_file_bytes} bytes"
+            )
+        
+        temp_path = Path(tempfile.mkdtemp(prefix="upload_", dir=temp_dir)) / file_name
+        file_bytes = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                while chunk := await file.read(chunk_bytes):
+                    file_bytes += len(chunk)
+                    request_bytes += len(chunk)
+                    if max_file_bytes > 0 and file_bytes > max_file_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large: {file_name}, limit is {max_file_bytes} bytes"
+                        )
+                    if max_request_bytes > 0 and request_bytes > max_request_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Request too large, limit is {max_request_bytes} bytes"
+                        )
+                    await f.write(chunk)
+        finally:
+            # Release the spooled upload right away
+            await file.close()
+        file_paths.append(str(temp_path))
+    return file_paths
+
+def _result_names(file_paths: List[str]) -> Dict[str, str]:
+    """
+    Name of each uploaded file in responses, unique within a request
+    
+    Uploads keep their original name; later uploads with a name already
+    used get a counter, as in "report (2).pdf".
+    """
+    names = {}
+    used = set()
+    for file_path in file_paths:
+        path = Path(file_path)
+        name, counter = path.name, 2
+        while name in used:
+            name = f"{path.stem} ({counter}){path.suffix}"
+            counter += 1
+        used.add(name)
+        names[file_path] = name
+    return names
+
+def _serialize_results(doc_results: Dict[str, List[Document]], file_paths: List[str]) -> Dict[str, List[dict]]:
+    """Convert Document objects to dict for JSON response, keyed by unique upload name in upload order"""
+    results = {}
+    result_names = _result_names(file_paths)
+    for file_path in file_paths:
+        if file_path not in doc_results:
+            continue
+        documents = doc_results[file_path]
+        results[result_names[file_path]] = [
+            {
+                "content": doc.page_content,
+                "metadata": doc.metadata
+            }
+            for doc in documents
+        ]
+    return results
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,99 @@
+"""Per-page cost of the PDF layout extraction modes ("dict" vs "blocks")
+
+Usage:
+    python benchmarks/pdf_layout.py [file.pdf ...] [--pages 200] [--repeat 3]
+
+Without files a text-heavy PDF is generated. Layout extraction is measured on
+its own and as part of PDFLoader._collect_page_content in text_only mode, so
+no vision calls are made.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz  # PyMuPDF
+from config.settings import PDF_LOADER_CONFIG
+from loaders.pdf_loader import PDFLoader
+
+LAYOUT_MODES = ("dict", "blocks")
+
+def generate_text_pdf(path: Path, pages: int):
+    """Write a text-heavy PDF: two columns of wrapped paragraphs with mixed fonts"""
+    doc = fitz.open()
+    sentence = "Quarterly revenue grew 12.4% while operating costs were flat across all regions. "
+    for page_num in range(pages):
+        page = doc.new_page()
+        for column in range(2):
+            rect = fitz.Rect(40 + column * 270, 40, 290 + column * 270, 800)
+            html = "".join(
+                f"<p>Section {page_num}.{column}.{para} <b>{sentence[:40]}</b> {sentence * 3}</p>"
+                for para in range(9)
+            )
+            page.insert_htmlbox(rect, html, css="p {font-size: 8px; margin: 0 0 6px 0;}")
+    doc.save(path)
+    doc.close()
+
+def time_pages(pdf_path: str, layout_mode: str, repeat: int, full: bool) -> float:
+    """Best of `repeat` runs, in milliseconds per page"""
+    PDF_LOADER_CONFIG["layout_mode"] = layout_mode
+    loader = PDFLoader(pdf_path, mode="text_only")
+    best = float("inf")
+    with fitz.open(pdf_path) as pdf_doc:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for page in pdf_doc:
+                if full:
+                    loader._collect_page_content(page)
+                else:
+                    loader._get_layout_blocks(page)
+            best = min(best, time.perf_counter() - start)
+        return best * 1000 / len(pdf_doc)
+
+def compare_output(pdf_path: str) -> int:
+    """Number of pages whose text differs between the modes, ignoring whitespace"""
+    texts = {}
+    for layout_mode in LAYOUT_MODES:
+        PDF_LOADER_CONFIG["layout_mode"] = layout_mode
+        loader = PDFLoader(pdf_path, mode="text_only")
+        with fitz.open(pdf_path) as pdf_doc:
+            texts[layout_mode] = [
+                "".join(loader._render_page_content(loader._collect_page_content(page)[0]).split())
+                for page in pdf_doc
+            ]
+    return sum(1 for a, b in zip(*texts.values()) if a != b)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF layout extraction modes")
+    parser.add_argument("files", nargs="*", help="PDF files (default: generated text-heavy PDF)")
+    parser.add_argument("--pages", type=int, default=200, help="Pages of the generated PDF")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = args.files
+        if not files:
+            generated = Path(temp_dir) / "text_heavy.pdf"
+            generate_text_pdf(generated, args.pages)
+            files = [str(generated)]
+        
+        original_mode = PDF_LOADER_CONFIG["layout_mode"]
+        try:
+            for pdf_path in files:
+                print(f"{Path(pdf_path).name}:")
+                for label, full in (("layout only", False), ("page content", True)):
+                    timings = {mode: time_pages(pdf_path, mode, args.repeat, full) for mode in LAYOUT_MODES}
+                    print(
+                        f"  {label:<13} dict {timings['dict']:7.2f} ms/page   "
+                        f"blocks {timings['blocks']:7.2f} ms/page   "
+                        f"speedup {timings['dict'] / timings['blocks']:.1f}x"
+                    )
+                print(f"  pages with different text (ignoring whitespace): {compare_output(pdf_path)}")
+        finally:
+            PDF_LOADER_CONFIG["layout_mode"] = original_mode
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Cost of rendering large Word tables: python-docx row.cells vs direct XML traversal
+
+Usage:
+    python benchmarks/word_tables.py [file.docx ...] [--rows 5000] [--repeat 3]
+
+Without files a document with one table of --rows rows is generated, with
+horizontally (gridSpan) and vertically (vMerge) merged cells. Both
+implementations render every table of the document in text_only mode, so
+no vision calls are made, and their output is compared.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from docx import Document as DocxDocument
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from loaders.word_loader import WordLoader
+
+COLUMNS = 5
+
+def generate_table_docx(path: Path, rows: int):
+    """Write a document with one large table, every 10th row spans two columns, the last column merges 3 rows"""
+    doc = DocxDocument()
+    doc.add_paragraph("Large table benchmark")
+    table = doc.add_table(rows=rows, cols=COLUMNS)
+    for row_index, tr in enumerate(table._tbl.tr_lst):
+        tcs = tr.tc_lst
+        if row_index % 10 == 0:
+            tcs[0].get_or_add_tcPr().grid_span = 2
+            tr.remove(tcs[1])
+            tcs = tr.tc_lst
+        for col_index, tc in enumerate(tcs):
+            if col_index == len(tcs) - 1 and row_index % 3:
+                tc.get_or_add_tcPr().vMerge_val = "continue"
+                continue
+            if col_index == len(tcs) - 1:
+                tc.get_or_add_tcPr().vMerge_val = "restart"
+            Paragraph(tc.p_lst[0], table).add_run(f"r{row_index} c{col_index} value {row_index * col_index}")
+    doc.save(path)
+
+def process_table_row_cells(loader: WordLoader, table: Table) -> str:
+    """Previous implementation, based on python-docx row.cells"""
+    rows = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            cell_text = []
+            for paragraph in cell.paragraphs:
+                text = loader._process_paragraph(paragraph)
+                if text.strip():
+                    cell_text.append(text)
+            cells.append(" ".join(cell_text))
+        rows.append(" | ".join(cells))
+    return "\n".join(rows)
+
+def time_tables(docx_path: str, repeat: int):
+    """Best of `repeat` runs per implementation in seconds, and whether the outputs match"""
+    loader = WordLoader(docx_path, mode="text_only")
+    docx_doc = DocxDocument(docx_path)
+    loader._index_image_references(docx_doc)
+    tables = docx_doc.tables
+    
+    timings = {}
+    outputs = {}
+    for name, process in (("row.cells", lambda table: process_table_row_cells(loader, table)),
+                          ("direct XML", loader._process_table)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = [process(table) for table in tables]
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    return timings, outputs["row.cells"] == outputs["direct XML"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Word table rendering")
+    parser.add_argument("files", nargs="*", help="Word files (default: generated table document)")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of the generated table")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the best is reported")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = args.files
+        if not files:
+            generated = Path(temp_dir) / "large_table.docx"
+            generate_table_docx(generated, args.rows)
+            files = [str(generated)]
+        
+        for docx_path in files:
+            timings, identical = time_tables(docx_path, args.repeat)
+            print(f"{Path(docx_path).name}:")
+            print(
+                f"  row.cells {timings['row.cells']:7.3f} s   "
+                f"direct XML {timings['direct XML']:7.3f} s   "
+                f"speedup {timings['row.cells'] / timings['direct XML']:.1f}x"
+            )
+            print(f"  identical output: {identical}")
+
+if __name__ == "__main__":
+    main()
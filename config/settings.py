@@ -31,7 +31,9 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 # 视觉模型配置
 VISION_MODEL_CONFIG = {
     "api_key": OPENAI_API_KEY,
+    "base_url": os.getenv("OPENAI_BASE_URL"),  # 可指向兼容 OpenAI 的代理或本地测试桩
     "default_model": os.getenv("VISION_MODEL", "gpt-4o-mini"),
+    "max_concurrency": int(os.getenv("VISION_MAX_CONCURRENCY", "4")),  # 单个文档内并发的视觉请求数, 1 为串行
     "models": {
         "gpt-4o-mini": {
             "name": "gpt-4o-mini",
@@ -46,6 +48,140 @@ VISION_MODEL_CONFIG = {
     }
 }
 
+# 图像预过滤配置 (跳过装饰性、过小和空白图像，不调用视觉模型)
+IMAGE_FILTER_CONFIG = {
+    "enabled": os.getenv("IMAGE_FILTER_ENABLED", "true").lower() == "true",
+    "min_width": int(os.getenv("IMAGE_FILTER_MIN_WIDTH", "32")),  # 最小像素宽度
+    "min_height": int(os.getenv("IMAGE_FILTER_MIN_HEIGHT", "32")),  # 最小像素高度
+    "min_area_ratio": float(os.getenv("IMAGE_FILTER_MIN_AREA_RATIO", "0.002")),  # 占页面面积的最小比例 (仅 PDF)
+    "max_aspect_ratio": float(os.getenv("IMAGE_FILTER_MAX_ASPECT_RATIO", "20")),  # 超过此长宽比视为分隔线
+    "blank_stddev": float(os.getenv("IMAGE_FILTER_BLANK_STDDEV", "3.0"))  # 灰度标准差低于此值视为空白
+}
+
+# 文档内重复图像去重配置 (默认只合并内容完全相同的图像, 近似重复需显式开启)
+IMAGE_DEDUP_CONFIG = {
+    "enabled": os.getenv("IMAGE_DEDUP_ENABLED", "true").lower() == "true",
+    "max_distance": int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "0")),  # dHash 汉明距离阈值, 0 表示仅去重完全相同的图像 (数字不同的文字图像可能只差几位)
+    "hash_size": int(os.getenv("IMAGE_DEDUP_HASH_SIZE", "32")),  # 近似去重的 dHash 边长 (位数为其平方), 至少 16 才能分辨文字
+    "max_aspect_diff": float(os.getenv("IMAGE_DEDUP_MAX_ASPECT_DIFF", "0.05"))  # 重复图像允许的长宽比相对差异
+}
+
+# 视觉请求图像预处理配置 (缩放、重新编码、选择 detail 级别)
+IMAGE_OPTIMIZER_CONFIG = {
+    "enabled": os.getenv("IMAGE_OPTIMIZER_ENABLED", "true").lower() == "true",
+    "max_dimension": int(os.getenv("IMAGE_OPTIMIZER_MAX_DIMENSION", "2048")),  # high detail 模式下最长边像素
+    "jpeg_quality": int(os.getenv("IMAGE_OPTIMIZER_JPEG_QUALITY", "85")),  # 照片重新编码为 JPEG 的质量
+    "passthrough_max_bytes": int(os.getenv("IMAGE_OPTIMIZER_PASSTHROUGH_MAX_BYTES", str(256 * 1024))),  # 不超过此大小的 PNG/JPEG/WEBP 原样发送
+    "detail": os.getenv("IMAGE_OPTIMIZER_DETAIL", "auto"),  # auto, low, high
+    "low_detail_max_dimension": 512,  # low detail 模式下模型只看 512px
+    "low_detail_max_loss": float(os.getenv("IMAGE_OPTIMIZER_LOW_DETAIL_MAX_LOSS", "0.00005"))  # 缩到 512px 后明显变化的像素比例上限
+}
+
+# 异步视觉请求限流与重试配置
+VISION_RATE_LIMIT_CONFIG = {
+    "async_client": os.getenv("VISION_ASYNC_CLIENT", "true").lower() == "true",  # 文档图像经进程内共享的 AsyncImageExtractor 发送 (限流与重试), false 时使用同步客户端, 失败不重试
+    "requests_per_minute": int(os.getenv("VISION_REQUESTS_PER_MINUTE", "500")),  # 0 表示不限制
+    "tokens_per_minute": int(os.getenv("VISION_TOKENS_PER_MINUTE", "200000")),  # 0 表示不限制
+    "max_retries": int(os.getenv("VISION_MAX_RETRIES", "5")),  # 429/5xx/超时 的重试次数
+    "backoff_base": float(os.getenv("VISION_BACKOFF_BASE", "1.0")),  # 指数退避初始等待秒数
+    "backoff_max": float(os.getenv("VISION_BACKOFF_MAX", "60.0")),  # 单次退避最长等待秒数
+    "timeout": float(os.getenv("VISION_REQUEST_TIMEOUT", "60.0"))  # 单次调用超时秒数
+}
+
+# 文档批处理配置 (DocumentService.process_documents)
+PROCESSING_CONFIG = {
+    "execution_mode": os.getenv("PROCESSING_EXECUTION_MODE", "serial"),  # serial, process
+    "mode": os.getenv("PROCESSING_MODE", "full"),  # full, text_only (不调用视觉模型, 图像保留为占位符)
+    "max_workers": int(os.getenv("PROCESSING_MAX_WORKERS", str(os.cpu_count() or 1))),  # process 模式下的进程数
+    "file_timeout": float(os.getenv("PROCESSING_FILE_TIMEOUT", "600")),  # 单个文件超时秒数, 0 表示不限制
+    "start_method": os.getenv("PROCESSING_START_METHOD") or None  # fork, spawn, forkserver, 默认使用平台默认值
+}
+
+# PDF 加载器配置
+PDF_LOADER_CONFIG = {
+    "shard_workers": int(os.getenv("PDF_SHARD_WORKERS", "0")),  # 按页分片并行解析的进程数, 0/1 表示不分片
+    "min_pages_per_shard": int(os.getenv("PDF_MIN_PAGES_PER_SHARD", "25")),  # 每个分片的最少页数
+    "layout_mode": os.getenv("PDF_LAYOUT_MODE", "dict"),  # dict (逐 span 拼接, 默认) 或 blocks (更快, 但同一行不同样式 span 之间的空格可能不同)
+    "extract_embedded_images": os.getenv("PDF_EXTRACT_EMBEDDED_IMAGES", "true").lower() == "true",  # 优先直接提取内嵌图像流
+    "render_pixel_budget": int(os.getenv("PDF_RENDER_PIXEL_BUDGET", str(1024 * 1024))),  # 需要渲染时单张图像的目标像素数
+    "render_min_zoom": float(os.getenv("PDF_RENDER_MIN_ZOOM", "0.5")),  # 渲染缩放下限 (1.0 = 72 DPI)
+    "render_max_zoom": float(os.getenv("PDF_RENDER_MAX_ZOOM", "2.0"))  # 渲染缩放上限
+}
+
+# Excel 加载器配置
+EXCEL_LOADER_CONFIG = {
+    "rows_per_document": int(os.getenv("EXCEL_ROWS_PER_DOCUMENT", "0")),  # 每个 Document 的行数 (重复表头), 0 表示整个工作簿一个 Document
+    "streaming": os.getenv("EXCEL_STREAMING", "false").lower() == "true",  # 使用 openpyxl 只读模式逐行读取 (仅 xlsx/xlsm), 内存占用有界
+    "streaming_rows_per_document": int(os.getenv("EXCEL_STREAMING_ROWS_PER_DOCUMENT", "1000"))  # 流式模式且未设置 rows_per_document 时的行数
+}
+
+# 文本加载器配置 (.txt/.log/.md/.csv)
+TEXT_LOADER_CONFIG = {
+    "streaming": os.getenv("TEXT_STREAMING", "false").lower() == "true",  # 按块读取文本文件 (JSON/YAML/XML 按顶层记录切分), 每块一个 Document, 内存占用有界
+    "chunk_bytes": int(os.getenv("TEXT_CHUNK_BYTES", str(1024 * 1024))),  # 每块的目标字节数, 块边界对齐到行 (CSV 记录) 末尾
+    "incremental": os.getenv("LOG_INCREMENTAL", "false").lower() == "true"  # .log 文件只读取上次运行后追加的完整行 (检查点见 LOG_CHECKPOINT_CONFIG)
+}
+
+# 后台任务配置 (POST /jobs)
+JOB_CONFIG = {
+    "max_workers": int(os.getenv("JOB_MAX_WORKERS", "2")),  # 后台工作线程数
+    "max_queue_size": int(os.getenv("JOB_MAX_QUEUE_SIZE", "100")),  # 等待中的任务上限, 超出返回 503
+    "result_ttl_seconds": int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))  # 已结束任务的保留时间
+}
+
+# 上传文件配置 (POST /process, /process/stream, /jobs)
+UPLOAD_CONFIG = {
+    "max_file_bytes": int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(100 * 1024 * 1024))),  # 单个文件上限, 超出返回 413 (0 表示不限制)
+    "max_request_bytes": int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(500 * 1024 * 1024))),  # 单个请求所有文件的上限, Content-Length 超出时在读取请求体前拒绝
+    "chunk_bytes": int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))  # 写入临时文件时每次读取的字节数
+}
+
+# 缓存目录 (云函数环境下只有 /tmp 可写)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(Path(TEMP_DIR) / "docuvision_cache" if TEMP_DIR else PROJECT_ROOT / "cache")))
+
+# 视觉结果缓存配置
+VISION_CACHE_CONFIG = {
+    "enabled": os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true",  # 设为 false 可绕过缓存
+    "path": os.getenv("VISION_CACHE_PATH", str(CACHE_DIR / "vision_cache.db")),
+    "max_entries": int(os.getenv("VISION_CACHE_MAX_ENTRIES", "50000")),  # 0 表示不限制
+    "max_bytes": int(os.getenv("VISION_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),  # 0 表示不限制
+    "ttl_seconds": int(os.getenv("VISION_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))  # 0 表示永不过期
+}
+
+# 文档结果缓存配置 (同一文件再次上传时直接返回已解析的 Document 列表)
+RESULT_CACHE_CONFIG = {
+    "enabled": os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true",  # 设为 false 可绕过缓存
+    "backend": os.getenv("RESULT_CACHE_BACKEND", "sqlite"),  # sqlite (单个数据库文件) 或 directory (每个结果一个 JSON 文件)
+    "path": os.getenv("RESULT_CACHE_PATH", str(CACHE_DIR / "document_results.db")),  # sqlite 后端的数据库文件
+    "directory": os.getenv("RESULT_CACHE_DIR", str(CACHE_DIR / "document_results")),  # directory 后端的目录
+    "max_entries": int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000")),  # 0 表示不限制
+    "max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))),  # 0 表示不限制
+    "ttl_seconds": int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))  # 0 表示永不过期
+}
+
+# 修订版本增量处理配置 (PDF 页、幻灯片、Word 章节未变化时复用上一版本的结果)
+UNIT_REUSE_CONFIG = {
+    "enabled": os.getenv("UNIT_REUSE_ENABLED", "true").lower() == "true",  # 设为 false 每次都完整处理
+    "path": os.getenv("UNIT_REUSE_PATH", str(CACHE_DIR / "unit_results.db")),
+    "max_documents": int(os.getenv("UNIT_REUSE_MAX_DOCUMENTS", "1000"))  # 保留最近处理的文档数, 0 表示不限制
+}
+
+# 日志增量读取检查点配置 (轮转、截断后自动全量重读)
+LOG_CHECKPOINT_CONFIG = {
+    "path": os.getenv("LOG_CHECKPOINT_PATH", str(CACHE_DIR / "log_checkpoints.db")),
+    "fingerprint_bytes": int(os.getenv("LOG_CHECKPOINT_FINGERPRINT_BYTES", "4096"))  # 用于识别原地重写的文件头字节数
+}
+
+# 目录增量导入配置 (python main.py <目录> --ingest, 清单记录大小、修改时间、内容哈希与输出位置)
+INGEST_CONFIG = {
+    "manifest_path": os.getenv("INGEST_MANIFEST_PATH", str(CACHE_DIR / "ingest_manifest.db")),
+    "output_dir": os.getenv("INGEST_OUTPUT_DIR", str(OUTPUT_DIR / "ingest")),  # 每个导入目录一个子目录 (目录名-路径哈希), 每个源文件一个 JSON 结果, 按相对路径存放
+    "execution_mode": os.getenv("INGEST_EXECUTION_MODE", "process"),  # serial, process (新增与修改的文件并行处理)
+    "max_workers": int(os.getenv("INGEST_MAX_WORKERS", str(os.cpu_count() or 1))),  # 处理进程数
+    "batch_size": int(os.getenv("INGEST_BATCH_SIZE", "32")),  # 每批处理的文件数, 每批结束后写入清单
+    "scan_workers": int(os.getenv("INGEST_SCAN_WORKERS", "8"))  # 并行扫描目录与计算哈希的线程数 (网络共享盘上可调大)
+}
+
 # 图像提取器配置
 IMAGE_EXTRACTOR_CONFIG = {
     "DEFAULT_PROMPT_LANGUAGE": "auto",  # 自动检测语言
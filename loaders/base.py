@@ -1,17 +1,220 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Iterator, Optional, Union, BinaryIO, Dict, Any
+import hashlib
+import io
+import json
+import logging
+import os
+from pathlib import Path
 from langchain_core.documents import Document
+from processors.image_extractor import ImageExtractor, SYSTEM_PROMPT, USER_PROMPT
+from config.settings import (
+    VISION_MODEL_CONFIG, IMAGE_FILTER_CONFIG, IMAGE_DEDUP_CONFIG, IMAGE_OPTIMIZER_CONFIG, UNIT_REUSE_CONFIG
+)
+from .unit_store import UnitResultStore
+
+logger = logging.getLogger(__name__)
+
+# 处理模式: full 调用视觉模型解析图像, text_only 只提取文本层
+PROCESSING_MODES = ("full", "text_only")
+
+# 文档来源: 文件路径, 内存中的字节 (bytes, bytearray, memoryview) 或二进制文件对象
+DocumentSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+def read_source_bytes(source: Union[bytes, bytearray, memoryview, BinaryIO]) -> bytes:
+    """将内存来源转换为 bytes, 最多复制一次
+    
+    bytes 直接返回; bytearray 和 memoryview 复制一次 (之后调用方修改缓冲区不会影响解析);
+    文件对象从当前位置读取到末尾
+    
+    Args:
+        source: 内存中的文档内容或二进制文件对象
+        
+    Returns:
+        bytes: 文档内容
+        
+    Raises:
+        TypeError: 来源类型不受支持
+    """
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        data = source.read()
+        if isinstance(data, str):
+            raise TypeError("File-like document sources must be opened in binary mode")
+        return data if isinstance(data, bytes) else bytes(data)
+    raise TypeError(f"Unsupported document source: {type(source).__name__}")
+
+# 图像提取失败的状态 (旧版 PDF 结果使用视觉提取器的 "error"), 失败可能是暂时性的 (限流、超时)
+FAILED_STATUSES = ("failed", "error")
+
+def is_failed_image(image: Any) -> bool:
+    """图像元数据是否表示提取失败: 状态为失败或带有 error 字段"""
+    if not isinstance(image, dict):
+        return False
+    return (
+        image.get("status") in FAILED_STATUSES
+        or image.get("extraction_status") in FAILED_STATUSES
+        or bool(image.get("error"))
+    )
+
+def has_failures(documents: List[Document]) -> bool:
+    """是否有文档或图像处理失败, 这样的结果不应缓存、复用或视为已完成
+    
+    Args:
+        documents: 加载器返回的 Document 列表
+        
+    Returns:
+        bool: 有文档的 extraction_status 为失败, 或 images 元数据中有失败的图像
+    """
+    for doc in documents:
+        if doc.metadata.get("extraction_status") in FAILED_STATUSES:
+            return True
+        if any(is_failed_image(image) for image in doc.metadata.get("images") or []):
+            return True
+    return False
 
 class BaseDocumentLoader(ABC):
     """文档加载器基类"""
     
-    def __init__(self, file_path: str):
+    # 输出格式版本, 解析结果发生变化时递增, 使文档结果缓存中的旧结果失效
+    VERSION = "1"
+    
+    def __init__(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None):
         """初始化加载器
         
         Args:
-            file_path: 文档文件路径
+            file_path: 文档文件路径, 或内存中的文档 (bytes, memoryview, 二进制文件对象)
+            mode: 处理模式 (full, text_only), text_only 模式下图像保留为 unprocessed 占位符
+            file_name: 内存文档的文件名, 用于判断格式和填写 source/file_name 元数据
+            
+        Raises:
+            ValueError: 处理模式不受支持
+            TypeError: 文档来源类型不受支持
+        """
+        if mode not in PROCESSING_MODES:
+            raise ValueError(f"Unsupported processing mode: {mode}")
+        if isinstance(file_path, (str, os.PathLike)):
+            self.file_path = file_path
+            self.data: Optional[bytes] = None
+        else:
+            # 内存文档: file_path 只保存文件名, 内容读取一次后各加载器共享
+            source_name = getattr(file_path, "name", None)
+            if file_name is None and isinstance(source_name, str):
+                file_name = Path(source_name).name
+            self.file_path = file_name or "document"
+            self.data = read_source_bytes(file_path)
+        self.mode = mode
+        # 逻辑文档标识, 同一文档的各个修订版本应相同 (默认使用文件名)
+        self.document_id: Optional[str] = None
+        self._image_extractor: Optional[ImageExtractor] = None
+        self._unit_store: Optional[UnitResultStore] = None
+    
+    @property
+    def text_only(self) -> bool:
+        """是否跳过视觉模型"""
+        return self.mode == "text_only"
+    
+    @property
+    def in_memory(self) -> bool:
+        """文档是否来自内存而不是文件"""
+        return self.data is not None
+    
+    def source_exists(self) -> bool:
+        """文档来源是否存在, 内存文档总是存在"""
+        return self.in_memory or Path(self.file_path).exists()
+    
+    def open_source(self) -> BinaryIO:
+        """以二进制方式打开文档, 内存文档返回共享同一缓冲区的 BytesIO (不复制)"""
+        if self.in_memory:
+            return io.BytesIO(self.data)
+        return open(self.file_path, "rb")
+    
+    @property
+    def cacheable(self) -> bool:
+        """同一内容的解析结果是否总是相同, 可以放入文档结果缓存"""
+        return True
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """影响解析结果的处理选项, 作为文档结果缓存键的一部分
+        
+        子类应加入自己的配置 (如分块大小、版面模式)
+        
+        Returns:
+            Dict[str, Any]: 可 JSON 序列化的选项
         """
-        self.file_path = file_path
+        options: Dict[str, Any] = {"mode": self.mode}
+        if not self.text_only:
+            options["vision"] = {
+                "model": VISION_MODEL_CONFIG["default_model"],
+                "system_prompt": SYSTEM_PROMPT,
+                "user_prompt": USER_PROMPT,
+                "image_filter": IMAGE_FILTER_CONFIG,
+                "image_dedup": IMAGE_DEDUP_CONFIG,
+                "image_optimizer": IMAGE_OPTIMIZER_CONFIG
+            }
+        return options
+    
+    @property
+    def unit_store(self) -> Optional[UnitResultStore]:
+        """上一版本各单元 (页、幻灯片、章节) 的结果, 首次使用时打开, 未启用时为 None"""
+        if self._unit_store is None and UNIT_REUSE_CONFIG["enabled"]:
+            self._unit_store = UnitResultStore()
+        return self._unit_store
+    
+    @unit_store.setter
+    def unit_store(self, unit_store: Optional[UnitResultStore]):
+        self._unit_store = unit_store
+    
+    def unit_document_key(self) -> str:
+        """逻辑文档的键: 加载器及版本、处理选项和文档标识, 同一文档的不同修订版本相同"""
+        loader_class = type(self)
+        return hashlib.sha256(json.dumps(
+            {
+                "loader": f"{loader_class.__module__}.{loader_class.__qualname__}",
+                "version": loader_class.VERSION,
+                "options": self.cache_options(),
+                "document": self.document_id or Path(self.file_path).name
+            },
+            sort_keys=True,
+            default=str
+        ).encode("utf-8")).hexdigest()
+    
+    def _previous_units(self) -> Optional[Dict[str, Any]]:
+        """上一版本的单元结果 (按指纹), 未启用单元复用时为 None, 读取失败时按没有上一版本处理"""
+        try:
+            if self.unit_store is None:
+                return None
+            return self.unit_store.get_units(self.unit_document_key())
+        except Exception as e:
+            logger.warning(f"Unit results unavailable for {self.file_path}: {str(e)}")
+            return {}
+    
+    def _save_units(self, units: Dict[str, Any]):
+        """保存本版本的单元结果, 替换上一版本, 失败不影响加载结果"""
+        try:
+            if self.unit_store is not None:
+                self.unit_store.set_units(self.unit_document_key(), units)
+        except Exception as e:
+            logger.warning(f"Failed to save unit results for {self.file_path}: {str(e)}")
+    
+    @staticmethod
+    def _unit_reuse_metadata(reused: int, recomputed: int) -> Dict[str, int]:
+        """复用和重新计算的单元数, 写入 Document 元数据"""
+        return {"units_reused": reused, "units_recomputed": recomputed}
+    
+    @property
+    def image_extractor(self) -> ImageExtractor:
+        """视觉提取器, 首次使用时才创建 OpenAI 客户端, text_only 模式下不会被访问"""
+        if self._image_extractor is None:
+            self._image_extractor = ImageExtractor()
+        return self._image_extractor
+    
+    @image_extractor.setter
+    def image_extractor(self, image_extractor: ImageExtractor):
+        self._image_extractor = image_extractor
     
     @abstractmethod
     def load(self) -> List[Document]:
@@ -20,4 +223,14 @@ class BaseDocumentLoader(ABC):
         Returns:
             List[Document]: Document对象列表
         """
-        pass 
\ No newline at end of file
+        pass 
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """逐个单元(页、幻灯片、工作表)加载文档
+        
+        默认实现调用 load()，支持增量输出的加载器应重写此方法
+        
+        Yields:
+            Document: Document对象
+        """
+        yield from self.load()
\ No newline at end of file
@@ -1,43 +1,206 @@
-from typing import List
+from typing import List, Dict, Any, Optional, Iterator, Iterable
 import logging
+from itertools import islice
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
+from .base import BaseDocumentLoader, DocumentSource
+from config.settings import EXCEL_LOADER_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Formats openpyxl can read in read-only mode
+STREAMING_EXTENSIONS = (".xlsx", ".xlsm")
+
 class ExcelLoader(BaseDocumentLoader):
     """Excel document loader - extracts data from spreadsheets"""
     
-    def __init__(self, file_path: str):
-        """Initialize loader"""
-        super().__init__(file_path)
+    # 2: rows of all-numeric sheets are written like iterrows() again ("1.0 | 1.5", not "1 | 1.5")
+    VERSION = "2"
+    
+    def __init__(self, file_path: DocumentSource, config: Optional[Dict[str, Any]] = None, mode: str = "full",
+                 file_name: Optional[str] = None):
+        """
+        Initialize loader
+
+        Args:
+            file_path: Path to Excel file, or the workbook as bytes, memoryview or binary file object
+            config: Overrides for EXCEL_LOADER_CONFIG
+                - rows_per_document: Split sheets into Documents of this many rows,
+                  each repeating the header (0: one Document for the whole workbook)
+                - streaming: Read .xlsx row by row with openpyxl read-only mode
+                - streaming_rows_per_document: Rows per Document when streaming without rows_per_document
+            mode: Processing mode, spreadsheets have no images so both modes behave the same
+            file_name: File name of an in-memory workbook
+        """
+        super().__init__(file_path, mode, file_name)
+        self.config = {**EXCEL_LOADER_CONFIG, **(config or {})}
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Processing options for the result cache key"""
+        return {**super().cache_options(), "config": self.config}
+    
+    @staticmethod
+    def _row_dtype(df: pd.DataFrame) -> Optional[np.dtype]:
+        """
+        dtype iterrows() gives every row, None when rows are object arrays
+
+        iterrows() reads the rows from df.values: when every column is
+        numeric they are upcast to one numpy dtype (ints next to a float
+        column become floats), a sheet of datetimes only keeps numpy
+        datetime64 values. Any other mix keeps each value's own type.
+        """
+        dtypes = set(df.dtypes)
+        if all(isinstance(dtype, np.dtype) and dtype.kind in "iuf" for dtype in dtypes):
+            return np.result_type(*dtypes)
+        if len(dtypes) == 1:
+            dtype = next(iter(dtypes))
+            if isinstance(dtype, np.dtype) and dtype.kind == "M":
+                return dtype
+        return None
+    
+    def _serialize_rows(self, df: pd.DataFrame) -> pd.Series:
+        """Format every row as "val | val | ..." with column-wise string operations, same text as iterrows()"""
+        row_dtype = self._row_dtype(df)
+        columns = []
+        for _, column in df.items():
+            if row_dtype is not None:
+                # numpy formats the upcast values the same way str() formats each numpy scalar
+                columns.append(pd.Series(column.to_numpy(dtype=row_dtype).astype(str), index=column.index))
+            elif pd.api.types.is_datetime64_any_dtype(column):
+                # Same text as str(Timestamp), astype(str) drops midnight times
+                if column.dt.tz is None and not ((column.dt.microsecond > 0) | (column.dt.nanosecond > 0)).any():
+                    columns.append(column.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("NaT"))
+                else:
+                    columns.append(column.map(str))
+            else:
+                columns.append(column.astype(str).fillna("nan"))
+        if len(columns) == 1:
+            return columns[0]
+        return columns[0].str.cat(columns[1:], sep=" | ")
+    
+    def _format_sheet(self, sheet_name: str, headers: List[str], rows: Iterable[str]) -> str:
+        """Sheet title, header line and data rows"""
+        content_parts = [f"\n=== Sheet: {sheet_name} ===\n"]
+        header_line = " | ".join(headers)
+        content_parts.append(header_line)
+        content_parts.append("-" * len(header_line))
+        content_parts.extend(rows)
+        return "\n".join(content_parts)
     
     def _process_sheet(self, df: pd.DataFrame, sheet_name: str) -> str:
         """Process a single sheet"""
-        content_parts = [f"\n=== Sheet: {sheet_name} ===\n"]
-        
         # Convert DataFrame to string representation
-        if not df.empty:
-            # Add column headers
-            headers = " | ".join(str(col) for col in df.columns)
-            content_parts.append(headers)
-            content_parts.append("-" * len(headers))
+        if df.empty:
+            return f"\n=== Sheet: {sheet_name} ===\n"
+        return self._format_sheet(sheet_name, [str(col) for col in df.columns], self._serialize_rows(df))
+    
+    def _chunk_document(self, excel_path: Path, sheet_name: str, headers: List[str],
+                        rows: List[str], first_row: int) -> Document:
+        """Document for rows [first_row, first_row + len(rows)) of a sheet (1-based, header excluded)"""
+        return Document(
+            page_content=self._format_sheet(sheet_name, headers, rows),
+            metadata={
+                "source": str(excel_path),
+                "file_type": "excel",
+                "file_name": excel_path.name,
+                "sheet": sheet_name,
+                "row_range": [first_row, first_row + len(rows) - 1],
+                "columns": len(headers)
+            }
+        )
+    
+    def _workbook_source(self, excel_path: Path):
+        """What pandas and openpyxl open: the path, or a BytesIO over the in-memory workbook"""
+        return self.open_source() if self.in_memory else excel_path
+    
+    def _iter_sheet_chunks_pandas(self, excel_path: Path, rows_per_document: int) -> Iterator[Document]:
+        """Read each sheet with pandas and split it into row chunks"""
+        excel_file = pd.ExcelFile(self._workbook_source(excel_path))
+        for sheet_name in excel_file.sheet_names:
+            df = pd.read_excel(excel_file, sheet_name=sheet_name)
+            if df.empty:
+                continue
+            headers = [str(col) for col in df.columns]
+            rows = self._serialize_rows(df).tolist()
+            for start in range(0, len(rows), rows_per_document):
+                yield self._chunk_document(excel_path, sheet_name, headers, rows[start:start + rows_per_document], start + 1)
+    
+    def _iter_sheet_chunks_streaming(self, excel_path: Path, rows_per_document: int) -> Iterator[Document]:
+        """
+        Read sheets row by row with openpyxl read-only mode
+
+        Only one chunk of rows is held in memory. Empty cells and unnamed
+        headers are written like the pandas path ("nan", "Unnamed: N"), but
+        numbers keep their cell type: pandas turns whole numbers in a column
+        with gaps into floats ("589.0"), streaming writes "589".
+        """
+        workbook = load_workbook(self._workbook_source(excel_path), read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                # Fully empty rows are skipped like pandas does, the first row left is the header
+                rows = (row for row in worksheet.iter_rows(values_only=True)
+                        if any(value is not None for value in row))
+                header_row = next(rows, None)
+                if header_row is None:
+                    continue
+                headers = [
+                    str(value) if value is not None else f"Unnamed: {idx}"
+                    for idx, value in enumerate(header_row)
+                ]
+                
+                first_row = 1
+                while True:
+                    chunk = [
+                        " | ".join("nan" if value is None else str(value) for value in row[:len(headers)])
+                        for row in islice(rows, rows_per_document)
+                    ]
+                    if not chunk:
+                        break
+                    yield self._chunk_document(excel_path, worksheet.title, headers, chunk, first_row)
+                    first_row += len(chunk)
+        finally:
+            workbook.close()
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """Load Excel document, one Document per row chunk when chunking is configured"""
+        try:
+            # Check file exists
+            excel_path = Path(self.file_path)
+            if not self.source_exists():
+                raise FileNotFoundError(f"Excel file not found: {excel_path}")
+            
+            logger.info(f"Loading Excel document: {excel_path}")
+            rows_per_document = self.config["rows_per_document"]
+            
+            if self.config["streaming"]:
+                rows_per_document = rows_per_document or self.config["streaming_rows_per_document"]
+                if excel_path.suffix.lower() in STREAMING_EXTENSIONS:
+                    yield from self._iter_sheet_chunks_streaming(excel_path, rows_per_document)
+                    return
+                logger.info(f"Streaming is not supported for {excel_path.suffix} files, reading with pandas")
+            
+            if rows_per_document > 0:
+                yield from self._iter_sheet_chunks_pandas(excel_path, rows_per_document)
+                return
             
-            # Add rows
-            for _, row in df.iterrows():
-                row_str = " | ".join(str(val) for val in row.values)
-                content_parts.append(row_str)
+            yield from self.load()
         
-        return "\n".join(content_parts)
+        except Exception as e:
+            logger.error(f"Error loading Excel document: {str(e)}", exc_info=True)
+            yield self._error_document(e)
     
     def load(self) -> List[Document]:
         """Load Excel document and extract content"""
+        if self.config["streaming"] or self.config["rows_per_document"] > 0:
+            return list(self.lazy_load())
+        
         try:
             # Check file exists
             excel_path = Path(self.file_path)
-            if not excel_path.exists():
+            if not self.source_exists():
                 raise FileNotFoundError(f"Excel file not found: {excel_path}")
             
             # Load workbook
@@ -47,7 +210,7 @@ class ExcelLoader(BaseDocumentLoader):
             content_parts = []
             sheet_info = []
             
-            excel_file = pd.ExcelFile(excel_path)
+            excel_file = pd.ExcelFile(self._workbook_source(excel_path))
             for sheet_name in excel_file.sheet_names:
                 df = pd.read_excel(excel_file, sheet_name=sheet_name)
                 
@@ -74,17 +237,19 @@ class ExcelLoader(BaseDocumentLoader):
             )
             
             return [doc]
-            
+        
         except Exception as e:
             logger.error(f"Error loading Excel document: {str(e)}", exc_info=True)
-            # Return error document
-            error_doc = Document(
-                page_content=f"Failed to load Excel document: {str(e)}",
-                metadata={
-                    "source": str(self.file_path),
-                    "file_type": "excel",
-                    "extraction_status": "failed",
-                    "error": str(e)
-                }
-            )
-            return [error_doc] 
\ No newline at end of file
+            return [self._error_document(e)]
+    
+    def _error_document(self, error: Exception) -> Document:
+        """Return error document"""
+        return Document(
+            page_content=f"Failed to load Excel document: {str(error)}",
+            metadata={
+                "source": str(self.file_path),
+                "file_type": "excel",
+                "extraction_status": "failed",
+                "error": str(error)
+            }
+        )
\ No newline at end of file
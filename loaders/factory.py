@@ -1,7 +1,8 @@
 import logging
 from pathlib import Path
-from typing import Type
-from .base import BaseDocumentLoader
+import os
+from typing import Type, Optional
+from .base import BaseDocumentLoader, DocumentSource
 from .pdf_loader import PDFLoader
 from .image_loader import ImageLoader
 from .word_loader import WordLoader
@@ -40,25 +41,71 @@ class DocumentLoaderFactory:
         ".markdown": TextLoader,
     }
     
+    # Map MIME types to extensions, for in-memory documents without a file name
+    MIME_TYPE_MAP = {
+        "application/pdf": ".pdf",
+        "image/png": ".png",
+        "image/jpeg": ".jpg",
+        "image/gif": ".gif",
+        "image/bmp": ".bmp",
+        "image/webp": ".webp",
+        "application/msword": ".doc",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+        "application/vnd.ms-powerpoint": ".ppt",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation": ".pptx",
+        "application/vnd.ms-excel": ".xls",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": ".xlsx",
+        "text/plain": ".txt",
+        "text/csv": ".csv",
+        "application/json": ".json",
+        "application/yaml": ".yaml",
+        "application/x-yaml": ".yaml",
+        "text/yaml": ".yaml",
+        "application/xml": ".xml",
+        "text/xml": ".xml",
+        "text/markdown": ".md",
+    }
+    
     @classmethod
-    def get_loader(cls, file_path: str) -> BaseDocumentLoader:
+    def get_loader(cls, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None,
+                   mime_type: Optional[str] = None) -> BaseDocumentLoader:
         """
         Get appropriate loader for the file
         
         Args:
-            file_path: Path to the document file
+            file_path: Path to the document file, or the document as bytes, memoryview
+                or binary file object (parsed in memory, without a temporary file)
+            mode: Processing mode, "full" or "text_only" (never calls the vision model)
+            file_name: File name hint, its extension selects the loader of an in-memory document
+            mime_type: MIME type hint, used when there is no file name
             
         Returns:
             BaseDocumentLoader: Appropriate loader instance
             
         Raises:
-            ValueError: If file type is not supported
+            ValueError: If file type or processing mode is not supported
         """
-        path = Path(file_path)
-        ext = path.suffix.lower()
+        if file_name is None and isinstance(file_path, (str, os.PathLike)):
+            file_name = str(file_path)
+        if file_name is None and isinstance(getattr(file_path, "name", None), str):
+            file_name = Path(file_path.name).name
+        
+        if file_name is None and mime_type is None:
+            raise ValueError("A file name or MIME type is required to detect the type of an in-memory document")
+        
+        ext = Path(file_name).suffix.lower() if file_name else ""
+        if not ext and mime_type is not None:
+            # Parameters such as "; charset=utf-8" are ignored
+            ext = cls.MIME_TYPE_MAP.get(mime_type.split(";")[0].strip().lower())
+            if ext is None:
+                raise ValueError(f"Unsupported MIME type: {mime_type}")
+            # Loaders select the format by extension, so the in-memory document gets a matching name
+            file_name = f"{file_name or 'document'}{ext}"
         
         if ext not in cls.LOADER_MAP:
             raise ValueError(f"Unsupported file type: {ext}")
             
         loader_class = cls.LOADER_MAP[ext]
-        return loader_class(file_path) 
\ No newline at end of file
+        if isinstance(file_path, (str, os.PathLike)):
+            return loader_class(file_path, mode=mode)
+        return loader_class(file_path, mode=mode, file_name=file_name)
@@ -1,31 +1,42 @@
-from typing import List
+from typing import List, Optional
 import logging
 from pathlib import Path
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
-from processors.image_extractor import ImageExtractor
+from .base import BaseDocumentLoader, DocumentSource
 
 logger = logging.getLogger(__name__)
 
 class ImageLoader(BaseDocumentLoader):
     """Image document loader - extracts information from images"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None):
         """Initialize loader"""
-        super().__init__(file_path)
-        self.image_extractor = ImageExtractor()
+        super().__init__(file_path, mode, file_name)
         
     def load(self) -> List[Document]:
         """Load image and extract information"""
         try:
             # Check file exists
             image_path = Path(self.file_path)
-            if not image_path.exists():
+            if not self.source_exists():
                 raise FileNotFoundError(f"Image file not found: {image_path}")
+            
+            if self.text_only:
+                return [Document(
+                    page_content='<image id="001" status="unprocessed"/>',
+                    metadata={
+                        "source": str(image_path),
+                        "file_type": "image",
+                        "file_name": image_path.name,
+                        "extraction_status": "unprocessed"
+                    }
+                )]
                 
             # Process image
             logger.info(f"Processing image: {image_path}")
-            extraction_result = self.image_extractor.extract_info(image_path)
+            extraction_result = self.image_extractor.extract_info(
+                self.open_source() if self.in_memory else image_path
+            )
             
             if extraction_result["status"] == "success":
                 # Create Document object
@@ -0,0 +1,136 @@
+from typing import Optional, Dict, Any, Iterator, BinaryIO
+from contextlib import contextmanager
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from config.settings import LOG_CHECKPOINT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class LogCheckpointStore:
+    """Per-file read positions for incremental log ingestion
+    
+    For every log file the store keeps the inode and device it was read
+    from, its size, the offset up to which it was consumed, the number of
+    lines before that offset and a fingerprint (SHA-256) of the first bytes.
+    A later run only reads what was appended after the offset, unless the
+    file was rotated (new inode), truncated (smaller than the offset) or
+    rewritten in place (prefix fingerprint changed).
+    """
+    
+    def __init__(self, path: Optional[str] = None, fingerprint_bytes: Optional[int] = None):
+        """
+        Initialize store
+        
+        Args:
+            path: SQLite database file (default: LOG_CHECKPOINT_CONFIG["path"])
+            fingerprint_bytes: Length of the file prefix that is fingerprinted
+        """
+        self.path = Path(path or LOG_CHECKPOINT_CONFIG["path"])
+        self.fingerprint_bytes = LOG_CHECKPOINT_CONFIG["fingerprint_bytes"] if fingerprint_bytes is None else fingerprint_bytes
+        self._init_db()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (one per operation, safe across threads and processes)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _init_db(self):
+        """Create database file and schema"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS log_checkpoints (
+                    path TEXT PRIMARY KEY,
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    lines INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    fingerprint_length INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+    
+    @staticmethod
+    def fingerprint(f: BinaryIO, length: int) -> str:
+        """SHA-256 of the first length bytes of an open binary file, the file position is kept"""
+        position = f.tell()
+        f.seek(0)
+        digest = hashlib.sha256(f.read(length)).hexdigest()
+        f.seek(position)
+        return digest
+    
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpoint of a file, or None if it was never read"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM log_checkpoints WHERE path = ?", (file_path,)
+            ).fetchone()
+        return dict(row) if row else None
+    
+    def set(self, file_path: str, f: BinaryIO, stat_result, offset: int, lines: int):
+        """
+        Record that a file was consumed up to offset
+        
+        Args:
+            file_path: Key of the file (resolved path)
+            f: The file opened in binary mode, used to fingerprint its prefix
+            stat_result: os.stat_result of the open file
+            offset: Byte offset up to which the file was consumed
+            lines: Number of lines before offset
+        """
+        fingerprint_length = min(self.fingerprint_bytes, offset)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO log_checkpoints "
+                "(path, device, inode, size, offset, lines, fingerprint, fingerprint_length, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_path, stat_result.st_dev, stat_result.st_ino, stat_result.st_size, offset, lines,
+                 self.fingerprint(f, fingerprint_length), fingerprint_length, time.time())
+            )
+    
+    def resume_offset(self, file_path: str, f: BinaryIO, stat_result) -> Dict[str, Any]:
+        """
+        Decide where to continue reading a file
+        
+        Args:
+            file_path: Key of the file (resolved path)
+            f: The file opened in binary mode
+            stat_result: os.stat_result of the open file
+        
+        Returns:
+            Dict[str, Any]: offset and lines to resume from, and the reason
+                ("resumed", "initial", "rotated", "truncated" or "rewritten")
+        """
+        checkpoint = self.get(file_path)
+        if checkpoint is None:
+            reason = "initial"
+        elif (checkpoint["device"], checkpoint["inode"]) != (stat_result.st_dev, stat_result.st_ino):
+            reason = "rotated"
+        elif stat_result.st_size < checkpoint["offset"]:
+            reason = "truncated"
+        elif self.fingerprint(f, checkpoint["fingerprint_length"]) != checkpoint["fingerprint"]:
+            # copytruncate followed by new writes past the old offset
+            reason = "rewritten"
+        else:
+            return {"offset": checkpoint["offset"], "lines": checkpoint["lines"], "reason": "resumed"}
+        
+        if checkpoint is not None:
+            logger.info(f"Log file {file_path} was {reason}, reading it from the start")
+        return {"offset": 0, "lines": 0, "reason": reason}
+    
+    def delete(self, file_path: str):
+        """Forget the checkpoint of a file"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM log_checkpoints WHERE path = ?", (file_path,))
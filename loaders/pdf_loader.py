@@ -1,22 +1,51 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator, Optional, Any
 import fitz  # PyMuPDF
+import copy
+import hashlib
+import json
 import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import io
 from PIL import Image
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
-from processors.image_extractor import ImageExtractor
+from .base import BaseDocumentLoader, DocumentSource, is_failed_image
+from .unit_store import unit_fingerprint
+from processors.image_filter import ImageFilter
+from config.settings import PDF_LOADER_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Same flags as get_text("dict") so "blocks" layout mode segments pages identically
+LAYOUT_BLOCK_FLAGS = fitz.TEXTFLAGS_DICT
+
+# Embedded image formats the vision API accepts as they are
+EMBEDDED_IMAGE_FORMATS = ("png", "jpeg", "jpg")
+
 class PDFLoader(BaseDocumentLoader):
     """PDF document loader - extracts text and images"""
     
-    def __init__(self, file_path: str):
+    # 2: failed images are reported as "failed", results cached with "error" are discarded
+    VERSION = "2"
+    
+    def __init__(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None):
         """Initialize loader"""
-        super().__init__(file_path)
-        self.image_extractor = ImageExtractor()
+        super().__init__(file_path, mode, file_name)
+        self.image_filter = ImageFilter()
+        self._page_fingerprints: Optional[List[str]] = None  # Per page, None when unit reuse is off
+        self._page_units: Dict[str, dict] = {}  # Results to store for the next version, by fingerprint
+        self._reused_pages = set()
+        self._unit_reuse: Dict[str, int] = {}
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Processing options for the result cache key, sharding does not change the output"""
+        options = super().cache_options()
+        options["pdf"] = {
+            key: value for key, value in PDF_LOADER_CONFIG.items()
+            if key not in ("shard_workers", "min_pages_per_shard")
+        }
+        return options
     
     def _get_context_text(self, content_parts: List[Dict], current_idx: int, window: int = 2) -> str:
         """
@@ -42,29 +71,31 @@ class PDFLoader(BaseDocumentLoader):
         
         return "\n".join(context)
     
-    def _extract_page_content(self, page: fitz.Page, page_num: int, start_image_index: int = 1) -> Tuple[str, List[dict]]:
-        """Extract text and image content from a page"""
-        blocks = page.get_text("dict")["blocks"]
+    def _collect_page_content(self, page: fitz.Page, start_image_index: int = 1) -> Tuple[List[dict], List[dict], List[tuple]]:
+        """
+        Collect text blocks and rendered images of a page without calling the vision API
+        
+        Returns:
+            Tuple of content parts, image metadata and pending images
+            (content part, image info, image bytes) awaiting extraction
+        """
+        blocks = self._get_layout_blocks(page)
         content_parts = []
         processed_images = []
+        pending_images = []
+        image_infos = None
         
         for block in blocks:
             bbox = block["bbox"]
             y_pos = bbox[1]
             
             if block["type"] == 0:  # Text block
-                if "lines" in block:
-                    text = ""
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            if span["text"].strip():
-                                text += span["text"] + " "
-                    if text.strip():
-                        content_parts.append({
-                            "type": "text",
-                            "content": text.strip(),
-                            "position": y_pos
-                        })
+                if block["text"]:
+                    content_parts.append({
+                        "type": "text",
+                        "content": block["text"],
+                        "position": y_pos
+                    })
             
             elif block["type"] == 1:  # Image block
                 try:
@@ -78,53 +109,192 @@ class PDFLoader(BaseDocumentLoader):
                     # Get context
                     context = self._get_context_text(content_parts, len(content_parts) - 1)
                     
+                    # Text-only mode keeps the position and metadata, the part renders as unprocessed
+                    if self.text_only:
+                        processed_images.append({
+                            "bbox": bbox,
+                            "context": context,
+                            "extraction_status": "unprocessed"
+                        })
+                        continue
+                    
+                    # Placement of the embedded image (xref, native pixel size)
+                    if image_infos is None:
+                        image_infos = self._get_image_infos(page)
+                    placement = self._match_image_info(image_infos, bbox)
+                    width, height = block["width"], block["height"]
+                    if width is None:
+                        width, height = (placement["width"], placement["height"]) if placement else (0, 0)
+                    
+                    # Skip decorative images before rendering them
+                    skip_reason = (
+                        self.image_filter.check_dimensions(width, height)
+                        or self.image_filter.check_page_area(bbox, page.rect)
+                    )
+                    if skip_reason:
+                        processed_images.append(self._skip_image(content_parts[-1], bbox, context, skip_reason))
+                        continue
+                    
                     try:
                         # Get image in memory
-                        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), clip=bbox)
-                        
-                        # Convert to bytes stream
-                        img_byte_arr = io.BytesIO(pix.tobytes("png"))
+                        image_bytes, image_source = self._get_image_bytes(page, bbox, placement)
+                        img_byte_arr = io.BytesIO(image_bytes)
                         
-                        # Process image with extractor
-                        extraction_result = self.image_extractor.extract_info(img_byte_arr)
+                        # Blank or low-detail renders are not worth a vision call either
+                        skip_reason = self.image_filter.check_image(img_byte_arr.getvalue())
+                        if skip_reason:
+                            processed_images.append(self._skip_image(content_parts[-1], bbox, context, skip_reason))
+                            continue
                         
-                        # Record image info
+                        # Queue image, extraction results are filled in by _apply_extraction_results
                         image_info = {
                             "bbox": bbox,
                             "context": context,
-                            "extraction_status": extraction_result["status"]
+                            "image_source": image_source
                         }
-                        
-                        if extraction_result["status"] == "success":
-                            image_info["extracted_content"] = extraction_result["content"]
-                            
-                            # Update content with XML-style markup
-                            content_parts[-1]["content"] = (
-                                f'<image id="{image_index:03d}">\n'
-                                f'{extraction_result["content"]}\n'
-                                f'</image>'
-                            )
-                        else:
-                            image_info["error"] = extraction_result.get("error")
-                            content_parts[-1]["content"] = (
-                                f'<image id="{image_index:03d}" status="failed">\n'
-                                f'Image processing failed: {extraction_result.get("error", "Unknown error")}\n'
-                                f'</image>'
-                            )
-                            
+                        pending_images.append((content_parts[-1], image_info, img_byte_arr))
                         processed_images.append(image_info)
-                        
+                    
                     except Exception as e:
                         logger.error(f"Failed to process image: {str(e)}")
                         processed_images.append({
                             "bbox": bbox,
                             "context": context,
+                            "extraction_status": "failed",
                             "error": str(e)
                         })
-                    
+                
                 except Exception as e:
                     logger.warning(f"Failed to extract image: {str(e)}")
         
+        return content_parts, processed_images, pending_images
+    
+    def _get_layout_blocks(self, page: fitz.Page) -> List[dict]:
+        """
+        Get the text and image blocks of a page in block order
+        
+        The default "dict" layout mode joins the spans of get_text("dict").
+        The opt-in "blocks" mode reads plain block text and image positions
+        without building per-span font, color and bbox data (or encoding the
+        image data). Both modes use the same text flags, so block segmentation
+        and reading order are identical, but "blocks" does not see span
+        boundaries: where "dict" writes two spaces between differently styled
+        spans of a line, it writes the line's own single space.
+        
+        Returns:
+            List of blocks with type (0 text, 1 image), bbox, and text or
+            pixel width/height (None when only the image info knows it)
+        """
+        if PDF_LOADER_CONFIG["layout_mode"] == "dict":
+            blocks = []
+            for block in page.get_text("dict")["blocks"]:
+                if block["type"] == 0:
+                    text = ""
+                    for line in block.get("lines", []):
+                        for span in line["spans"]:
+                            if span["text"].strip():
+                                text += span["text"] + " "
+                    blocks.append({"type": 0, "bbox": block["bbox"], "text": text.strip()})
+                elif block["type"] == 1:
+                    blocks.append({
+                        "type": 1,
+                        "bbox": block["bbox"],
+                        "width": block.get("width", 0),
+                        "height": block.get("height", 0)
+                    })
+            return blocks
+        
+        blocks = []
+        for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks", flags=LAYOUT_BLOCK_FLAGS):
+            if block_type == 0:
+                text = " ".join(line for line in text.split("\n") if line.strip()).strip()
+                blocks.append({"type": 0, "bbox": (x0, y0, x1, y1), "text": text})
+            else:
+                blocks.append({"type": 1, "bbox": (x0, y0, x1, y1), "width": None, "height": None})
+        return blocks
+    
+    def _get_image_infos(self, page: fitz.Page) -> Dict[tuple, List[dict]]:
+        """Map rounded bounding boxes of the page's images to their image info (with xref)"""
+        image_infos = {}
+        for info in page.get_image_info(xrefs=True):
+            image_infos.setdefault(tuple(round(coord, 1) for coord in info["bbox"]), []).append(info)
+        return image_infos
+    
+    def _match_image_info(self, image_infos: Dict[tuple, List[dict]], bbox: tuple) -> Optional[dict]:
+        """Take the image info placed at bbox, None if there is none"""
+        candidates = image_infos.get(tuple(round(coord, 1) for coord in bbox))
+        return candidates.pop(0) if candidates else None
+    
+    def _get_image_bytes(self, page: fitz.Page, bbox: tuple, image_info: Optional[dict]) -> Tuple[bytes, str]:
+        """
+        Get the encoded image of an image block
+        
+        The embedded image stream is used as it is when its format can be sent
+        to the vision API. Otherwise the page region is rendered at a zoom that
+        fits the pixel budget and does not exceed the image's native resolution.
+        
+        Returns:
+            Tuple of image bytes and how they were obtained ("embedded" or "rendered")
+        """
+        xref = image_info.get("xref", 0) if image_info else 0
+        if xref and PDF_LOADER_CONFIG["extract_embedded_images"]:
+            try:
+                extracted = page.parent.extract_image(xref)
+                # Soft masks and CMYK/DeviceN color spaces only look right when rendered
+                if extracted and extracted["ext"] in EMBEDDED_IMAGE_FORMATS \
+                        and not extracted.get("smask") and extracted.get("colorspace") in (1, 3):
+                    return extracted["image"], "embedded"
+            except Exception as e:
+                logger.debug(f"Could not extract embedded image {xref}: {str(e)}")
+        
+        clip = fitz.Rect(bbox)
+        zoom = math.sqrt(PDF_LOADER_CONFIG["render_pixel_budget"] / max(clip.width * clip.height, 1))
+        if image_info and image_info.get("width") and clip.width > 0:
+            # Rendering above the native resolution only inflates the payload
+            zoom = min(zoom, image_info["width"] / clip.width)
+        zoom = min(max(zoom, PDF_LOADER_CONFIG["render_min_zoom"]), PDF_LOADER_CONFIG["render_max_zoom"])
+        
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+        return pix.tobytes("png"), "rendered"
+    
+    def _skip_image(self, part: dict, bbox: tuple, context: str, reason: str) -> dict:
+        """Mark an image rejected by the image filter and return its metadata"""
+        logger.info(f"Skipping image {part['image_index']:03d}: {reason}")
+        # The placeholder is rendered later, image_index may still be shifted by sharding
+        part["status"] = "skipped"
+        return {
+            "bbox": bbox,
+            "context": context,
+            "extraction_status": "skipped",
+            "skip_reason": reason
+        }
+    
+    def _apply_extraction_results(self, pending_images: List[tuple], extraction_results: List[dict]):
+        """Write vision results back into the content parts and image metadata"""
+        for (part, image_info, _), extraction_result in zip(pending_images, extraction_results):
+            image_index = part["image_index"]
+            # Same statuses as the other loaders: the extractor reports failures as "error"
+            image_info["extraction_status"] = "success" if extraction_result["status"] == "success" else "failed"
+            
+            if extraction_result["status"] == "success":
+                image_info["extracted_content"] = extraction_result["content"]
+                
+                # Update content with XML-style markup
+                part["content"] = (
+                    f'<image id="{image_index:03d}">\n'
+                    f'{extraction_result["content"]}\n'
+                    f'</image>'
+                )
+            else:
+                image_info["error"] = extraction_result.get("error")
+                part["content"] = (
+                    f'<image id="{image_index:03d}" status="failed">\n'
+                    f'Image processing failed: {extraction_result.get("error", "Unknown error")}\n'
+                    f'</image>'
+                )
+    
+    def _render_page_content(self, content_parts: List[dict]) -> str:
+        """Join content parts in reading order"""
         # Sort by position
         content_parts.sort(key=lambda x: x["position"])
         
@@ -134,39 +304,269 @@ class PDFLoader(BaseDocumentLoader):
             if part["type"] == "text":
                 final_text.append(part["content"])
             else:  # image
-                content = part.get("content", f'<image id="{part["image_index"]:03d}" status="unprocessed"/>')
+                content = part.get(
+                    "content",
+                    f'<image id="{part["image_index"]:03d}" status="{part.get("status", "unprocessed")}"/>'
+                )
                 final_text.append(content)
         
-        return "\n".join(final_text), processed_images
-
-    def load(self) -> List[Document]:
-        """Load PDF document, extract text and images"""
-        pdf_doc = fitz.open(self.file_path)
+        return "\n".join(final_text)
+    
+    def _extract_page_content(self, page: fitz.Page, page_num: int, start_image_index: int = 1) -> Tuple[str, List[dict]]:
+        """Extract text and image content from a page"""
+        content_parts, processed_images, pending_images = self._collect_page_content(page, start_image_index)
+        
+        # Images on the page are sent to the vision API concurrently
+        if pending_images:
+            extraction_results = self.image_extractor.extract_many(
+                [img_byte_arr for _, _, img_byte_arr in pending_images]
+            )
+            self._apply_extraction_results(pending_images, extraction_results)
+        
+        return self._render_page_content(content_parts), processed_images
+    
+    def _flush_pages(self, pending_pages: List[tuple], total_pages: int) -> List[Document]:
+        """Run vision extraction for all images of the buffered pages and build their Documents"""
+        pending_images = [item for _, _, _, page_images in pending_pages for item in page_images]
+        if pending_images:
+            extraction_results = self.image_extractor.extract_many(
+                [img_byte_arr for _, _, img_byte_arr in pending_images]
+            )
+            self._apply_extraction_results(pending_images, extraction_results)
+        
         documents = []
-        current_image_index = 1
+        for page_num, content_parts, images, _ in pending_pages:
+            metadata = {
+                "source": str(self.file_path),
+                "page": page_num + 1,
+                "total_pages": total_pages,
+                "images": images
+            }
+            if self._page_fingerprints is not None:
+                self._record_page_unit(page_num, content_parts, images)
+                metadata["unit_reused"] = page_num in self._reused_pages
+                metadata.update(self._unit_reuse)
+            documents.append(Document(
+                page_content=self._render_page_content(content_parts),
+                metadata=metadata
+            ))
+        return documents
+    
+    def _record_page_unit(self, page_num: int, content_parts: List[dict], images: List[dict]):
+        """Keep the result of a page for the next version, unless an image failed (may be transient)"""
+        if any(is_failed_image(image) for image in images):
+            return
+        image_indexes = [part["image_index"] for part in content_parts if part["type"] == "image"]
+        # Parts are sorted by position here, as they are when a reused page is rendered
+        content_parts.sort(key=lambda x: x["position"])
+        self._page_units[self._page_fingerprints[page_num]] = {
+            "content_parts": content_parts,
+            "images": images,
+            "first_image_index": min(image_indexes, default=0)
+        }
+    
+    def _page_fingerprint(self, pdf_doc: fitz.Document, page: fitz.Page, stream_digests: Dict[int, bytes]) -> str:
+        """
+        Fingerprint of everything a page's output is derived from, without parsing its layout
+        
+        Covers the page box and rotation, the decoded content stream (text and
+        inline images) and, by resource name, the decoded streams of its images
+        and form XObjects and the fonts. Resources are identified by content, not
+        by xref number or compression, so pages copied into a new revision keep
+        their fingerprint.
+        
+        Args:
+            pdf_doc: Open document
+            page: Page to fingerprint
+            stream_digests: Digest per xref, shared across the pages of one document
+        """
+        def stream_digest(xref: int) -> bytes:
+            if xref not in stream_digests:
+                stream_digests[xref] = hashlib.sha256(pdf_doc.xref_stream(xref) or b"").digest() if xref else b""
+            return stream_digests[xref]
+        
+        resources = [
+            (name, stream_digest(xref).hex(), smask and stream_digest(smask).hex())
+            for xref, smask, *_, name, _, _ in page.get_images(full=True)
+        ]
+        resources += [(name, stream_digest(xref).hex()) for xref, name, _, _ in page.get_xobjects()]
+        resources += [font[2:6] for font in page.get_fonts(full=True)]
+        header = json.dumps([tuple(page.rect), page.rotation, resources]).encode("utf-8")
+        return unit_fingerprint(header, page.read_contents())
+    
+    def _reuse_page(self, unit: dict, start_image_index: int) -> Tuple[List[dict], List[dict]]:
+        """
+        Content parts and image metadata of a page stored by a previous version
+        
+        Image numbers are shifted to continue from start_image_index. The stored
+        unit is not modified, pages with the same fingerprint share it.
+        """
+        content_parts, images = copy.deepcopy(unit["content_parts"]), copy.deepcopy(unit["images"])
+        shift = start_image_index - unit["first_image_index"]
+        for part in content_parts:
+            if part["type"] == "image" and shift:
+                old_tag = f'<image id="{part["image_index"]:03d}"'
+                part["image_index"] += shift
+                if "content" in part:
+                    part["content"] = f'<image id="{part["image_index"]:03d}"' + part["content"][len(old_tag):]
+        for image in images:
+            image["bbox"] = tuple(image["bbox"])
+        return content_parts, images
+    
+    def _collect_pages(self, pdf_doc: fitz.Document, start_page: int, end_page: int,
+                       reused_units: Optional[Dict[int, dict]] = None) -> Iterator[tuple]:
+        """
+        Collect pages [start_page, end_page) in order
+        
+        Image numbering starts at 1 for start_page.
+        
+        Args:
+            reused_units: Stored results of a previous version per page number,
+                these pages are not parsed again
         
-        for page_num in range(len(pdf_doc)):
+        Yields:
+            Tuple of page number (0-based), content parts, image metadata and pending images
+        """
+        current_image_index = 1
+        for page_num in range(start_page, end_page):
+            if reused_units and page_num in reused_units:
+                content_parts, images = self._reuse_page(reused_units[page_num], current_image_index)
+                current_image_index += len(images)
+                yield page_num, content_parts, images, []
+                continue
+            
             page = pdf_doc[page_num]
             
-            # Extract page content and images
-            text, images = self._extract_page_content(
-                page, 
-                page_num + 1,
+            # Extract page content and queue its images
+            content_parts, images, page_images = self._collect_page_content(
+                page,
                 current_image_index
             )
             current_image_index += len(images)
             
-            # Create Document object
-            doc = Document(
-                page_content=text,
-                metadata={
-                    "source": str(self.file_path),
-                    "page": page_num + 1,
-                    "total_pages": len(pdf_doc),
-                    "images": images
-                }
-            )
-            documents.append(doc)
+            yield page_num, content_parts, images, page_images
+    
+    def _collect_pages_sharded(self, total_pages: int, workers: int) -> Iterator[tuple]:
+        """
+        Collect pages in worker processes, each opening the file on its own
         
-        pdf_doc.close()
-        return documents 
\ No newline at end of file
+        Shards are consumed in page order and their image numbering is shifted
+        by the number of images in earlier shards, so the output matches
+        _collect_pages over the whole document.
+        """
+        shard_size = max(PDF_LOADER_CONFIG["min_pages_per_shard"], math.ceil(total_pages / (workers * 2)))
+        page_ranges = [(start, min(start + shard_size, total_pages)) for start in range(0, total_pages, shard_size)]
+        logger.info(f"Parsing {total_pages} pages in {len(page_ranges)} shards with {workers} worker processes")
+        
+        image_offset = 0
+        with ProcessPoolExecutor(max_workers=min(workers, len(page_ranges))) as executor:
+            futures = [
+                executor.submit(_collect_page_range, self.file_path, start_page, end_page, self.mode)
+                for start_page, end_page in page_ranges
+            ]
+            for future in futures:
+                shard_image_count = 0
+                for page_num, content_parts, images, page_images in future.result():
+                    for part in content_parts:
+                        if part["type"] == "image":
+                            part["image_index"] += image_offset
+                    shard_image_count += len(images)
+                    yield page_num, content_parts, images, page_images
+                image_offset += shard_image_count
+    
+    def _match_previous_pages(self, pdf_doc: fitz.Document) -> Dict[int, dict]:
+        """
+        Fingerprint all pages and find those unchanged since the previous version
+        
+        Sets the per-document reuse state used by _flush_pages; page
+        fingerprints stay None when unit reuse is disabled.
+        
+        Returns:
+            Dict[int, dict]: Stored result per unchanged page number
+        """
+        self._page_fingerprints = None
+        self._page_units = {}
+        self._reused_pages = set()
+        
+        previous_units = self._previous_units()
+        if previous_units is None:
+            return {}
+        try:
+            stream_digests = {}
+            self._page_fingerprints = [
+                self._page_fingerprint(pdf_doc, page, stream_digests) for page in pdf_doc
+            ]
+        except Exception as e:
+            logger.warning(f"Page fingerprinting failed, processing all pages: {str(e)}")
+            return {}
+        
+        reused_units = {
+            page_num: previous_units[fingerprint]
+            for page_num, fingerprint in enumerate(self._page_fingerprints)
+            if fingerprint in previous_units
+        }
+        self._reused_pages = set(reused_units)
+        self._unit_reuse = self._unit_reuse_metadata(len(reused_units), len(pdf_doc) - len(reused_units))
+        if reused_units:
+            logger.info(f"Reusing {len(reused_units)} of {len(pdf_doc)} unchanged pages of the previous version")
+        return reused_units
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """Load PDF document page by page, extract text and images"""
+        if self.in_memory:
+            # fitz keeps a reference to the buffer instead of copying it
+            pdf_doc = fitz.open(stream=self.data, filetype="pdf")
+        else:
+            pdf_doc = fitz.open(self.file_path)
+        try:
+            total_pages = len(pdf_doc)
+            reused_units = self._match_previous_pages(pdf_doc)
+            
+            # Large documents are split into page ranges parsed by several processes.
+            # In-memory documents are not sharded, every worker would need its own copy,
+            # nor are revisions that reuse pages of the previous version.
+            shard_workers = PDF_LOADER_CONFIG["shard_workers"]
+            if shard_workers > 1 and not self.in_memory and not reused_units \
+                    and total_pages >= 2 * PDF_LOADER_CONFIG["min_pages_per_shard"]:
+                pdf_doc.close()
+                pages = self._collect_pages_sharded(total_pages, shard_workers)
+            else:
+                pages = self._collect_pages(pdf_doc, 0, total_pages, reused_units)
+            
+            # Pages are buffered until enough images are queued to keep all
+            # concurrent vision requests busy, which also bounds memory use.
+            # Pages without pending images are emitted right away.
+            max_pending = 1 if self.text_only else self.image_extractor.max_concurrency * 4
+            pending_pages = []
+            pending_image_count = 0
+            
+            for page_num, content_parts, images, page_images in pages:
+                pending_pages.append((page_num, content_parts, images, page_images))
+                pending_image_count += len(page_images)
+                if pending_image_count == 0 or pending_image_count >= max_pending \
+                        or len(pending_pages) >= max_pending:
+                    yield from self._flush_pages(pending_pages, total_pages)
+                    pending_pages = []
+                    pending_image_count = 0
+            
+            yield from self._flush_pages(pending_pages, total_pages)
+            
+            # Only a fully consumed document replaces the previous version
+            if self._page_fingerprints is not None:
+                self._save_units(self._page_units)
+        
+        finally:
+            if not pdf_doc.is_closed:
+                pdf_doc.close()
+    
+    def load(self) -> List[Document]:
+        """Load PDF document, extract text and images"""
+        return list(self.lazy_load())
+
+def _collect_page_range(file_path: str, start_page: int, end_page: int, mode: str = "full") -> List[tuple]:
+    """Worker process entry point: collect a page range (fitz handles cannot be shared across processes)"""
+    pdf_doc = fitz.open(file_path)
+    try:
+        return list(PDFLoader(file_path, mode)._collect_pages(pdf_doc, start_page, end_page))
+    finally:
+        pdf_doc.close()
\ No newline at end of file
@@ -1,71 +1,179 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+import hashlib
 import logging
 from pathlib import Path
 import io
+from lxml import etree
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.oxml.ns import nsmap, qn
+from pptx.spec import GRAPHIC_DATA_URI_TABLE
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
-from processors.image_extractor import ImageExtractor
+from .base import BaseDocumentLoader, DocumentSource, is_failed_image
+from .unit_store import unit_fingerprint
+from processors.image_filter import ImageFilter
 
 logger = logging.getLogger(__name__)
 
+# Shape elements of a shape tree, as listed by python-pptx
+P_SP = qn("p:sp")
+P_PIC = qn("p:pic")
+P_GRPSP = qn("p:grpSp")
+P_GRAPHICFRAME = qn("p:graphicFrame")
+SHAPE_TAGS = (P_SP, qn("p:grpSp"), P_GRAPHICFRAME, qn("p:cxnSp"), P_PIC, qn("p:contentPart"))
+P_TXBODY = qn("p:txBody")
+A_TXBODY = qn("a:txBody")
+A_P = qn("a:p")
+A_TR = qn("a:tr")
+A_TC = qn("a:tc")
+R_EMBED = qn("r:embed")
+NAMESPACES = nsmap("a", "p")
+PLACEHOLDER_XPATH = etree.XPath("./*[1]/p:nvPr/p:ph", namespaces=NAMESPACES)
+VIDEO_XPATH = etree.XPath("./p:nvPicPr/p:nvPr/a:videoFile", namespaces=NAMESPACES)
+TABLE_XPATH = etree.XPath(
+    f"./a:graphic/a:graphicData[@uri='{GRAPHIC_DATA_URI_TABLE}']/a:tbl", namespaces=NAMESPACES
+)
+
 class PPTLoader(BaseDocumentLoader):
     """PowerPoint document loader - extracts text and images from slides"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None):
         """Initialize loader"""
-        super().__init__(file_path)
-        self.image_extractor = ImageExtractor()
+        super().__init__(file_path, mode, file_name)
+        self.image_filter = ImageFilter()
         self.image_map = {}  # Map to store image positions
+        self.unit_reuse: Dict[str, int] = {}  # Reused and recomputed slides, when unit reuse is enabled
+    
+    def _slide_fingerprint(self, slide) -> str:
+        """Fingerprint of a slide: its XML and the content of every image it references"""
+        parts = [slide.part.blob]
+        for rel in slide.part.rels.values():
+            if "image" in rel.reltype:
+                parts.append(rel.rId.encode("utf-8"))
+                parts.append(rel.target_ref.encode("utf-8") if rel.is_external
+                             else hashlib.sha256(rel.target_part.blob).digest())
+        return unit_fingerprint(*parts)
     
-    def _extract_images(self, prs: Presentation) -> Dict[str, dict]:
-        """Extract images from presentation and map them to their relationships"""
+    def _extract_images(self, prs: Presentation) -> Dict[Tuple[str, str], dict]:
+        """
+        Extract images from presentation and map them to their (slide part, relationship) keys
+        
+        Images of slides unchanged since the previous version of the document
+        (same slide fingerprint) take their stored results instead of being
+        filtered and sent to the vision API again.
+        """
         images = {}
+        pending_images = []  # (image info, image bytes) awaiting extraction
         image_index = 1
+        previous_units = self._previous_units()
+        slide_units = []  # (fingerprint, image keys) per slide
+        reused_slides = 0
         
-        # Process all slides
+        # Collect images of all slides first so they can be sent to the vision API concurrently
         for slide_idx, slide in enumerate(prs.slides, 1):  # 使用 enumerate 获取索引
+            fingerprint = None
+            if previous_units is not None:
+                try:
+                    fingerprint = self._slide_fingerprint(slide)
+                except Exception as e:
+                    logger.warning(f"Failed to fingerprint slide {slide_idx}: {str(e)}")
+            stored_images = previous_units.get(fingerprint) if fingerprint else None
+            if stored_images is not None:
+                reused_slides += 1
+            
+            image_keys = []
             for rel in slide.part.rels.values():
                 if "image" in rel.reltype:
+                    # rIds are only unique within a slide part
+                    image_key = (str(slide.part.partname), rel.rId)
+                    image_keys.append(image_key)
+                    if stored_images is not None and rel.rId in stored_images:
+                        images[image_key] = {"index": image_index, "slide": slide_idx, **stored_images[rel.rId]}
+                        image_index += 1
+                        continue
+                    if self.text_only:
+                        images[image_key] = {"index": image_index, "slide": slide_idx, "status": "unprocessed"}
+                        image_index += 1
+                        continue
+                    
                     try:
                         # Get image data
                         image_data = rel.target_part.blob
-                        img_stream = io.BytesIO(image_data)
-                        
-                        # Process image
-                        logger.info(f"Processing embedded image {image_index} from slide {slide_idx}")
-                        extraction_result = self.image_extractor.extract_info(img_stream)
+                        images[image_key] = {
+                            "index": image_index,
+                            "slide": slide_idx  # 使用 enumerate 的索引
+                        }
                         
-                        if extraction_result["status"] == "success":
-                            images[rel.rId] = {
-                                "index": image_index,
-                                "slide": slide_idx,  # 使用 enumerate 的索引
-                                "content": extraction_result["content"],
-                                "status": "success"
-                            }
+                        # Skip decorative images (bullets, rules, blank fills) without an API call
+                        skip_reason = self.image_filter.check_image(image_data)
+                        if skip_reason:
+                            logger.info(f"Skipping embedded image {image_index} from slide {slide_idx}: {skip_reason}")
+                            images[image_key].update({"status": "skipped", "skip_reason": skip_reason})
                         else:
-                            images[rel.rId] = {
-                                "index": image_index,
-                                "slide": slide_idx,  # 使用 enumerate 的索引
-                                "error": extraction_result.get("error", "Unknown error"),
-                                "status": "failed"
-                            }
-                        
+                            pending_images.append((images[image_key], io.BytesIO(image_data)))
                         image_index += 1
                         
                     except Exception as e:
                         logger.error(f"Failed to process image {image_index} from slide {slide_idx}: {str(e)}")
-                        images[rel.rId] = {
+                        images[image_key] = {
                             "index": image_index,
                             "slide": slide_idx,  # 使用 enumerate 的索引
                             "error": str(e),
                             "status": "failed"
                         }
                         image_index += 1
+            slide_units.append((fingerprint, image_keys))
         
+        if pending_images:
+            # Process images
+            logger.info(f"Processing {len(pending_images)} embedded images")
+            extraction_results = self.image_extractor.extract_many(
+                [img_stream for _, img_stream in pending_images]
+            )
+            
+            for (image_info, _), extraction_result in zip(pending_images, extraction_results):
+                if extraction_result["status"] == "success":
+                    image_info["content"] = extraction_result["content"]
+                    image_info["status"] = "success"
+                else:
+                    image_info["error"] = extraction_result.get("error", "Unknown error")
+                    image_info["status"] = "failed"
+        
+        if previous_units is not None:
+            self._save_slide_units(slide_units, images)
+            self.unit_reuse = self._unit_reuse_metadata(reused_slides, len(slide_units) - reused_slides)
         return images
     
+    def _save_slide_units(self, slide_units: List[tuple], images: Dict[Tuple[str, str], dict]):
+        """Store the image results of each slide by fingerprint, slides with a failed image are left out"""
+        units = {}
+        for fingerprint, image_keys in slide_units:
+            slide_images = [images[key] for key in image_keys]
+            if fingerprint is None or any(is_failed_image(img) for img in slide_images):
+                continue
+            # Numbers are assigned again when the slide is reused
+            units[fingerprint] = {
+                key[1]: {k: v for k, v in img.items() if k not in ("index", "slide")}
+                for key, img in zip(image_keys, slide_images)
+            }
+        self._save_units(units)
+    
+    def _render_image(self, img: dict) -> str:
+        """Render image placeholder"""
+        if img["status"] == "success":
+            return (
+                f'\n<image id="{img["index"]:03d}">\n'
+                f'{img["content"]}\n'
+                f'</image>\n'
+            )
+        elif img["status"] in ("skipped", "unprocessed"):
+            return f'\n<image id="{img["index"]:03d}" status="{img["status"]}"/>\n'
+        return (
+            f'\n<image id="{img["index"]:03d}" status="failed">\n'
+            f'Image processing failed: {img.get("error", "Unknown error")}\n'
+            f'</image>\n'
+        )
+    
     def _process_shape(self, shape) -> str:
         """Process a shape and extract its content"""
         content_parts = []
@@ -84,20 +192,9 @@ class PPTLoader(BaseDocumentLoader):
                         blip_rId = element.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
                         break
                 
-                if blip_rId and blip_rId in self.image_map:
-                    img = self.image_map[blip_rId]
-                    if img["status"] == "success":
-                        content_parts.append(
-                            f'\n<image id="{img["index"]:03d}">\n'
-                            f'{img["content"]}\n'
-                            f'</image>\n'
-                        )
-                    else:
-                        content_parts.append(
-                            f'\n<image id="{img["index"]:03d}" status="failed">\n'
-                            f'Image processing failed: {img.get("error", "Unknown error")}\n'
-                            f'</image>\n'
-                        )
+                image_key = (str(shape.part.partname), blip_rId)
+                if blip_rId and image_key in self.image_map:
+                    content_parts.append(self._render_image(self.image_map[image_key]))
             except Exception as e:
                 logger.error(f"Failed to process picture shape: {str(e)}")
         
@@ -141,6 +238,90 @@ class PPTLoader(BaseDocumentLoader):
         
         return "\n".join(content_parts)
     
+    def _text_body_text(self, txBody) -> str:
+        """Text of a p:txBody or a:txBody element, like python-pptx TextFrame.text"""
+        if txBody is None:
+            return ""
+        return "\n".join(p.text for p in txBody.iterchildren(A_P))
+    
+    def _process_shape_element(self, elm, partname: str, in_group: bool = False) -> str:
+        """
+        Process a shape element, producing the same content as _process_shape
+        
+        Args:
+            elm: p:sp, p:pic, p:grpSp, p:graphicFrame, p:cxnSp or p:contentPart element
+            partname: Part name of the slide, images are keyed by (part name, rId)
+            in_group: Shapes inside groups are never treated as placeholders by python-pptx
+        """
+        tag = elm.tag
+        if tag == P_SP:
+            return self._text_body_text(elm.find(P_TXBODY)).strip()
+        
+        content_parts = []
+        if tag == P_PIC:
+            # Movies and picture placeholders are not MSO_SHAPE_TYPE.PICTURE shapes
+            if VIDEO_XPATH(elm) or (not in_group and PLACEHOLDER_XPATH(elm)):
+                return ""
+            blip_rId = None
+            for element in elm.iter():
+                if element.tag.endswith('blip'):
+                    blip_rId = element.get(R_EMBED)
+                    break
+            image_key = (partname, blip_rId)
+            if blip_rId and image_key in self.image_map:
+                content_parts.append(self._render_image(self.image_map[image_key]))
+        
+        elif tag == P_GRPSP:
+            for child in elm.iterchildren(*SHAPE_TAGS):
+                child_content = self._process_shape_element(child, partname, in_group=True)
+                if child_content:
+                    content_parts.append(child_content)
+        
+        elif tag == P_GRAPHICFRAME:
+            rows = []
+            for tbl in TABLE_XPATH(elm):
+                for tr in tbl.iterchildren(A_TR):
+                    cells = []
+                    for tc in tr.iterchildren(A_TC):
+                        cell_text = self._text_body_text(tc.find(A_TXBODY)).strip()
+                        if cell_text:
+                            cells.append(cell_text)
+                    if cells:
+                        rows.append(" | ".join(cells))
+            if rows:
+                content_parts.append("\n".join(rows))
+        
+        return "\n".join(content_parts)
+    
+    def _process_slide_xml(self, slide, slide_number: int) -> str:
+        """
+        Process a slide in one pass over its shape tree XML
+        
+        Produces the same content as _process_slide without creating
+        python-pptx shape, text frame and table proxies. Charts, SmartArt
+        and other non-table graphic frames contribute nothing.
+        """
+        content_parts = [f"\n=== Slide {slide_number} ===\n"]
+        partname = str(slide.part.partname)
+        shape_elms = list(slide._element.cSld.spTree.iterchildren(*SHAPE_TAGS))
+        
+        # The title is the first placeholder with idx 0 (the default)
+        for elm in shape_elms:
+            ph = PLACEHOLDER_XPATH(elm)
+            if ph and int(ph[0].get("idx", "0")) == 0:
+                if elm.tag == P_SP:
+                    title = self._text_body_text(elm.find(P_TXBODY)).strip()
+                    if title:
+                        content_parts.append(f"Title: {title}\n")
+                break
+        
+        for elm in shape_elms:
+            content = self._process_shape_element(elm, partname)
+            if content:
+                content_parts.append(content)
+        
+        return "\n".join(content_parts)
+    
     def _extract_content(self, prs: Presentation) -> Tuple[str, List[dict]]:
         """Extract content from presentation"""
         content_parts = []
@@ -148,7 +329,11 @@ class PPTLoader(BaseDocumentLoader):
         
         # Process all slides
         for idx, slide in enumerate(prs.slides, 1):
-            slide_content = self._process_slide(slide, idx)
+            try:
+                slide_content = self._process_slide_xml(slide, idx)
+            except Exception as e:
+                logger.warning(f"Fast slide processing failed on slide {idx}, using python-pptx shapes: {str(e)}")
+                slide_content = self._process_slide(slide, idx)
             if slide_content:
                 content_parts.append(slide_content)
         
@@ -161,12 +346,12 @@ class PPTLoader(BaseDocumentLoader):
         try:
             # Check file exists
             ppt_path = Path(self.file_path)
-            if not ppt_path.exists():
+            if not self.source_exists():
                 raise FileNotFoundError(f"PowerPoint file not found: {ppt_path}")
             
-            # Load presentation
+            # Load presentation (in-memory documents are read from the shared buffer)
             logger.info(f"Loading PowerPoint document: {ppt_path}")
-            prs = Presentation(ppt_path)
+            prs = Presentation(self.open_source() if self.in_memory else ppt_path)
             
             # Extract content
             content, images = self._extract_content(prs)
@@ -179,7 +364,8 @@ class PPTLoader(BaseDocumentLoader):
                     "file_type": "powerpoint",
                     "file_name": ppt_path.name,
                     "total_slides": len(prs.slides),
-                    "images": images
+                    "images": images,
+                    **self.unit_reuse
                 }
             )
             
@@ -1,15 +1,116 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, BinaryIO, TextIO
 import logging
+import os
+import re
 from pathlib import Path
+import io
 import json
 import csv
 import yaml
 import xml.etree.ElementTree as ET
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
+from .base import BaseDocumentLoader, DocumentSource
+from .log_checkpoint import LogCheckpointStore
+from config.settings import TEXT_LOADER_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Whitespace allowed between JSON tokens
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that can continue a JSON number
+JSON_NUMBER_CHARS = "0123456789.eE+-"
+
+class _JSONRecordReader:
+    """Incremental reader of the top-level records of a JSON file
+    
+    Elements of a top-level array and members of a top-level object are
+    decoded one at a time with JSONDecoder.raw_decode, so only the current
+    record and one read block are held in memory. Like json.load, a file
+    must hold exactly one top-level value.
+    """
+    
+    def __init__(self, f: TextIO, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    
+    def _read_more(self, size: int = 0) -> bool:
+        """Drop consumed text and append at least size characters, False at end of file"""
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        data = self.f.read(max(size, self.block_size))
+        if not data:
+            self.eof = True
+            return False
+        self.buffer += data
+        return True
+    
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character, '' at end of file"""
+        while True:
+            self.pos = JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return ""
+    
+    def _expect(self, expected: str) -> str:
+        """Consume the next character, which must be one of expected"""
+        char = self._peek()
+        if not char or char not in expected:
+            found = repr(char) if char else "end of file"
+            raise ValueError(f"Invalid JSON: expected one of {expected!r}, found {found}")
+        self.pos += 1
+        return char
+    
+    def _decode(self) -> Any:
+        """Decode the value at the current position, reading more input until it is complete"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut by the block end ("12" of "123", "3" of "3.5") may continue
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in JSON_NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow geometrically so large values are not re-decoded too often
+            self._read_more(len(self.buffer) - self.pos)
+    
+    def records(self) -> Iterator[Any]:
+        """Yield array elements, {key: value} for object members, or a top-level scalar"""
+        first = self._peek()
+        if not first:
+            raise ValueError("Invalid JSON: empty document")
+        
+        if first in ("[", "{"):
+            self.pos += 1
+            closing = "]" if first == "[" else "}"
+            if self._peek() == closing:
+                self.pos += 1
+            else:
+                while True:
+                    if first == "[":
+                        yield self._decode()
+                    else:
+                        key = self._decode()
+                        if not isinstance(key, str):
+                            raise ValueError("Invalid JSON: object keys must be strings")
+                        self._expect(":")
+                        yield {key: self._decode()}
+                    if self._expect("," + closing) == closing:
+                        break
+        else:
+            yield self._decode()
+        
+        if self._peek():
+            raise ValueError("Invalid JSON: extra data after the top-level value")
+
 class TextLoader(BaseDocumentLoader):
     """Text document loader - handles various text formats"""
     
@@ -26,27 +127,59 @@ class TextLoader(BaseDocumentLoader):
         }
     }
     
-    def __init__(self, file_path: str, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, file_path: DocumentSource, config: Optional[Dict[str, Any]] = None, mode: str = "full",
+                 file_name: Optional[str] = None):
         """
         Initialize loader
         
         Args:
-            file_path: Path to text file
+            file_path: Path to text file, or its content as bytes, memoryview or binary file object
             config: Optional configuration for text processing
                 - encoding: File encoding (default: utf-8)
                 - csv_delimiter: CSV field delimiter (default: ,)
                 - json_indent: JSON formatting indent (default: 2)
                 - preserve_format: Keep original formatting (default: True)
+                - streaming: Read plain text and CSV in chunks, one Document per chunk
+                - chunk_bytes: Target chunk size in bytes, chunks end on a line (CSV record) boundary
+                - incremental: For .log files only read complete lines appended since the last run
+                
+                With streaming, JSON, YAML and XML files are also parsed incrementally and
+                split into Documents of about chunk_bytes by top-level record.
+            mode: Processing mode, text files have no images so both modes behave the same
+            file_name: File name of in-memory content, its extension selects the format
         """
-        super().__init__(file_path)
+        super().__init__(file_path, mode, file_name)
         self.config = {
             'encoding': 'utf-8',
             'csv_delimiter': ',',
             'json_indent': 2,
-            'preserve_format': True
+            'preserve_format': True,
+            **TEXT_LOADER_CONFIG
         }
         if config:
             self.config.update(config)
+        self._checkpoint_store: Optional[LogCheckpointStore] = None
+    
+    def cache_options(self) -> Dict[str, Any]:
+        """Processing options for the result cache key"""
+        return {**super().cache_options(), "config": self.config}
+    
+    @property
+    def cacheable(self) -> bool:
+        """Incremental .log reads depend on the stored checkpoint, not only on the content"""
+        return not (self.config['incremental'] and Path(self.file_path).suffix.lower() == '.log'
+                    and not self.in_memory)
+    
+    @property
+    def checkpoint_store(self) -> LogCheckpointStore:
+        """Read positions of incremental .log ingestion, opened on first use"""
+        if self._checkpoint_store is None:
+            self._checkpoint_store = LogCheckpointStore()
+        return self._checkpoint_store
+    
+    @checkpoint_store.setter
+    def checkpoint_store(self, checkpoint_store: LogCheckpointStore):
+        self._checkpoint_store = checkpoint_store
     
     def _get_document_type(self, ext: str) -> str:
         """Determine document type from extension"""
@@ -61,50 +194,316 @@ class TextLoader(BaseDocumentLoader):
         
         raise ValueError(f"Unsupported text file type: {ext}")
     
+    def _open_text(self, file_path: Path) -> TextIO:
+        """Open the document for reading text, in-memory content is decoded from the shared buffer"""
+        if self.in_memory:
+            return io.TextIOWrapper(self.open_source(), encoding=self.config['encoding'])
+        return open(file_path, 'r', encoding=self.config['encoding'])
+    
     def _load_plain_text(self, file_path: Path) -> str:
         """Load plain text file"""
-        with open(file_path, 'r', encoding=self.config['encoding']) as f:
+        with self._open_text(file_path) as f:
             return f.read()
     
     def _load_csv(self, file_path: Path) -> str:
         """Load CSV file"""
         content_parts = []
-        with open(file_path, 'r', encoding=self.config['encoding']) as f:
+        with self._open_text(file_path) as f:
             reader = csv.reader(f, delimiter=self.config['csv_delimiter'])
             for row in reader:
                 content_parts.append(" | ".join(row))
         return "\n".join(content_parts)
     
+    def _iter_chunks(self, f: BinaryIO, csv_records: bool, start: int = 0, end: Optional[int] = None,
+                     chunk_bytes: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read bytes [start, end) in blocks of about chunk_bytes that end on a line boundary
+        
+        Only one block is held in memory. For CSV a block is extended until it
+        holds an even number of quote characters, so a newline inside a quoted
+        field never ends it. Works for encodings where newline and quote bytes
+        only appear as those characters (UTF-8, Latin-1, GBK, ...), not UTF-16.
+        
+        Args:
+            f: File opened in binary mode
+            csv_records: Do not end blocks inside quoted CSV fields
+            start: Offset of the first line to read
+            end: Offset right after a line end to stop at, None to read to the end of the file
+            chunk_bytes: Target block size (default: chunk_bytes config)
+        
+        Yields:
+            Tuple[int, bytes]: Byte offset of the block and its raw bytes
+        """
+        chunk_bytes = max(int(chunk_bytes or self.config['chunk_bytes']), 1)
+        offset = start
+        f.seek(start)
+        while end is None or offset < end:
+            # end is a line boundary, so readline() below never reads past it
+            parts = [f.read(chunk_bytes if end is None else min(chunk_bytes, end - offset))]
+            if not parts[0]:
+                break
+            if not parts[0].endswith(b"\n"):
+                parts.append(f.readline())
+            
+            if csv_records:
+                quotes = sum(part.count(b'"') for part in parts)
+                while quotes % 2:
+                    line = f.readline()
+                    if not line:
+                        break
+                    parts.append(line)
+                    quotes += line.count(b'"')
+            
+            chunk = b"".join(parts)
+            yield offset, chunk
+            offset += len(chunk)
+    
+    def _iter_streamed_documents(self, file_path: Path, f: BinaryIO, doc_type: str, start: int = 0,
+                                 end: Optional[int] = None, line_start: int = 1,
+                                 chunk_bytes: Optional[int] = None) -> Iterator[Document]:
+        """One Document per chunk with byte_start/byte_end (end exclusive) and line_start/line_end (1-based)"""
+        chunks = self._iter_chunks(f, doc_type == 'csv', start, end, chunk_bytes)
+        for chunk_index, (byte_start, chunk) in enumerate(chunks):
+            # Decoded like open() does, so newline translation matches the non-streaming output
+            text_stream = io.TextIOWrapper(io.BytesIO(chunk), encoding=self.config['encoding'])
+            metadata = {
+                "source": str(file_path),
+                "file_type": doc_type,
+                "file_name": file_path.name,
+                "encoding": self.config['encoding'],
+                "chunk_index": chunk_index,
+                "byte_start": byte_start,
+                "byte_end": byte_start + len(chunk),
+                "line_start": line_start,
+                "line_end": line_start + chunk.count(b"\n") - (1 if chunk.endswith(b"\n") else 0)
+            }
+            
+            if doc_type == 'csv':
+                rows = [" | ".join(row) for row in csv.reader(text_stream, delimiter=self.config['csv_delimiter'])]
+                metadata["rows"] = len(rows)
+                content = "\n".join(rows)
+            else:
+                content = text_stream.read()
+            
+            yield Document(page_content=content, metadata=metadata)
+            line_start = metadata["line_end"] + 1
+    
+    def _last_line_end(self, f: BinaryIO, start: int, size: int) -> int:
+        """Offset right after the last newline in [start, size), start if there is none"""
+        position = size
+        while position > start:
+            block_start = max(start, position - 64 * 1024)
+            f.seek(block_start)
+            index = f.read(position - block_start).rfind(b"\n")
+            if index != -1:
+                return block_start + index + 1
+            position = block_start
+        return start
+    
+    def _iter_appended_documents(self, file_path: Path) -> Iterator[Document]:
+        """
+        Read the complete lines appended to a .log file since the last run
+        
+        A trailing line without newline may still be written to and is left
+        for the next run. The checkpoint advances after each Document has been
+        consumed, so a run that stops early resumes after the last consumed one.
+        """
+        checkpoint_key = str(file_path.resolve())
+        with open(file_path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            resume = self.checkpoint_store.resume_offset(checkpoint_key, f, stat_result)
+            end = self._last_line_end(f, resume["offset"], stat_result.st_size)
+            if end == resume["offset"]:
+                logger.info(f"No new lines in {file_path}")
+                return
+            
+            logger.info(f"Reading {file_path} from byte {resume['offset']} to {end} ({resume['reason']})")
+            # Without streaming all new lines form one Document
+            chunk_bytes = None if self.config['streaming'] else end - resume["offset"]
+            documents = self._iter_streamed_documents(
+                file_path, f, 'plain_text', resume["offset"], end, resume["lines"] + 1, chunk_bytes
+            )
+            for document in documents:
+                document.metadata["checkpoint"] = resume["reason"]
+                yield document
+                self.checkpoint_store.set(
+                    checkpoint_key, f, stat_result, document.metadata["byte_end"], document.metadata["line_end"]
+                )
+    
+    def _format_json(self, data: Any) -> str:
+        """Serialize parsed JSON data"""
+        if self.config['preserve_format']:
+            return json.dumps(data, indent=self.config['json_indent'], ensure_ascii=False)
+        return str(data)
+    
+    def _format_yaml(self, data: Any) -> str:
+        """Serialize parsed YAML data"""
+        if self.config['preserve_format']:
+            return yaml.dump(data, allow_unicode=True)
+        return str(data)
+    
+    def _iter_json_records(self, f: TextIO) -> Iterator[str]:
+        """Top-level array elements or object members of a JSON file, serialized one by one"""
+        for record in _JSONRecordReader(f, max(int(self.config['chunk_bytes']), 1)).records():
+            yield self._format_json(record)
+    
+    def _iter_yaml_records(self, f: TextIO) -> Iterator[str]:
+        """
+        Records of a multi-document YAML stream
+        
+        Documents are parsed one at a time; a document that is a list or a
+        mapping is further split into its items, like a JSON file.
+        """
+        for data in yaml.safe_load_all(f):
+            if isinstance(data, list):
+                items = data
+            elif isinstance(data, dict):
+                items = ({key: value} for key, value in data.items())
+            elif data is not None:
+                items = [data]
+            else:
+                continue
+            for item in items:
+                yield self._format_yaml(item)
+    
+    def _iter_xml_records(self, file_path: Path) -> Iterator[str]:
+        """
+        Children of the XML root element, serialized as soon as they are parsed
+        
+        Each child is removed from the root after serialization, so the tree
+        never holds more than one top-level element.
+        """
+        method = 'xml' if self.config['preserve_format'] else 'text'
+        root = None
+        depth = 0
+        found = False
+        with self.open_source() as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+                
+                depth -= 1
+                if depth == 1:
+                    found = True
+                    yield ET.tostring(elem, encoding='unicode', method=method).strip()
+                    elem.clear()
+                    root.remove(elem)
+        
+        # A root without children is a record by itself
+        if not found and root is not None:
+            yield ET.tostring(root, encoding='unicode', method=method)
+    
+    def _iter_record_documents(self, file_path: Path, doc_type: str, records: Iterable[str]) -> Iterator[Document]:
+        """Group serialized records into Documents of about chunk_bytes with record_range metadata (1-based)"""
+        chunk_bytes = max(int(self.config['chunk_bytes']), 1)
+        chunk_index = 0
+        first_record = 1
+        parts: List[str] = []
+        size = 0
+        
+        def make_document() -> Document:
+            return Document(
+                page_content="\n".join(parts),
+                metadata={
+                    "source": str(file_path),
+                    "file_type": doc_type,
+                    "file_name": file_path.name,
+                    "encoding": self.config['encoding'],
+                    "chunk_index": chunk_index,
+                    "record_range": [first_record, first_record + len(parts) - 1],
+                    "records": len(parts)
+                }
+            )
+        
+        for record in records:
+            parts.append(record)
+            size += len(record)
+            if size >= chunk_bytes:
+                yield make_document()
+                chunk_index += 1
+                first_record += len(parts)
+                parts = []
+                size = 0
+        if parts:
+            yield make_document()
+    
+    def _iter_structured_documents(self, file_path: Path, doc_type: str) -> Iterator[Document]:
+        """Parse JSON, YAML or XML incrementally, one Document per group of top-level records"""
+        if doc_type == 'xml':
+            yield from self._iter_record_documents(file_path, doc_type, self._iter_xml_records(file_path))
+            return
+        
+        with self._open_text(file_path) as f:
+            records = self._iter_json_records(f) if doc_type == 'json' else self._iter_yaml_records(f)
+            yield from self._iter_record_documents(file_path, doc_type, records)
+    
+    def _reads_in_chunks(self) -> bool:
+        """Whether the file is read by lazy_load in chunks instead of as a whole"""
+        ext = Path(self.file_path).suffix.lower()
+        if self.config['incremental'] and ext == '.log' and not self.in_memory:
+            return True
+        return self.config['streaming']
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """Load text document, one Document per chunk when streaming or tailing a .log file"""
+        if not self._reads_in_chunks():
+            yield from self.load()
+            return
+        
+        try:
+            # Check file exists
+            file_path = Path(self.file_path)
+            if not self.source_exists():
+                raise FileNotFoundError(f"File not found: {file_path}")
+            
+            # Checkpoints track files on disk, in-memory logs are read as a whole
+            if self.config['incremental'] and file_path.suffix.lower() == '.log' and not self.in_memory:
+                yield from self._iter_appended_documents(file_path)
+                return
+            
+            doc_type = self._get_document_type(file_path.suffix.lower())
+            logger.info(f"Streaming text document in chunks of {self.config['chunk_bytes']} bytes: {file_path}")
+            if doc_type in ('json', 'yaml', 'xml'):
+                yield from self._iter_structured_documents(file_path, doc_type)
+                return
+            
+            with self.open_source() as f:
+                yield from self._iter_streamed_documents(file_path, f, doc_type)
+        
+        except Exception as e:
+            logger.error(f"Error loading text document: {str(e)}", exc_info=True)
+            yield self._error_document(e)
+    
     def _load_json(self, file_path: Path) -> str:
         """Load JSON file"""
-        with open(file_path, 'r', encoding=self.config['encoding']) as f:
-            data = json.load(f)
-            if self.config['preserve_format']:
-                return json.dumps(data, indent=self.config['json_indent'], 
-                                ensure_ascii=False)
-            return str(data)
+        with self._open_text(file_path) as f:
+            return self._format_json(json.load(f))
     
     def _load_yaml(self, file_path: Path) -> str:
         """Load YAML file"""
-        with open(file_path, 'r', encoding=self.config['encoding']) as f:
-            data = yaml.safe_load(f)
-            if self.config['preserve_format']:
-                return yaml.dump(data, allow_unicode=True)
-            return str(data)
+        with self._open_text(file_path) as f:
+            return self._format_yaml(yaml.safe_load(f))
     
     def _load_xml(self, file_path: Path) -> str:
         """Load XML file"""
-        tree = ET.parse(file_path)
+        with self.open_source() as f:
+            tree = ET.parse(f)
         if self.config['preserve_format']:
             return ET.tostring(tree.getroot(), encoding='unicode', method='xml')
         return ET.tostring(tree.getroot(), encoding='unicode', method='text')
     
     def load(self) -> List[Document]:
         """Load text document"""
+        if self._reads_in_chunks():
+            return list(self.lazy_load())
+        
         try:
             # Check file exists
             file_path = Path(self.file_path)
-            if not file_path.exists():
+            if not self.source_exists():
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             # Determine document type
@@ -138,11 +537,15 @@ class TextLoader(BaseDocumentLoader):
             
         except Exception as e:
             logger.error(f"Error loading text document: {str(e)}", exc_info=True)
-            return [Document(
-                page_content=f"Failed to load text document: {str(e)}",
-                metadata={
-                    "source": str(self.file_path),
-                    "extraction_status": "failed",
-                    "error": str(e)
-                }
-            )] 
\ No newline at end of file
+            return [self._error_document(e)]
+    
+    def _error_document(self, error: Exception) -> Document:
+        """Return error document"""
+        return Document(
+            page_content=f"Failed to load text document: {str(error)}",
+            metadata={
+                "source": str(self.file_path),
+                "extraction_status": "failed",
+                "error": str(error)
+            }
+        )
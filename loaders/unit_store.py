@@ -0,0 +1,119 @@
+from typing import Optional, Dict, Any, Iterator
+from contextlib import contextmanager
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from config.settings import UNIT_REUSE_CONFIG
+
+def unit_fingerprint(*parts: bytes) -> str:
+    """SHA-256 over the parts of a unit (serialized XML or text, image digests), length-prefixed"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+class UnitResultStore:
+    """Results of the units (PDF pages, slides, Word sections) of the last processed version of each document
+    
+    A logical document is identified by a key built from its loader, the
+    processing options and its name (see BaseDocumentLoader.unit_document_key).
+    For every unit the store keeps the loader's result, keyed on the unit
+    fingerprint (text plus image hashes). When a revised version is loaded,
+    units with a known fingerprint reuse the stored result and only the
+    others are parsed and sent to the vision model. Saving a version
+    replaces the previous one; the least recently saved documents are
+    dropped beyond max_documents.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_documents: Optional[int] = None):
+        """
+        Initialize store
+        
+        Args:
+            path: SQLite database file (default: UNIT_REUSE_CONFIG["path"])
+            max_documents: Number of documents to keep, 0 for unlimited
+        """
+        self.path = Path(path or UNIT_REUSE_CONFIG["path"])
+        self.max_documents = UNIT_REUSE_CONFIG["max_documents"] if max_documents is None else max_documents
+        self._init_db()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (one per operation, safe across threads and processes)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _init_db(self):
+        """Create database file and schema"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS unit_documents (
+                    document_key TEXT PRIMARY KEY,
+                    units INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS unit_results (
+                    document_key TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (document_key, fingerprint)
+                )"""
+            )
+    
+    def get_units(self, document_key: str) -> Dict[str, Any]:
+        """Return the unit results of the last saved version, keyed by fingerprint (empty if none)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT fingerprint, value FROM unit_results WHERE document_key = ?", (document_key,)
+            ).fetchall()
+        return {fingerprint: json.loads(value) for fingerprint, value in rows}
+    
+    def set_units(self, document_key: str, units: Dict[str, Any]):
+        """
+        Replace the saved version of a document
+        
+        Args:
+            document_key: Key of the logical document
+            units: JSON-serializable result per unit fingerprint
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM unit_results WHERE document_key = ?", (document_key,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO unit_results (document_key, fingerprint, value) VALUES (?, ?, ?)",
+                [(document_key, fingerprint, json.dumps(value, ensure_ascii=False, default=str))
+                 for fingerprint, value in units.items()]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO unit_documents (document_key, units, updated_at) VALUES (?, ?, ?)",
+                (document_key, len(units), time.time())
+            )
+            self._evict(conn)
+    
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop the least recently saved documents beyond max_documents"""
+        if not self.max_documents:
+            return
+        stale_keys = conn.execute(
+            "SELECT document_key FROM unit_documents ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+            (self.max_documents,)
+        ).fetchall()
+        if stale_keys:
+            conn.executemany("DELETE FROM unit_results WHERE document_key = ?", stale_keys)
+            conn.executemany("DELETE FROM unit_documents WHERE document_key = ?", stale_keys)
+    
+    def delete(self, document_key: str):
+        """Forget the saved version of a document"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM unit_results WHERE document_key = ?", (document_key,))
+            conn.execute("DELETE FROM unit_documents WHERE document_key = ?", (document_key,))
@@ -1,60 +1,200 @@
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Any, Optional
+import hashlib
 import logging
+import re
 from pathlib import Path
 import io
+from lxml import etree
 from docx import Document as DocxDocument
 from docx.document import Document as _Document
+from docx.oxml.ns import nsmap, qn
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
 from docx.table import _Cell, Table, _Row
 from docx.text.paragraph import Paragraph
 from langchain_core.documents import Document
-from .base import BaseDocumentLoader
-from processors.image_extractor import ImageExtractor
+from .base import BaseDocumentLoader, DocumentSource, is_failed_image
+from .unit_store import unit_fingerprint
+from processors.image_filter import ImageFilter
 
 logger = logging.getLogger(__name__)
 
+# Pictures in the runs the loader renders: body paragraphs and paragraphs of body-level
+# table cells, except cells continuing a vertical merge (rendered through the cell above)
+RENDERED_BLIP_XPATH = (
+    "(./w:p | ./w:tbl/w:tr/w:tc[not(w:tcPr/w:vMerge[not(@w:val) or @w:val='continue'])]/w:p)"
+    "/w:r/w:drawing//a:blip[@r:embed]"
+)
+
+# Text-bearing children of a run, as read by python-docx Run.text (str() gives their text since python-docx 1.0)
+RUN_TEXT_ELEMENTS = ("w:br", "w:cr", "w:noBreakHyphen", "w:ptab", "w:t", "w:tab")
+RUN_TEXT_XPATH = etree.XPath(" | ".join(RUN_TEXT_ELEMENTS), namespaces=nsmap)
+PARAGRAPH_TEXT_XPATH = etree.XPath(" | ".join(f"w:r/{tag}" for tag in RUN_TEXT_ELEMENTS), namespaces=nsmap)
+
+# Table structure, read straight from the XML
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_P = qn("w:p")
+W_VAL = qn("w:val")
+GRID_BEFORE_XPATH = etree.XPath("string(w:trPr/w:gridBefore/@w:val)", namespaces=nsmap)
+GRID_SPAN_XPATH = etree.XPath("string(w:tcPr/w:gridSpan/@w:val)", namespaces=nsmap)
+VMERGE_XPATH = etree.XPath("w:tcPr/w:vMerge", namespaces=nsmap)
+
+# Sections for revision reuse: a heading (or outline level) paragraph starts a section,
+# a section break (w:sectPr in the paragraph properties) ends one
+SECTION_START_XPATH = etree.XPath(
+    "boolean(w:pPr/w:outlineLvl | w:pPr/w:pStyle[starts-with(@w:val, 'Heading') or @w:val = 'Title'])",
+    namespaces=nsmap
+)
+SECTION_BREAK_XPATH = etree.XPath("boolean(w:pPr/w:sectPr)", namespaces=nsmap)
+# Serialized XML that changes between revisions without changing the output: relationship IDs
+# (replaced by their targets), revision session IDs and the numbered ids and names of drawings
+RELATIONSHIP_ATTR_RE = re.compile(rb'\br:(?:embed|id|link)="([^"]*)"')
+VOLATILE_ATTR_RE = re.compile(
+    rb'\s(?:w:rsid\w*|w14:paraId|w14:textId)="[^"]*"|(?<=<wp:docPr)\s[^>]*?(?=/?>)|(?<=<pic:cNvPr)\s[^>]*?(?=/?>)'
+)
+
 class WordLoader(BaseDocumentLoader):
     """Word document loader - extracts text and embedded images"""
     
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None):
         """Initialize loader"""
-        super().__init__(file_path)
-        self.image_extractor = ImageExtractor()
+        super().__init__(file_path, mode, file_name)
+        self.image_filter = ImageFilter()
         self.image_map = {}  # Map to store image positions
+        self.drawing_map: Dict[Any, str] = {}  # w:drawing element -> image rId
+        self.drawing_runs = set()  # w:r elements holding a drawing
+        self.drawing_paragraphs = set()  # w:p elements holding a drawing
+        self.unit_reuse: Dict[str, int] = {}  # Reused and recomputed sections, when unit reuse is enabled
+    
+    def _index_image_references(self, docx_doc: DocxDocument) -> List[str]:
+        """
+        Find the pictures referenced from the rendered body in one XPath pass
+        
+        Fills drawing_map, drawing_runs and drawing_paragraphs, which drive
+        paragraph rendering.
+        
+        Returns:
+            List[str]: Image relationship IDs in order of first reference
+        """
+        self.drawing_map = {}
+        drawing_tag = qn("w:drawing")
+        embed_attr = qn("r:embed")
+        for blip in docx_doc.element.body.xpath(RENDERED_BLIP_XPATH):
+            drawing = next(blip.iterancestors(drawing_tag))
+            # Only the first picture of a drawing (e.g. a group) is rendered
+            self.drawing_map.setdefault(drawing, blip.get(embed_attr))
+        
+        self.drawing_runs = {drawing.getparent() for drawing in self.drawing_map}
+        self.drawing_paragraphs = {run.getparent() for run in self.drawing_runs}
+        return list(dict.fromkeys(self.drawing_map.values()))
     
-    def _extract_images(self, docx_doc: DocxDocument) -> Dict[str, dict]:
+    def _section_units(self, docx_doc: DocxDocument) -> List[Tuple[str, Dict[str, str]]]:
         """
-        Extract images from Word document and map them to their relationships
-        Returns a dict mapping relationship IDs to image info
+        Split the body into sections and fingerprint them
+        
+        Must run after _index_image_references. A section's fingerprint covers
+        the XML of its body elements, with relationship IDs replaced by their
+        targets (image content hashes) and revision IDs removed, so sections
+        are recognized even when other parts of the document were edited.
+        
+        Returns:
+            List[Tuple[str, Dict[str, str]]]: Fingerprint per section, and the target
+                of every image it references by rId, in order of reference
+        """
+        body = docx_doc.element.body
+        sections = [[]]
+        for child in body.iterchildren():
+            if child.tag == W_P and sections[-1] and SECTION_START_XPATH(child):
+                sections.append([])
+            sections[-1].append(child)
+            if child.tag == W_P and SECTION_BREAK_XPATH(child):
+                sections.append([])
+        
+        # Pictures belong to the section of the top-level element they are in
+        section_of = {child: index for index, section in enumerate(sections) for child in section}
+        section_rids = [[] for _ in sections]
+        for drawing, rId in self.drawing_map.items():
+            top = drawing
+            while top.getparent() is not body:
+                top = top.getparent()
+            section_rids[section_of[top]].append(rId)
+        
+        rels = docx_doc.part.rels
+        rel_targets = {}
+        
+        def rel_target(rId: str) -> str:
+            if rId not in rel_targets:
+                rel = rels.get(rId)
+                if rel is None:
+                    rel_targets[rId] = rId
+                elif rel.is_external:
+                    rel_targets[rId] = rel.target_ref
+                else:
+                    rel_targets[rId] = hashlib.sha256(rel.target_part.blob).hexdigest()
+            return rel_targets[rId]
+        
+        def replace_rel(match) -> bytes:
+            return b'r:ref="' + rel_target(match.group(1).decode("utf-8")).encode("utf-8") + b'"'
+        
+        units = []
+        for section, rids in zip(sections, section_rids):
+            if not section:
+                continue
+            parts = [
+                RELATIONSHIP_ATTR_RE.sub(replace_rel, VOLATILE_ATTR_RE.sub(b"", etree.tostring(child)))
+                for child in section
+            ]
+            units.append((unit_fingerprint(*parts), {rId: rel_target(rId) for rId in rids}))
+        return units
+    
+    def _extract_images(self, docx_doc: DocxDocument, image_rids: List[str],
+                        reused_images: Optional[Dict[str, dict]] = None) -> Dict[str, dict]:
+        """
+        Extract the referenced images from Word document
+        
+        Image relationships that are never referenced from the body (unused
+        media, header and footer pictures) are not sent to the vision API.
+        
+        Args:
+            docx_doc: Word document
+            image_rids: Relationship IDs of the referenced images, in document order
+            reused_images: Stored results from the previous version per rId, used
+                instead of filtering and extracting these images again
+        
+        Returns:
+            Dict[str, dict]: Image info per relationship ID, numbered in document order
         """
         images = {}
+        pending_images = []  # (image info, image bytes) awaiting extraction
         image_index = 1
+        reused_images = reused_images or {}
         
-        for rel in docx_doc.part.rels.values():
-            if "image" in rel.reltype:
+        # Collect all images first so they can be sent to the vision API concurrently
+        for rId in image_rids:
+            rel = docx_doc.part.rels.get(rId)
+            if rel is not None and "image" in rel.reltype and not rel.is_external:
+                if rId in reused_images:
+                    images[rel.rId] = {"index": image_index, **reused_images[rId]}
+                    image_index += 1
+                    continue
+                if self.text_only:
+                    images[rel.rId] = {"index": image_index, "status": "unprocessed"}
+                    image_index += 1
+                    continue
+                
                 try:
                     # Get image data
                     image_data = rel.target_part.blob
-                    img_stream = io.BytesIO(image_data)
-                    
-                    # Process image
-                    logger.info(f"Processing embedded image {image_index}")
-                    extraction_result = self.image_extractor.extract_info(img_stream)
+                    images[rel.rId] = {"index": image_index}
                     
-                    if extraction_result["status"] == "success":
-                        images[rel.rId] = {
-                            "index": image_index,
-                            "content": extraction_result["content"],
-                            "status": "success"
-                        }
+                    # Skip decorative images (bullets, rules, blank fills) without an API call
+                    skip_reason = self.image_filter.check_image(image_data)
+                    if skip_reason:
+                        logger.info(f"Skipping embedded image {image_index}: {skip_reason}")
+                        images[rel.rId].update({"status": "skipped", "skip_reason": skip_reason})
                     else:
-                        images[rel.rId] = {
-                            "index": image_index,
-                            "error": extraction_result.get("error", "Unknown error"),
-                            "status": "failed"
-                        }
-                    
+                        pending_images.append((images[rel.rId], io.BytesIO(image_data)))
                     image_index += 1
                     
                 except Exception as e:
@@ -66,57 +206,121 @@ class WordLoader(BaseDocumentLoader):
                     }
                     image_index += 1
         
+        if not pending_images:
+            return images
+        
+        # Process images
+        logger.info(f"Processing {len(pending_images)} embedded images")
+        extraction_results = self.image_extractor.extract_many(
+            [img_stream for _, img_stream in pending_images]
+        )
+        
+        for (image_info, _), extraction_result in zip(pending_images, extraction_results):
+            if extraction_result["status"] == "success":
+                image_info["content"] = extraction_result["content"]
+                image_info["status"] = "success"
+            else:
+                image_info["error"] = extraction_result.get("error", "Unknown error")
+                image_info["status"] = "failed"
+        
         return images
     
+    def _render_image(self, img: dict) -> str:
+        """Render image placeholder"""
+        if img["status"] == "success":
+            return (
+                f'\n<image id="{img["index"]:03d}">\n'
+                f'{img["content"]}\n'
+                f'</image>\n'
+            )
+        elif img["status"] in ("skipped", "unprocessed"):
+            return f'\n<image id="{img["index"]:03d}" status="{img["status"]}"/>\n'
+        return (
+            f'\n<image id="{img["index"]:03d}" status="failed">\n'
+            f'Image processing failed: {img.get("error", "Unknown error")}\n'
+            f'</image>\n'
+        )
+    
     def _process_paragraph(self, paragraph: Paragraph) -> str:
         """Process paragraph including any inline images"""
-        text_parts = []
+        p = paragraph._p
+        # Most paragraphs have no pictures, their text is the text of their runs in one query
+        if p not in self.drawing_paragraphs:
+            return "".join(str(e) for e in PARAGRAPH_TEXT_XPATH(p))
         
-        for run in paragraph.runs:
-            # Check for images in this run
-            for element in run._element:
-                if element.tag.endswith('drawing'):
-                    # Find image relationship ID
-                    rId = None
-                    for child in element.iter():
-                        if child.tag.endswith('blip'):
-                            rId = child.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                            break
-                    
-                    if rId and rId in self.image_map:
-                        img = self.image_map[rId]
-                        if img["status"] == "success":
-                            text_parts.append(
-                                f'\n<image id="{img["index"]:03d}">\n'
-                                f'{img["content"]}\n'
-                                f'</image>\n'
-                            )
-                        else:
-                            text_parts.append(
-                                f'\n<image id="{img["index"]:03d}" status="failed">\n'
-                                f'Image processing failed: {img.get("error", "Unknown error")}\n'
-                                f'</image>\n'
-                            )
+        text_parts = []
+        for r in p.r_lst:
+            if r in self.drawing_runs:
+                # Images of a run are placed before its text
+                for element in r:
+                    rId = self.drawing_map.get(element)
+                    if rId in self.image_map:
+                        text_parts.append(self._render_image(self.image_map[rId]))
             
-            text_parts.append(run.text)
+            text_parts.append("".join(str(e) for e in RUN_TEXT_XPATH(r)))
         
         return "".join(text_parts)
     
+    def _process_cell(self, tc, table: Table) -> str:
+        """Process the paragraphs of a table cell"""
+        cell_text = []
+        for p in tc.iterchildren(W_P):
+            text = self._process_paragraph(Paragraph(p, table))
+            if text.strip():
+                cell_text.append(text)
+        return " ".join(cell_text)
+    
     def _process_table(self, table: Table) -> str:
-        """Process table content"""
+        """
+        Process table content
+        
+        Walks w:tr/w:tc once instead of using python-docx row.cells, which
+        recomputes grid offsets and merges on every access. The output is the
+        same: a cell spanning several grid columns (gridSpan) is repeated for
+        each of them and a cell continuing a vertical merge (vMerge) repeats
+        the text of the cell where the merge starts.
+        """
         rows = []
-        for row in table.rows:
+        merge_texts = {}  # grid offset -> text of the last cell starting there
+        for tr in table._tbl.iterchildren(W_TR):
             cells = []
-            for cell in row.cells:
-                cell_text = []
-                for paragraph in cell.paragraphs:
-                    text = self._process_paragraph(paragraph)
-                    if text.strip():
-                        cell_text.append(text)
-                cells.append(" ".join(cell_text))
+            grid_offset = int(GRID_BEFORE_XPATH(tr) or 0)
+            for tc in tr.iterchildren(W_TC):
+                grid_span = int(GRID_SPAN_XPATH(tc) or 1)
+                vmerge = VMERGE_XPATH(tc)
+                # w:vMerge without w:val continues the merge
+                if vmerge and vmerge[0].get(W_VAL, "continue") == "continue" and grid_offset in merge_texts:
+                    text = merge_texts[grid_offset]
+                else:
+                    text = self._process_cell(tc, table)
+                merge_texts[grid_offset] = text
+                cells.extend([text] * grid_span)
+                grid_offset += grid_span
             rows.append(" | ".join(cells))
         return "\n".join(rows)
     
+    def _save_section_units(self, section_units: List[Tuple[str, Dict[str, str]]], previous_units: Dict[str, Any]):
+        """
+        Store the image results of each section by fingerprint, sections with a failed image are left out
+        
+        Images are stored by target (content hash), rIds may differ in the next version.
+        """
+        units = {}
+        reused = 0
+        for fingerprint, rid_targets in section_units:
+            reused += fingerprint in previous_units
+            section_images = {
+                target: self.image_map[rId] for rId, target in rid_targets.items() if rId in self.image_map
+            }
+            if any(is_failed_image(img) for img in section_images.values()):
+                continue
+            # Numbers are assigned again when the section is reused
+            units[fingerprint] = {
+                target: {k: v for k, v in img.items() if k != "index"} for target, img in section_images.items()
+            }
+        self._save_units(units)
+        self.unit_reuse = self._unit_reuse_metadata(reused, len(section_units) - reused)
+    
     def _iter_block_items(self, parent):
         """Iterate through all blocks (paragraphs and tables)"""
         if isinstance(parent, _Document):
@@ -135,7 +339,26 @@ class WordLoader(BaseDocumentLoader):
     def _extract_content(self, docx_doc: DocxDocument) -> Tuple[str, List[dict]]:
         """Extract text content and process images"""
         content_parts = []
-        self.image_map = self._extract_images(docx_doc)
+        image_rids = self._index_image_references(docx_doc)
+        
+        # Images of sections unchanged since the previous version keep their results
+        previous_units = self._previous_units()
+        section_units = []
+        reused_images = {}
+        if previous_units is not None:
+            try:
+                section_units = self._section_units(docx_doc)
+            except Exception as e:
+                logger.warning(f"Failed to fingerprint sections, processing all images: {str(e)}")
+            for fingerprint, rid_targets in section_units:
+                stored_images = previous_units.get(fingerprint, {})
+                reused_images.update(
+                    (rId, stored_images[target]) for rId, target in rid_targets.items() if target in stored_images
+                )
+        
+        self.image_map = self._extract_images(docx_doc, image_rids, reused_images)
+        if section_units:
+            self._save_section_units(section_units, previous_units)
         
         # Process all blocks (paragraphs and tables)
         for block in self._iter_block_items(docx_doc):
@@ -157,12 +380,12 @@ class WordLoader(BaseDocumentLoader):
         try:
             # Check file exists
             doc_path = Path(self.file_path)
-            if not doc_path.exists():
+            if not self.source_exists():
                 raise FileNotFoundError(f"Word document not found: {doc_path}")
             
-            # Load document
+            # Load document (in-memory documents are read from the shared buffer)
             logger.info(f"Loading Word document: {doc_path}")
-            docx_doc = DocxDocument(doc_path)
+            docx_doc = DocxDocument(self.open_source() if self.in_memory else doc_path)
             
             # Extract content
             content, images = self._extract_content(docx_doc)
@@ -174,7 +397,8 @@ class WordLoader(BaseDocumentLoader):
                     "source": str(doc_path),
                     "file_type": "word",
                     "file_name": doc_path.name,
-                    "images": images
+                    "images": images,
+                    **self.unit_reuse
                 }
             )
             
@@ -5,6 +5,8 @@ import json
 import argparse
 
 from loaders.factory import DocumentLoaderFactory
+from loaders.base import PROCESSING_MODES
+from services.ingest_service import DirectoryIngestor
 
 # Configure logging
 logging.basicConfig(
@@ -13,11 +15,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def test_document_loader(file_path: str):
+def test_document_loader(file_path: str, mode: str = "full"):
     """Test document loader"""
     logger.info("="*50)
     logger.info("Starting document loading test")
     logger.info(f"File: {file_path}")
+    logger.info(f"Mode: {mode}")
     logger.info("="*50)
     
     try:
@@ -28,7 +31,7 @@ def test_document_loader(file_path: str):
         timestamp_dir.mkdir(parents=True, exist_ok=True)
         
         # Get appropriate loader and process document
-        loader = DocumentLoaderFactory.get_loader(file_path)
+        loader = DocumentLoaderFactory.get_loader(file_path, mode)
         documents = loader.load()
         
         # Save results
@@ -50,7 +53,7 @@ def test_document_loader(file_path: str):
     except Exception as e:
         logger.error(f"Document loading test failed: {str(e)}", exc_info=True)
 
-def process_directory(dir_path: str):
+def process_directory(dir_path: str, mode: str = "full"):
     """Process all supported documents in a directory"""
     dir_path = Path(dir_path)
     if not dir_path.exists():
@@ -61,13 +64,27 @@ def process_directory(dir_path: str):
     for file_path in dir_path.glob("**/*"):  # Recursive search
         if file_path.suffix.lower() in supported_extensions:
             logger.info(f"Processing file: {file_path}")
-            test_document_loader(str(file_path))
+            test_document_loader(str(file_path), mode)
+
+def ingest_directory(dir_path: str, mode: str = "full", recursive: bool = True, output_dir: str = None,
+                     force: bool = False):
+    """Process only the new and changed documents of a directory, see DirectoryIngestor"""
+    summary = DirectoryIngestor().ingest(dir_path, mode, recursive=recursive, output_dir=output_dir, force=force)
+    logger.info(f"Ingestion completed: {json.dumps(summary)}")
+    return summary
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Document processing tool")
     parser.add_argument("path", help="File or directory path to process")
     parser.add_argument("--recursive", "-r", action="store_true", 
                        help="Process directory recursively")
+    parser.add_argument("--mode", choices=PROCESSING_MODES, default="full",
+                       help="text_only extracts the text layer without calling the vision model")
+    parser.add_argument("--ingest", action="store_true",
+                       help="Incremental directory ingestion: skip files unchanged since the last run (manifest)")
+    parser.add_argument("--output-dir", help="Result directory of --ingest (default: INGEST_OUTPUT_DIR)")
+    parser.add_argument("--force", action="store_true",
+                       help="With --ingest, process every file even if it is unchanged")
     
     args = parser.parse_args()
     path = Path(args.path)
@@ -75,16 +92,19 @@ if __name__ == "__main__":
     try:
         if path.is_file():
             # Process single file
-            test_document_loader(str(path))
+            test_document_loader(str(path), args.mode)
+        elif path.is_dir() and args.ingest:
+            # Process new and changed files, record deletions
+            ingest_directory(str(path), args.mode, args.recursive, args.output_dir, args.force)
         elif path.is_dir() and args.recursive:
             # Process directory recursively
-            process_directory(str(path))
+            process_directory(str(path), args.mode)
         elif path.is_dir():
             # Process files in directory (non-recursive)
             supported_extensions = DocumentLoaderFactory.LOADER_MAP.keys()
             for file_path in path.glob("*"):
                 if file_path.suffix.lower() in supported_extensions:
-                    test_document_loader(str(file_path))
+                    test_document_loader(str(file_path), args.mode)
         else:
             logger.error(f"Invalid path: {path}")
             
@@ -0,0 +1,338 @@
+from typing import Union, Optional, List, Any, Dict
+import asyncio
+import base64
+import io
+import logging
+import math
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from PIL import Image
+import openai
+from openai import AsyncOpenAI
+from config.settings import VISION_MODEL_CONFIG, VISION_RATE_LIMIT_CONFIG
+from .vision_cache import VisionCache, get_vision_cache
+from .image_extractor import SYSTEM_PROMPT, USER_PROMPT, model_config, build_messages, make_cache_key
+from .image_optimizer import ImageOptimizer
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Asyncio token bucket refilled continuously at ``capacity`` tokens per minute"""
+    
+    def __init__(self, capacity: int):
+        """
+        Initialize bucket
+
+        Args:
+            capacity: Tokens available per minute, 0 disables the limit
+        """
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.rate = capacity / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    async def acquire(self, amount: float = 1):
+        """Wait until ``amount`` tokens are available and take them"""
+        if not self.capacity:
+            return
+        
+        # A single request larger than the bucket could never be served otherwise
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+    
+    def refund(self, amount: float):
+        """Return tokens that were reserved but not consumed"""
+        if self.capacity and amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+class AsyncImageExtractor:
+    """Asyncio image information extractor with rate limiting and retries
+
+    Each call first waits on the requests-per-minute and tokens-per-minute
+    buckets, then calls the vision API with a per-call timeout. Rate limit
+    (429), server (5xx), connection and timeout errors are retried with
+    exponential backoff and full jitter. Results have the same shape as
+    ``ImageExtractor.extract_info`` and share its cache.
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 use_cache: bool = True, cache: Optional[VisionCache] = None,
+                 max_concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, timeout: Optional[float] = None):
+        """
+        Initialize extractor
+
+        Args:
+            api_key: OpenAI API key (default: VISION_MODEL_CONFIG["api_key"])
+            base_url: API base URL, e.g. a local stub server (default: VISION_MODEL_CONFIG["base_url"])
+            use_cache: Set to False to bypass the vision result cache
+            cache: Cache instance to use (default: shared process-wide cache)
+            max_concurrency: Parallel API calls in extract_many
+            requests_per_minute: Request rate limit, 0 for unlimited
+            tokens_per_minute: Estimated token rate limit, 0 for unlimited
+            max_retries: Retries on 429, 5xx, connection errors and timeouts
+            backoff_base: Initial backoff in seconds, doubled on every retry
+            backoff_max: Upper bound of a single backoff in seconds
+            timeout: Per-call timeout in seconds
+
+        Unset limits default to VISION_RATE_LIMIT_CONFIG.
+        """
+        config = VISION_RATE_LIMIT_CONFIG
+        self.api_key = api_key or VISION_MODEL_CONFIG["api_key"]
+        self.timeout = config["timeout"] if timeout is None else timeout
+        self.max_retries = config["max_retries"] if max_retries is None else max_retries
+        self.backoff_base = config["backoff_base"] if backoff_base is None else backoff_base
+        self.backoff_max = config["backoff_max"] if backoff_max is None else backoff_max
+        self.max_concurrency = max_concurrency or VISION_MODEL_CONFIG["max_concurrency"]
+        
+        # Retries are handled here so the SDK must not retry on its own
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=base_url or VISION_MODEL_CONFIG["base_url"],
+            max_retries=0,
+            timeout=self.timeout
+        )
+        self.cache = (cache or get_vision_cache()) if use_cache else None
+        self.image_optimizer = ImageOptimizer()
+        
+        self.request_bucket = TokenBucket(
+            config["requests_per_minute"] if requests_per_minute is None else requests_per_minute
+        )
+        self.token_bucket = TokenBucket(
+            config["tokens_per_minute"] if tokens_per_minute is None else tokens_per_minute
+        )
+    
+    def _estimate_tokens(self, image_bytes: bytes, detail: str = "high") -> int:
+        """Estimate tokens a request counts against the TPM limit (prompt + image + completion)"""
+        prompt_tokens = (len(SYSTEM_PROMPT) + len(USER_PROMPT)) // 4
+        if detail == "low":
+            return prompt_tokens + 85 + model_config["max_tokens"]
+        try:
+            # High detail: fit in 2048x2048, shortest side to 768, then 170 tokens per 512px tile
+            width, height = Image.open(io.BytesIO(image_bytes)).size
+            if max(width, height) > 2048:
+                scale = 2048 / max(width, height)
+                width, height = width * scale, height * scale
+            if min(width, height) > 768:
+                scale = 768 / min(width, height)
+                width, height = width * scale, height * scale
+            tiles = math.ceil(width / 512) * math.ceil(height / 512)
+            image_tokens = 85 + 170 * tiles
+        except Exception:
+            image_tokens = 85 + 170 * 4
+        return prompt_tokens + image_tokens + model_config["max_tokens"]
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        """Rate limits, server errors, connection problems and timeouts are transient"""
+        if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.RateLimitError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code >= 500
+        return False
+    
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After when the server sends it"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+                delay = max(delay, min(retry_after, self.backoff_max))
+            except (TypeError, ValueError):
+                pass
+        return delay
+    
+    async def _call_api(self, image_bytes: bytes, image_name: str) -> str:
+        """Call the vision API, retrying transient failures"""
+        image_bytes, mime_type, detail = await asyncio.to_thread(self.image_optimizer.optimize, image_bytes)
+        messages = build_messages(base64.b64encode(image_bytes).decode("utf-8"), mime_type, detail)
+        estimated_tokens = self._estimate_tokens(image_bytes, detail)
+        
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            try:
+                logger.info(f"Processing image: {image_name} (attempt {attempt + 1})")
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=VISION_MODEL_CONFIG["default_model"],
+                        messages=messages,
+                        max_tokens=model_config["max_tokens"],
+                        temperature=model_config["temperature"]
+                    ),
+                    timeout=self.timeout
+                )
+                
+                # Give back the part of the reservation the request did not use
+                usage = getattr(response, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    self.token_bucket.refund(estimated_tokens - usage.total_tokens)
+                
+                return response.choices[0].message.content
+            
+            except Exception as api_error:
+                if attempt >= self.max_retries or not self._is_retryable(api_error):
+                    raise
+                delay = self._backoff_delay(attempt, api_error)
+                logger.warning(
+                    f"Vision API call for {image_name} failed ({type(api_error).__name__}: {str(api_error)}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+    
+    async def extract_info(self, image_input: Union[str, Path, io.BytesIO]) -> dict:
+        """Extract information from image"""
+        try:
+            # Handle input based on type
+            if isinstance(image_input, (str, Path)):
+                image_path = Path(image_input)
+                if not image_path.exists():
+                    raise FileNotFoundError(f"Image file not found: {image_path}")
+                image_bytes = await asyncio.to_thread(image_path.read_bytes)
+                image_name = image_path.name
+            elif isinstance(image_input, io.BytesIO):
+                image_bytes = image_input.getvalue()
+                image_name = "memory_image"
+            else:
+                raise ValueError(f"Unsupported image input type: {type(image_input)}")
+            
+            # Check cache before paying for an API call
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(image_bytes, self.image_optimizer.config)
+                cached_result = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached_result is not None:
+                    logger.info(f"Vision cache hit for image: {image_name}")
+                    return cached_result
+            
+            content = await self._call_api(image_bytes, image_name)
+            result = {
+                "status": "success",
+                "content": content,
+            }
+            
+            # Only successful results are cached, errors are retried next time
+            if cache_key is not None:
+                await asyncio.to_thread(self.cache.set, cache_key, result)
+            
+            return result
+        
+        except Exception as e:
+            logger.error(f"Error processing image: {str(e)}", exc_info=True)
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
+    async def extract_many(self, image_inputs: List[Union[str, Path, io.BytesIO]],
+                           max_concurrency: Optional[int] = None) -> List[dict]:
+        """
+        Extract information from several images with bounded concurrency
+
+        Args:
+            image_inputs: Images to process
+            max_concurrency: Maximum in-flight API calls (default: self.max_concurrency)
+
+        Returns:
+            List[dict]: One extract_info result per image, in input order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async def bounded_extract(image_input):
+            async with semaphore:
+                return await self.extract_info(image_input)
+        
+        return await asyncio.gather(*(bounded_extract(image_input) for image_input in image_inputs))
+    
+    async def aclose(self):
+        """Close the underlying HTTP client"""
+        await self.client.close()
+
+class AsyncExtractorRunner:
+    """Runs an AsyncImageExtractor on a background event loop for synchronous callers
+
+    The extractor and its HTTP client are created on the runner's loop and
+    used only from it, so every thread of a process (job workers, loaders
+    processing documents concurrently) shares one set of rate limit buckets.
+    """
+    
+    def __init__(self, **extractor_kwargs: Any):
+        """
+        Start the event loop thread and create the extractor on it
+
+        Args:
+            **extractor_kwargs: Arguments for AsyncImageExtractor
+        """
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-image-extractor", daemon=True)
+        self.thread.start()
+        try:
+            self.extractor: AsyncImageExtractor = self.run(self._create_extractor(extractor_kwargs))
+        except Exception:
+            self._stop_loop()
+            raise
+    
+    async def _create_extractor(self, extractor_kwargs: Dict[str, Any]) -> AsyncImageExtractor:
+        return AsyncImageExtractor(**extractor_kwargs)
+    
+    def run(self, coroutine):
+        """Run a coroutine on the runner's loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+    
+    def extract_many(self, image_inputs: List[Union[str, Path, io.BytesIO]],
+                     max_concurrency: Optional[int] = None) -> List[dict]:
+        """Blocking AsyncImageExtractor.extract_many"""
+        return self.run(self.extractor.extract_many(image_inputs, max_concurrency))
+    
+    def close(self):
+        """Close the HTTP client and stop the loop"""
+        try:
+            self.run(self.extractor.aclose())
+        finally:
+            self._stop_loop()
+    
+    def _stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+_shared_runner: Optional[AsyncExtractorRunner] = None
+_shared_runner_pid: Optional[int] = None
+_shared_runner_lock = threading.Lock()
+
+def get_async_extractor_runner() -> AsyncExtractorRunner:
+    """
+    Process-wide runner, created on first use
+
+    Its extractor does not cache: ImageExtractor checks and fills its own
+    vision cache around the calls. A forked worker process does not inherit
+    the loop thread and gets a runner of its own.
+    """
+    global _shared_runner, _shared_runner_pid
+    with _shared_runner_lock:
+        if _shared_runner is None or _shared_runner_pid != os.getpid():
+            _shared_runner = AsyncExtractorRunner(use_cache=False)
+            _shared_runner_pid = os.getpid()
+        return _shared_runner
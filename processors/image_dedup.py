@@ -0,0 +1,119 @@
+from typing import List, Optional, Dict, Any, Tuple
+import hashlib
+import io
+import logging
+from PIL import Image
+from config.settings import IMAGE_DEDUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Below this size a dHash cannot resolve text: two 800x200 images of the same
+# sentence with different figures are 1 bit apart on an 8x8 hash
+MIN_NEAR_DUPLICATE_HASH_SIZE = 16
+
+def dhash(image_bytes: bytes, hash_size: int = 8) -> Tuple[int, float]:
+    """
+    Compute the difference hash of an image
+
+    Args:
+        image_bytes: Encoded image
+        hash_size: Hash is hash_size * hash_size bits
+
+    Returns:
+        Tuple[int, float]: Hash value and aspect ratio (width / height)
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        width, height = image.size
+        image.draft("L", (hash_size * 4, hash_size * 4))
+        gray = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = gray.tobytes()
+    
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value, width / height if height else 0.0
+
+class ImageDeduplicator:
+    """Group identical and near-identical images so each is analyzed once
+
+    Images are matched by content digest. Near-duplicate matching by
+    perceptual hash (dHash), which also treats renders of the same picture
+    that differ slightly in size or compression as one, is opt-in
+    (max_distance > 0): a match copies one image's vision result onto the
+    other, so a hash that misses a changed figure puts wrong data in the output.
+    """
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize deduplicator
+
+        Args:
+            config: Overrides for IMAGE_DEDUP_CONFIG
+                - enabled: Set to False to treat every image as unique
+                - max_distance: Largest Hamming distance between perceptual hashes
+                  of duplicates, 0 (default) matches identical bytes only
+                - hash_size: Side of the perceptual hash, at least MIN_NEAR_DUPLICATE_HASH_SIZE
+                - max_aspect_diff: Largest relative difference in aspect ratio of duplicates
+        
+        Raises:
+            ValueError: Near-duplicate matching with a hash too small to resolve text
+        """
+        self.config = {**IMAGE_DEDUP_CONFIG, **(config or {})}
+        if self.config["max_distance"] > 0 and self.config["hash_size"] < MIN_NEAR_DUPLICATE_HASH_SIZE:
+            raise ValueError(
+                f"Near-duplicate image matching needs hash_size >= {MIN_NEAR_DUPLICATE_HASH_SIZE}, "
+                f"got {self.config['hash_size']}"
+            )
+    
+    def group(self, images: List[Optional[bytes]]) -> List[int]:
+        """
+        Find the first occurrence of every image
+
+        Args:
+            images: Encoded images, None for images that could not be read
+
+        Returns:
+            List[int]: For each image, the position of the image whose result it can share
+                (its own position when it is unique)
+        """
+        if not self.config["enabled"]:
+            return list(range(len(images)))
+        
+        representatives = []
+        by_digest: Dict[bytes, int] = {}
+        perceptual: List[Tuple[int, float, int]] = []  # (hash, aspect ratio, position)
+        
+        for position, image_bytes in enumerate(images):
+            if image_bytes is None:
+                representatives.append(position)
+                continue
+            
+            digest = hashlib.sha256(image_bytes).digest()
+            if digest in by_digest:
+                representatives.append(by_digest[digest])
+                continue
+            
+            match = position
+            if self.config["max_distance"] > 0:
+                try:
+                    value, aspect = dhash(image_bytes, self.config["hash_size"])
+                    for other_value, other_aspect, other_position in perceptual:
+                        if bin(value ^ other_value).count("1") <= self.config["max_distance"] and \
+                                abs(aspect - other_aspect) <= self.config["max_aspect_diff"] * max(aspect, other_aspect):
+                            match = other_position
+                            break
+                    if match == position:
+                        perceptual.append((value, aspect, position))
+                except Exception as e:
+                    # Unreadable formats are only matched by digest
+                    logger.debug(f"Could not compute perceptual hash: {str(e)}")
+            
+            by_digest[digest] = match
+            representatives.append(match)
+        
+        duplicates = sum(1 for position, match in enumerate(representatives) if position != match)
+        if duplicates:
+            logger.info(f"Deduplicated {duplicates} of {len(images)} images")
+        return representatives
@@ -1,56 +1,22 @@
-from typing import Union, Optional
+from typing import Union, Optional, List
 import base64
 import logging
 import io
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from config.settings import VISION_MODEL_CONFIG
+from config.settings import VISION_MODEL_CONFIG, VISION_RATE_LIMIT_CONFIG, IMAGE_OPTIMIZER_CONFIG
+from .vision_cache import VisionCache, get_vision_cache
+from .image_dedup import ImageDeduplicator
+from .image_optimizer import ImageOptimizer
 
 logger = logging.getLogger(__name__)
 
 # 使用新的配置结构
 model_config = VISION_MODEL_CONFIG["models"][VISION_MODEL_CONFIG["default_model"]]
 
-class ImageExtractor:
-    """Image information extractor using OpenAI Vision API"""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize extractor with API key"""
-        self.api_key = api_key or VISION_MODEL_CONFIG["api_key"]
-        self.client = OpenAI(api_key=self.api_key)
-    
-    def _encode_image_data(self, image_data: Union[Path, io.BytesIO]) -> str:
-        """Encode image data to base64 format"""
-        if isinstance(image_data, Path):
-            with open(image_data, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode("utf-8")
-        elif isinstance(image_data, io.BytesIO):
-            return base64.b64encode(image_data.getvalue()).decode("utf-8")
-        else:
-            raise ValueError(f"Unsupported image data type: {type(image_data)}")
-    
-    def extract_info(self, image_input: Union[str, Path, io.BytesIO]) -> dict:
-        """Extract information from image"""
-        try:
-            # Handle input based on type
-            if isinstance(image_input, (str, Path)):
-                image_path = Path(image_input)
-                if not image_path.exists():
-                    raise FileNotFoundError(f"Image file not found: {image_path}")
-                image_data = image_path
-                image_name = image_path.name
-            elif isinstance(image_input, io.BytesIO):
-                image_data = image_input
-                image_name = "memory_image"
-            else:
-                raise ValueError(f"Unsupported image input type: {type(image_input)}")
-            
-            try:
-                # Encode image
-                base64_image = self._encode_image_data(image_data)
-                
-                # Universal prompt that covers all scenarios
-                system_prompt = """You are an expert image analyzer. Your task is to:
+# Universal prompt that covers all scenarios
+SYSTEM_PROMPT = """You are an expert image analyzer. Your task is to:
 
 1. Identify and extract all text content in the image, maintaining:
    - Original language
@@ -80,29 +46,118 @@ class ImageExtractor:
 Always maintain the original language of any text found in the image.
 For pure visual content, use English for descriptions."""
 
-                # Build messages
-                messages = [
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Please analyze this image and extract all relevant information."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
+USER_PROMPT = "Please analyze this image and extract all relevant information."
+
+def build_messages(base64_image: str, mime_type: str = "image/jpeg", detail: str = "high") -> list:
+    """Build chat messages asking the vision model to analyze an image"""
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": USER_PROMPT
+                },
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{mime_type};base64,{base64_image}",
+                        "detail": detail
                     }
-                ]
+                }
+            ]
+        }
+    ]
+
+def make_cache_key(image_bytes: bytes, optimizer_config: Optional[dict] = None) -> str:
+    """Build vision cache key from the original image bytes and the request settings"""
+    return VisionCache.make_key(
+        image_bytes,
+        model=VISION_MODEL_CONFIG["default_model"],
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=USER_PROMPT,
+        max_tokens=model_config["max_tokens"],
+        temperature=model_config["temperature"],
+        image_optimizer=optimizer_config or IMAGE_OPTIMIZER_CONFIG
+    )
+
+class ImageExtractor:
+    """Image information extractor using OpenAI Vision API"""
+    
+    def __init__(self, api_key: Optional[str] = None, use_cache: bool = True,
+                 cache: Optional[VisionCache] = None, max_concurrency: Optional[int] = None,
+                 async_runner=None):
+        """
+        Initialize extractor with API key
+        
+        Args:
+            api_key: OpenAI API key (default: VISION_MODEL_CONFIG["api_key"])
+            use_cache: Set to False to bypass the vision result cache
+            cache: Cache instance to use (default: shared process-wide cache)
+            max_concurrency: Parallel API calls in extract_many
+                (default: VISION_MODEL_CONFIG["max_concurrency"])
+            async_runner: AsyncExtractorRunner extract_many sends its API calls through
+                (default: the process-wide runner when VISION_RATE_LIMIT_CONFIG["async_client"] is set)
+        """
+        self.api_key = api_key or VISION_MODEL_CONFIG["api_key"]
+        self.client = OpenAI(api_key=self.api_key, base_url=VISION_MODEL_CONFIG["base_url"])
+        self.cache = (cache or get_vision_cache()) if use_cache else None
+        self.max_concurrency = max_concurrency or VISION_MODEL_CONFIG["max_concurrency"]
+        self.deduplicator = ImageDeduplicator()
+        self.image_optimizer = ImageOptimizer()
+        self.async_runner = async_runner
+    
+    def _read_image_data(self, image_data: Union[Path, io.BytesIO]) -> bytes:
+        """Read raw image bytes"""
+        if isinstance(image_data, Path):
+            with open(image_data, "rb") as image_file:
+                return image_file.read()
+        elif isinstance(image_data, io.BytesIO):
+            return image_data.getvalue()
+        else:
+            raise ValueError(f"Unsupported image data type: {type(image_data)}")
+    
+    def _encode_image_data(self, image_data: Union[Path, io.BytesIO]) -> str:
+        """Encode image data to base64 format"""
+        return base64.b64encode(self._read_image_data(image_data)).decode("utf-8")
+    
+    def extract_info(self, image_input: Union[str, Path, io.BytesIO]) -> dict:
+        """Extract information from image"""
+        try:
+            # Handle input based on type
+            if isinstance(image_input, (str, Path)):
+                image_path = Path(image_input)
+                if not image_path.exists():
+                    raise FileNotFoundError(f"Image file not found: {image_path}")
+                image_data = image_path
+                image_name = image_path.name
+            elif isinstance(image_input, io.BytesIO):
+                image_data = image_input
+                image_name = "memory_image"
+            else:
+                raise ValueError(f"Unsupported image input type: {type(image_input)}")
+            
+            try:
+                # Check cache before paying for an API call
+                image_bytes = self._read_image_data(image_data)
+                cache_key = None
+                if self.cache is not None:
+                    cache_key = make_cache_key(image_bytes, self.image_optimizer.config)
+                    cached_result = self.cache.get(cache_key)
+                    if cached_result is not None:
+                        logger.info(f"Vision cache hit for image: {image_name}")
+                        return cached_result
+                
+                # Downscale and re-encode, then encode image
+                image_bytes, mime_type, detail = self.image_optimizer.optimize(image_bytes)
+                base64_image = base64.b64encode(image_bytes).decode("utf-8")
+                
+                # Build messages
+                messages = build_messages(base64_image, mime_type, detail)
                 
                 # Call API
                 logger.info(f"Processing image: {image_name}")
@@ -115,22 +170,105 @@ For pure visual content, use English for descriptions."""
                     )
                     
                     # Return results
-                    return {
+                    result = {
                         "status": "success",
                         "content": response.choices[0].message.content,
                     }
                     
+                    # Only successful results are cached, errors are retried next time
+                    if cache_key is not None:
+                        self.cache.set(cache_key, result)
+                    
+                    return result
+                
                 except Exception as api_error:
                     logger.error(f"OpenAI API call failed: {str(api_error)}", exc_info=True)
                     raise Exception(f"API call failed: {str(api_error)}")
-                
+            
             except Exception as process_error:
                 logger.error(f"Image processing error: {str(process_error)}", exc_info=True)
                 raise Exception(f"Image processing failed: {str(process_error)}")
-                
+        
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}", exc_info=True)
             return {
                 "status": "error",
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+    
+    def extract_many(self, image_inputs: List[Union[str, Path, io.BytesIO]],
+                     max_concurrency: Optional[int] = None) -> List[dict]:
+        """
+        Extract information from several images with bounded concurrency
+        
+        Args:
+            image_inputs: Images to process
+            max_concurrency: Maximum parallel API calls (default: self.max_concurrency)
+            
+        Returns:
+            List[dict]: One extract_info result per image, in input order. Identical and
+                near-identical images are analyzed once and share the result.
+        
+        With the async client enabled the API calls go through the process-wide
+        AsyncImageExtractor, which applies the rate limits and retries 429, 5xx
+        and timeouts; otherwise each image gets one call from a thread pool.
+        """
+        limit = max_concurrency or self.max_concurrency
+        
+        # Send each distinct image once and fan its result out to the duplicates
+        image_bytes = [self._peek_image_bytes(image_input) for image_input in image_inputs]
+        representatives = self.deduplicator.group(image_bytes)
+        unique_positions = sorted(set(representatives))
+        unique_inputs = [image_inputs[position] for position in unique_positions]
+        
+        runner = self._get_async_runner()
+        if runner is not None:
+            unique_results = self._extract_many_async(
+                runner, unique_inputs, [image_bytes[position] for position in unique_positions], limit
+            )
+        elif limit <= 1 or len(unique_inputs) <= 1:
+            unique_results = [self.extract_info(image_input) for image_input in unique_inputs]
+        else:
+            # extract_info never raises, so map() yields a result for every image
+            with ThreadPoolExecutor(max_workers=min(limit, len(unique_inputs))) as executor:
+                unique_results = list(executor.map(self.extract_info, unique_inputs))
+        
+        results_by_position = dict(zip(unique_positions, unique_results))
+        return [dict(results_by_position[representative]) for representative in representatives]
+    
+    def _get_async_runner(self):
+        """Runner for extract_many, None to call the API with the sync client"""
+        if self.async_runner is None and VISION_RATE_LIMIT_CONFIG["async_client"]:
+            # Imported here, the async extractor module builds on this one
+            from .async_image_extractor import get_async_extractor_runner
+            self.async_runner = get_async_extractor_runner()
+        return self.async_runner
+    
+    def _extract_many_async(self, runner, image_inputs: List[Union[str, Path, io.BytesIO]],
+                            image_bytes: List[Optional[bytes]], limit: int) -> List[dict]:
+        """Answer cached images here and send the others through the async runner"""
+        results: List[Optional[dict]] = [None] * len(image_inputs)
+        cache_keys: List[Optional[str]] = [None] * len(image_inputs)
+        misses = []
+        for position, data in enumerate(image_bytes):
+            if self.cache is not None and data is not None:
+                cache_keys[position] = make_cache_key(data, self.image_optimizer.config)
+                results[position] = self.cache.get(cache_keys[position])
+            if results[position] is None:
+                misses.append(position)
+        
+        if misses:
+            api_results = runner.extract_many([image_inputs[position] for position in misses], limit)
+            for position, result in zip(misses, api_results):
+                # Only successful results are cached, errors are retried next time
+                if cache_keys[position] is not None and result.get("status") == "success":
+                    self.cache.set(cache_keys[position], result)
+                results[position] = result
+        return results
+    
+    def _peek_image_bytes(self, image_input: Union[str, Path, io.BytesIO]) -> Optional[bytes]:
+        """Read image bytes for deduplication, None if unavailable (extract_info reports the error)"""
+        try:
+            return self._read_image_data(Path(image_input) if isinstance(image_input, str) else image_input)
+        except Exception:
+            return None
\ No newline at end of file
@@ -0,0 +1,83 @@
+from typing import Optional, Dict, Any, Sequence
+import io
+import logging
+from PIL import Image, ImageStat
+from config.settings import IMAGE_FILTER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class ImageFilter:
+    """Cheap pre-classifier for images not worth a vision API call
+
+    Decorative images (bullets, separator lines, tracking pixels, solid
+    backgrounds) are detected from their pixel dimensions, their area on the
+    page and simple pixel statistics. Each check returns a skip reason, or
+    None when the image should be sent to the vision model.
+    """
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize filter
+
+        Args:
+            config: Overrides for IMAGE_FILTER_CONFIG
+                - enabled: Set to False to keep every image
+                - min_width / min_height: Smallest pixel size worth analyzing
+                - min_area_ratio: Smallest share of the page area (PDF only)
+                - max_aspect_ratio: Longer/shorter side ratio above which an image is a line or rule
+                - blank_stddev: Grayscale standard deviation below which an image is blank
+        """
+        self.config = {**IMAGE_FILTER_CONFIG, **(config or {})}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.config["enabled"]
+    
+    def check_dimensions(self, width: float, height: float) -> Optional[str]:
+        """Check pixel dimensions"""
+        if not self.enabled:
+            return None
+        if width < self.config["min_width"] or height < self.config["min_height"]:
+            return f"too_small ({int(width)}x{int(height)}px)"
+        if min(width, height) > 0 and max(width, height) / min(width, height) > self.config["max_aspect_ratio"]:
+            return f"separator (aspect ratio {max(width, height) / min(width, height):.0f}:1)"
+        return None
+    
+    def check_page_area(self, bbox: Sequence[float], page_bbox: Sequence[float]) -> Optional[str]:
+        """Check the image area relative to the page it is placed on"""
+        if not self.enabled:
+            return None
+        page_area = (page_bbox[2] - page_bbox[0]) * (page_bbox[3] - page_bbox[1])
+        image_area = max(0, bbox[2] - bbox[0]) * max(0, bbox[3] - bbox[1])
+        if page_area > 0 and image_area / page_area < self.config["min_area_ratio"]:
+            return f"small_on_page ({image_area / page_area:.2%} of page)"
+        return None
+    
+    def check_image(self, image_bytes: bytes) -> Optional[str]:
+        """Check dimensions and pixel statistics of encoded image bytes"""
+        if not self.enabled:
+            return None
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                reason = self.check_dimensions(*image.size)
+                if reason:
+                    return reason
+                
+                # Statistics on a thumbnail are as good for this purpose and much cheaper
+                image.draft("RGB", (128, 128))
+                image.thumbnail((128, 128))
+                if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+                    # Fully transparent areas should count as background, not black
+                    background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+                    image = Image.alpha_composite(background, image.convert("RGBA"))
+                gray = image.convert("L")
+                
+                stddev = ImageStat.Stat(gray).stddev[0]
+                # Histogram entropy is not used: text on a white background is mostly
+                # white pixels and scores as low as a decorative image
+                if stddev < self.config["blank_stddev"]:
+                    return f"blank (stddev {stddev:.1f})"
+        except Exception as e:
+            # Formats PIL cannot read (EMF, WMF, ...) are left to the vision model
+            logger.debug(f"Image filter could not inspect image: {str(e)}")
+        return None
@@ -0,0 +1,131 @@
+from typing import Optional, Dict, Any, Tuple
+import io
+import logging
+from PIL import Image, ImageChops, ImageOps
+from config.settings import IMAGE_OPTIMIZER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Formats the vision API accepts, sent without re-encoding when small enough
+PASSTHROUGH_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp"
+}
+
+def sniff_mime_type(image_bytes: bytes) -> str:
+    """Guess the MIME type of encoded image bytes from their signature"""
+    if image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if image_bytes.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_bytes.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    # Previous default, the API reports unsupported formats itself
+    return "image/jpeg"
+
+class ImageOptimizer:
+    """Prepare images for the vision API
+
+    Images are downscaled to the largest size the model looks at, re-encoded
+    as PNG (transparency, few colors) or JPEG (photos) unless the original is
+    already small and in a supported format, and labelled with their real
+    MIME type. Low detail is chosen for small images and for images that lose
+    almost nothing at 512px, which is what the model sees in low detail mode.
+    """
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize optimizer
+
+        Args:
+            config: Overrides for IMAGE_OPTIMIZER_CONFIG
+                - enabled: Set to False to send images unchanged (still with correct MIME type)
+                - max_dimension: Longest side sent in high detail mode
+                - jpeg_quality: Quality used when re-encoding photos
+                - passthrough_max_bytes: Supported images up to this size are not re-encoded
+                - detail: "auto", "low" or "high"
+                - low_detail_max_dimension: Longest side sent in low detail mode
+                - low_detail_max_loss: Share of pixels allowed to change noticeably at 512px for auto low detail
+        """
+        self.config = {**IMAGE_OPTIMIZER_CONFIG, **(config or {})}
+    
+    def optimize(self, image_bytes: bytes) -> Tuple[bytes, str, str]:
+        """
+        Optimize encoded image bytes
+
+        Args:
+            image_bytes: Encoded image in any format PIL can read
+
+        Returns:
+            Tuple of image bytes, MIME type and detail level ("low" or "high")
+        """
+        if not self.config["enabled"]:
+            return image_bytes, sniff_mime_type(image_bytes), "high"
+        
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                source_format = image.format
+                detail = self._choose_detail(image)
+                max_dimension = self.config["low_detail_max_dimension"] if detail == "low" else self.config["max_dimension"]
+                needs_resize = max(image.size) > max_dimension
+                can_pass_through = source_format in PASSTHROUGH_FORMATS and not getattr(image, "is_animated", False)
+                
+                if not needs_resize and can_pass_through and len(image_bytes) <= self.config["passthrough_max_bytes"]:
+                    return image_bytes, PASSTHROUGH_FORMATS[source_format], detail
+                
+                image = ImageOps.exif_transpose(image)
+                if needs_resize:
+                    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+                optimized_bytes, mime_type = self._encode(image)
+            
+            # Re-encoding an image of the same size does not always pay off
+            if not needs_resize and can_pass_through and len(optimized_bytes) >= len(image_bytes):
+                return image_bytes, PASSTHROUGH_FORMATS[source_format], detail
+            
+            logger.debug(f"Optimized image from {len(image_bytes)} to {len(optimized_bytes)} bytes ({mime_type}, {detail} detail)")
+            return optimized_bytes, mime_type, detail
+        
+        except Exception as e:
+            # Formats PIL cannot read (EMF, WMF, ...) are sent as they are
+            logger.debug(f"Image optimizer could not process image: {str(e)}")
+            return image_bytes, sniff_mime_type(image_bytes), "high"
+    
+    def _choose_detail(self, image: Image.Image) -> str:
+        """Pick the detail level from image size and how much fine detail it has"""
+        if self.config["detail"] in ("low", "high"):
+            return self.config["detail"]
+        
+        low_dimension = self.config["low_detail_max_dimension"]
+        if max(image.size) <= low_dimension:
+            return "low"
+        
+        # Compare the image with a round trip through the low detail resolution;
+        # text and fine lines change noticeably, smooth pictures barely do
+        gray = image.convert("L")
+        gray.thumbnail((low_dimension * 2, low_dimension * 2))
+        small = gray.copy()
+        small.thumbnail((low_dimension, low_dimension), Image.Resampling.BILINEAR)
+        histogram = ImageChops.difference(gray, small.resize(gray.size, Image.Resampling.BILINEAR)).histogram()
+        loss = sum(histogram[40:]) / max(sum(histogram), 1)
+        return "low" if loss <= self.config["low_detail_max_loss"] else "high"
+    
+    def _encode(self, image: Image.Image) -> Tuple[bytes, str]:
+        """Encode as PNG for transparency and flat graphics, JPEG for everything else"""
+        output = io.BytesIO()
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        
+        if has_alpha:
+            image.convert("RGBA").save(output, format="PNG", optimize=True)
+            return output.getvalue(), "image/png"
+        
+        if image.mode not in ("1", "L", "P", "RGB"):
+            image = image.convert("RGB")
+        if image.mode in ("1", "P") or image.getcolors(maxcolors=256) is not None:
+            image.save(output, format="PNG", optimize=True)
+            return output.getvalue(), "image/png"
+        
+        image.convert("RGB").save(output, format="JPEG", quality=self.config["jpeg_quality"], optimize=True)
+        return output.getvalue(), "image/jpeg"
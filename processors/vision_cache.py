@@ -0,0 +1,221 @@
+from typing import Optional, Dict, Any, Iterator
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from config.settings import VISION_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class VisionCache:
+    """Persistent content-addressed cache for vision extraction results
+    
+    Results are stored in a local SQLite database keyed on a hash of the
+    image bytes and every request parameter that can change the answer
+    (model, prompts, token settings). Entries expire after ``ttl_seconds``
+    and the least recently used ones are evicted once ``max_entries`` or
+    ``max_bytes`` is exceeded.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, ttl_seconds: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Initialize cache
+        
+        Args:
+            path: SQLite database file (default: VISION_CACHE_CONFIG["path"])
+            max_entries: Maximum number of cached results, 0 for unlimited
+            max_bytes: Maximum total size of cached results, 0 for unlimited
+            ttl_seconds: Lifetime of an entry in seconds, 0 to never expire
+            enabled: Set to False to bypass the cache entirely
+        """
+        config = VISION_CACHE_CONFIG
+        self.path = Path(path or config["path"])
+        self.max_entries = config["max_entries"] if max_entries is None else max_entries
+        self.max_bytes = config["max_bytes"] if max_bytes is None else max_bytes
+        self.ttl_seconds = config["ttl_seconds"] if ttl_seconds is None else ttl_seconds
+        self.enabled = config["enabled"] if enabled is None else enabled
+        
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        
+        if self.enabled:
+            try:
+                self._init_db()
+            except Exception as e:
+                # A broken cache must never break extraction
+                logger.warning(f"Vision cache disabled, failed to open {self.path}: {str(e)}")
+                self.enabled = False
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (one per operation, safe across threads and processes)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _init_db(self):
+        """Create database file and schema"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS vision_results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_vision_results_accessed ON vision_results (accessed_at)"
+            )
+    
+    @staticmethod
+    def make_key(image_bytes: bytes, **params: Any) -> str:
+        """
+        Build cache key from image content and request parameters
+        
+        Args:
+            image_bytes: Raw image bytes
+            **params: Request parameters that affect the result (model, prompts, ...)
+        
+        Returns:
+            str: Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(image_bytes).digest())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return cached result for key, or None on miss"""
+        if not self.enabled:
+            return None
+        
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM vision_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM vision_results WHERE key = ?", (key,))
+                    row = None
+                if row:
+                    conn.execute(
+                        "UPDATE vision_results SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+        except Exception as e:
+            logger.warning(f"Vision cache read failed: {str(e)}")
+            row = None
+        
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: str, result: Dict[str, Any]):
+        """Store result for key and apply eviction"""
+        if not self.enabled:
+            return
+        
+        value = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO vision_results (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now)
+                )
+                evicted = self._evict(conn, now)
+            with self._lock:
+                self.writes += 1
+                self.evictions += evicted
+        except Exception as e:
+            logger.warning(f"Vision cache write failed: {str(e)}")
+    
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """Remove expired entries, then least recently used ones over the limits"""
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += conn.execute(
+                "DELETE FROM vision_results WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_results"
+        ).fetchone()
+        if (not self.max_entries or count <= self.max_entries) and \
+                (not self.max_bytes or total <= self.max_bytes):
+            return evicted
+        
+        # Walk entries from least to most recently used until within limits
+        rows = conn.execute(
+            "SELECT key, size FROM vision_results ORDER BY accessed_at ASC"
+        ).fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if (not self.max_entries or count <= self.max_entries) and \
+                    (not self.max_bytes or total <= self.max_bytes):
+                break
+            stale_keys.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM vision_results WHERE key = ?", stale_keys)
+        return evicted + len(stale_keys)
+    
+    def clear(self):
+        """Remove all cached results"""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM vision_results")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        stats = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": 0,
+            "bytes": 0
+        }
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    stats["entries"], stats["bytes"] = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_results"
+                    ).fetchone()
+            except Exception as e:
+                logger.warning(f"Vision cache stats failed: {str(e)}")
+        return stats
+
+_default_cache: Optional[VisionCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_vision_cache() -> VisionCache:
+    """Return the process-wide cache shared by all extractors"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = VisionCache()
+        return _default_cache
@@ -1,54 +1,241 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import logging
+import multiprocessing
+import multiprocessing.connection
+import time
+from collections import deque
 from pathlib import Path
 from langchain_core.documents import Document
+from loaders.base import DocumentSource, has_failures
 from loaders.factory import DocumentLoaderFactory
+from services.result_cache import DocumentResultCache, get_result_cache
+from config.settings import PROCESSING_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def _process_in_subprocess(file_path: str, conn, mode: str = "full"):
+    """Worker process entry point: process one document and send the result back"""
+    try:
+        documents = DocumentService().process_document(file_path, mode)
+        conn.send(("ok", documents))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
 class DocumentService:
     """Document processing service"""
     
-    def __init__(self):
+    def __init__(self, result_cache: Optional[DocumentResultCache] = None):
+        """
+        Initialize service
+        
+        Args:
+            result_cache: Document result cache (default: shared process-wide cache, opened on first use)
+        """
         self.loader_factory = DocumentLoaderFactory()
+        self._result_cache = result_cache
+    
+    @property
+    def result_cache(self) -> DocumentResultCache:
+        """Cache of whole parsed documents"""
+        if self._result_cache is None:
+            self._result_cache = get_result_cache()
+        return self._result_cache
+    
+    def _cache_key(self, loader) -> Optional[str]:
+        """Result cache key of the loader's document, None when the result must not be cached"""
+        if not loader.cacheable or not self.result_cache.enabled:
+            return None
+        try:
+            return self.result_cache.make_key(loader)
+        except Exception as e:
+            logger.warning(f"Result cache key failed for {loader.file_path}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _apply_source_metadata(documents: List[Document], loader) -> List[Document]:
+        """
+        Set the per-path metadata (source, file_name, document_id) of the file being processed
+        
+        The result cache is keyed on content, so a hit may come from another
+        path (a previous upload's temp file, a duplicate file elsewhere).
+        """
+        for doc in documents:
+            doc.metadata["source"] = str(loader.file_path)
+            if "file_name" in doc.metadata:
+                doc.metadata["file_name"] = Path(loader.file_path).name
+            if loader.document_id is not None:
+                doc.metadata["document_id"] = loader.document_id
+            else:
+                doc.metadata.pop("document_id", None)
+        return documents
+    
+    @staticmethod
+    def _is_complete(documents: List[Document]) -> bool:
+        """Whether no document or image failed, failures may be transient and are not cached"""
+        return not has_failures(documents)
     
-    def process_document(self, file_path: str) -> List[Document]:
-        """Process a single document"""
-        logger.info(f"Processing document: {file_path}")
+    def process_document(self, file_path: DocumentSource, mode: str = "full", file_name: Optional[str] = None,
+                         mime_type: Optional[str] = None, document_id: Optional[str] = None) -> List[Document]:
+        """
+        Process a single document ("text_only" mode never calls the vision model)
+        
+        file_path may also be the document itself (bytes, memoryview or binary file
+        object), which is parsed in memory; file_name or mime_type then selects the loader.
+        Results are stored in the document result cache, a hit returns them with
+        "cache": "hit" metadata without parsing the document again.
+        
+        document_id names the logical document across revisions (default: the file
+        name); pages, slides and sections unchanged since the previous revision
+        reuse its results.
+        """
+        loader = self.loader_factory.get_loader(file_path, mode, file_name=file_name, mime_type=mime_type)
+        if document_id is not None:
+            loader.document_id = document_id
+        logger.info(f"Processing document: {loader.file_path}")
         try:
-            loader = self.loader_factory.get_loader(file_path)
-            documents = loader.load()
-            logger.info(f"Successfully processed document: {file_path}")
+            # The same content parsed with the same loader version and options is served from the cache
+            cache_key = self._cache_key(loader)
+            if cache_key is not None:
+                documents = self.result_cache.get(cache_key)
+                if documents is not None:
+                    logger.info(f"Result cache hit for document: {loader.file_path}")
+                    return self._apply_source_metadata(documents, loader)
+            
+            documents = self._apply_source_metadata(loader.load(), loader)
+            if cache_key is not None and self._is_complete(documents):
+                self.result_cache.set(cache_key, documents)
+            logger.info(f"Successfully processed document: {loader.file_path}")
             return documents
         except Exception as e:
-            logger.error(f"Failed to process document: {file_path}", exc_info=True)
+            logger.error(f"Failed to process document: {loader.file_path}", exc_info=True)
             raise
     
+    def iter_documents(self, file_paths: List[str], mode: str = "full") -> Iterator[Tuple[str, Document]]:
+        """
+        Process documents lazily, yielding each unit (page, slide, ...) as soon as it is ready
+        
+        Args:
+            file_paths: List of paths to document files
+            mode: Processing mode, "full" or "text_only"
+            
+        Yields:
+            Tuple[str, Document]: Source file path and one of its documents
+        """
+        for file_path in file_paths:
+            logger.info(f"Streaming document: {file_path}")
+            try:
+                loader = self.loader_factory.get_loader(file_path, mode)
+                for document in loader.lazy_load():
+                    yield file_path, document
+            except Exception as e:
+                # Units already yielded stay valid, the failure is reported as a final unit
+                logger.error(f"Failed to process {file_path}: {str(e)}", exc_info=True)
+                for document in self._failed_documents(file_path, str(e)):
+                    yield file_path, document
+    
     def process_documents(self, file_paths: List[str], config: Optional[Dict[str, Any]] = None) -> Dict[str, List[Document]]:
         """
         Process multiple documents
         
         Args:
             file_paths: List of paths to document files
-            config: Optional configuration for document processing
+            config: Optional configuration for document processing, overrides PROCESSING_CONFIG
+                - mode: "full" (default) or "text_only" to skip the vision model
+                - execution_mode: "serial" (default) or "process" for one worker process per file
+                - max_workers: Concurrent worker processes in process mode
+                - file_timeout: Seconds before a worker process is killed, 0 for no limit
+                - start_method: multiprocessing start method
             
         Returns:
             Dict[str, List[Document]]: Mapping of file paths to their processed documents
         """
+        config = {**PROCESSING_CONFIG, **(config or {})}
+        if config["execution_mode"] == "process" and len(file_paths) > 1:
+            return self._process_documents_in_processes(file_paths, config)
+        
         results = {}
         
         for file_path in file_paths:
             try:
-                results[file_path] = self.process_document(file_path)
+                results[file_path] = self.process_document(file_path, config["mode"])
             except Exception as e:
                 logger.error(f"Failed to process {file_path}: {str(e)}")
-                results[file_path] = [Document(
-                    page_content=f"Failed to process document: {str(e)}",
-                    metadata={
-                        "source": file_path,
-                        "extraction_status": "failed",
-                        "error": str(e)
-                    }
-                )]
-        
-        return results 
\ No newline at end of file
+                results[file_path] = self._failed_documents(file_path, str(e))
+        
+        return results
+    
+    def _failed_documents(self, file_path: str, error: str) -> List[Document]:
+        """Placeholder result for a document that could not be processed"""
+        return [Document(
+            page_content=f"Failed to process document: {error}",
+            metadata={
+                "source": file_path,
+                "extraction_status": "failed",
+                "error": error
+            }
+        )]
+    
+    def _process_documents_in_processes(self, file_paths: List[str], config: Dict[str, Any]) -> Dict[str, List[Document]]:
+        """
+        Process each document in its own worker process
+        
+        Parsing is CPU-bound, so separate processes use all cores. A file that
+        crashes its worker (segfault, OOM kill) or exceeds file_timeout only
+        produces a failed placeholder for that file; the rest of the batch
+        is unaffected.
+        """
+        context = multiprocessing.get_context(config["start_method"])
+        max_workers = max(1, int(config["max_workers"]))
+        timeout = config["file_timeout"]
+        
+        pending = deque(file_paths)
+        running = {}  # connection -> (process, file path, deadline)
+        results = {}
+        
+        logger.info(f"Processing {len(file_paths)} documents with {max_workers} worker processes")
+        while pending or running:
+            # Keep up to max_workers processes busy
+            while pending and len(running) < max_workers:
+                file_path = pending.popleft()
+                parent_conn, child_conn = context.Pipe(duplex=False)
+                process = context.Process(target=_process_in_subprocess, args=(file_path, child_conn, config["mode"]))
+                process.start()
+                child_conn.close()
+                deadline = time.monotonic() + timeout if timeout else None
+                running[parent_conn] = (process, file_path, deadline)
+            
+            deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+            wait_timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            
+            # Results must be received before joining, large payloads would block the pipe otherwise
+            for conn in multiprocessing.connection.wait(list(running), timeout=wait_timeout):
+                process, file_path, _ = running.pop(conn)
+                try:
+                    status, payload = conn.recv()
+                except EOFError:
+                    process.join()
+                    status, payload = "error", f"Worker process crashed (exit code {process.exitcode})"
+                conn.close()
+                process.join()
+                
+                if status == "ok":
+                    results[file_path] = payload
+                else:
+                    logger.error(f"Failed to process {file_path}: {payload}")
+                    results[file_path] = self._failed_documents(file_path, payload)
+            
+            # Kill workers that exceeded their deadline
+            now = time.monotonic()
+            for conn, (process, file_path, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    logger.error(f"Processing {file_path} timed out after {timeout}s, terminating worker")
+                    process.kill()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    results[file_path] = self._failed_documents(file_path, f"Processing timed out after {timeout}s")
+        
+        # Keep the input order of the serial path
+        return {file_path: results[file_path] for file_path in file_paths}
\ No newline at end of file
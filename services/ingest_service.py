@@ -0,0 +1,350 @@
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from langchain_core.documents import Document
+from loaders.base import FAILED_STATUSES, has_failures
+from loaders.factory import DocumentLoaderFactory
+from config.settings import INGEST_CONFIG
+from .document_service import DocumentService
+from .result_cache import serialize_documents
+
+logger = logging.getLogger(__name__)
+
+def file_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+class IngestManifest:
+    """State of every file of the ingested directories
+    
+    For each file the manifest keeps the directory it was ingested from,
+    its size and modification time (ns) when it was processed, the SHA-256
+    of its content, the processing mode, where its result was written and
+    its status: processed, failed (retried on the next run) or deleted
+    (the file disappeared from its directory, its result was removed).
+    """
+    
+    PROCESSED = "processed"
+    FAILED = "failed"
+    DELETED = "deleted"
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize manifest
+        
+        Args:
+            path: SQLite database file (default: INGEST_CONFIG["manifest_path"])
+        """
+        self.path = Path(path or INGEST_CONFIG["manifest_path"])
+        self._init_db()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (one per operation, safe across threads and processes)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _init_db(self):
+        """Create database file and schema"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS ingest_files (
+                    path TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    output TEXT,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_files_root ON ingest_files (root)")
+    
+    def get_files(self, root: str) -> Dict[str, Dict[str, Any]]:
+        """Return the entries of every file ingested from root, keyed by path"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM ingest_files WHERE root = ?", (root,)).fetchall()
+        return {row["path"]: dict(row) for row in rows}
+    
+    def record(self, root: str, entries: List[Dict[str, Any]]):
+        """
+        Insert or replace file entries
+        
+        Args:
+            root: Directory the files were ingested from
+            entries: Dicts with path, size, mtime_ns, content_hash, mode, output, status and error
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ingest_files "
+                "(path, root, size, mtime_ns, content_hash, mode, output, status, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(entry["path"], root, entry["size"], entry["mtime_ns"], entry["content_hash"], entry["mode"],
+                  entry.get("output"), entry["status"], entry.get("error"), now) for entry in entries]
+            )
+    
+    def touch(self, files: List[Tuple[str, int, int]]):
+        """Update size and modification time of files whose content did not change, as (path, size, mtime_ns)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE ingest_files SET size = ?, mtime_ns = ?, updated_at = ? WHERE path = ?",
+                [(size, mtime_ns, now, path) for path, size, mtime_ns in files]
+            )
+    
+    def mark_deleted(self, paths: List[str]):
+        """Record that files disappeared from their directory"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE ingest_files SET status = ?, output = NULL, error = NULL, updated_at = ? WHERE path = ?",
+                [(self.DELETED, now, path) for path in paths]
+            )
+
+class DirectoryIngestor:
+    """Incremental ingestion of a directory tree
+    
+    A run lists the tree with os.scandir from a pool of threads and compares
+    every supported file with the manifest. Files whose size and
+    modification time match a processed entry are skipped without being
+    opened, so a run over an unchanged tree only costs the directory
+    listing. Files with a new size or modification time are hashed: when
+    only the timestamps changed the entry is updated, otherwise the file is
+    processed. New and changed files are processed in batches through
+    DocumentService.process_documents (worker processes in "process"
+    execution mode) and each result is written as JSON under the output
+    directory, mirroring the file's relative path. Files that disappeared
+    are marked deleted in the manifest and their result is removed.
+    """
+    
+    def __init__(self, manifest: Optional[IngestManifest] = None, doc_service: Optional[DocumentService] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize ingestor
+        
+        Args:
+            manifest: Manifest store (default: opened at config["manifest_path"])
+            doc_service: Service that processes the documents
+            config: Optional configuration, overrides INGEST_CONFIG
+                - output_dir: Directory of the results (one subdirectory per ingested directory)
+                - execution_mode: "process" (default) or "serial"
+                - max_workers: Concurrent worker processes in process mode
+                - batch_size: Files per batch, the manifest is updated after each batch
+                - scan_workers: Threads listing directories and hashing files
+        """
+        self.config = {**INGEST_CONFIG, **(config or {})}
+        self.manifest = manifest or IngestManifest(self.config["manifest_path"])
+        self.doc_service = doc_service or DocumentService()
+        self.extensions = frozenset(DocumentLoaderFactory.LOADER_MAP)
+    
+    def _list_directory(self, directory: str) -> Tuple[List[Tuple[str, int, int]], List[str]]:
+        """Supported files of a directory as (path, size, mtime_ns), and its subdirectories"""
+        files = []
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in self.extensions and entry.is_file():
+                        stat_result = entry.stat()
+                        files.append((entry.path, stat_result.st_size, stat_result.st_mtime_ns))
+                except OSError as e:
+                    # Removed or unreadable while listing, a later run picks it up
+                    logger.warning(f"Skipping {entry.path}: {str(e)}")
+        return files, subdirectories
+    
+    def scan(self, root: str, recursive: bool = True,
+             errors: Optional[List[str]] = None) -> Iterator[Tuple[str, int, int]]:
+        """
+        List the supported files under root, directories are read concurrently
+        
+        Args:
+            root: Directory to list
+            recursive: Descend into subdirectories (symbolic links are not followed)
+            errors: Receives the directories that could not be listed
+        
+        Yields:
+            Tuple[str, int, int]: Path, size and modification time in nanoseconds
+        """
+        with ThreadPoolExecutor(max_workers=max(1, self.config["scan_workers"])) as executor:
+            futures = {executor.submit(self._list_directory, root): root}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory = futures.pop(future)
+                    try:
+                        files, subdirectories = future.result()
+                    except OSError as e:
+                        logger.warning(f"Cannot list directory {directory}: {str(e)}")
+                        if errors is not None:
+                            errors.append(directory)
+                        continue
+                    yield from files
+                    if recursive:
+                        for subdirectory in subdirectories:
+                            futures[executor.submit(self._list_directory, subdirectory)] = subdirectory
+    
+    @staticmethod
+    def _hash_or_none(file_path: str) -> Optional[str]:
+        """Content hash, None when the file can no longer be read"""
+        try:
+            return file_hash(file_path)
+        except OSError as e:
+            logger.warning(f"Cannot read {file_path}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _write_output(output_path: Path, documents: List[Document]):
+        """Write a result atomically, readers never see a partial file"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(serialize_documents(documents))
+        os.replace(temp_path, output_path)
+    
+    def default_output_dir(self, root: str) -> Path:
+        """Result directory of root: its name and a hash of its resolved path, /a/docs and /b/docs never share it"""
+        path_hash = hashlib.sha256(os.path.realpath(root).encode("utf-8")).hexdigest()[:12]
+        return Path(self.config["output_dir"]) / f"{os.path.basename(os.path.abspath(root))}-{path_hash}"
+    
+    def ingest(self, root: str, mode: str = "full", recursive: bool = True, output_dir: Optional[str] = None,
+               force: bool = False) -> Dict[str, Any]:
+        """
+        Process the new and changed files of a directory
+        
+        Args:
+            root: Directory to ingest
+            mode: Processing mode, "full" or "text_only" (files processed in another mode are processed again)
+            recursive: Include subdirectories
+            output_dir: Directory of the results (default: config["output_dir"]/<directory name>-<path hash>)
+            force: Process every file, even unchanged ones
+        
+        Returns:
+            Dict[str, Any]: Number of files scanned, unchanged, touched (new timestamps, same content),
+                new, changed, processed, failed and deleted, and the scan and total durations in seconds
+        """
+        start = time.perf_counter()
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Directory not found: {root}")
+        output_root = Path(output_dir) if output_dir else self.default_output_dir(root)
+        summary = dict.fromkeys(
+            ("scanned", "unchanged", "touched", "new", "changed", "processed", "failed", "deleted"), 0
+        )
+        
+        # Compare the listing with the manifest, unchanged files are never opened
+        known = self.manifest.get_files(root)
+        seen = set()
+        scan_errors = []
+        candidates = []
+        for path, size, mtime_ns in self.scan(root, recursive, scan_errors):
+            summary["scanned"] += 1
+            seen.add(path)
+            previous = known.get(path)
+            if (not force and previous is not None and previous["status"] == IngestManifest.PROCESSED
+                    and previous["mode"] == mode and previous["size"] == size and previous["mtime_ns"] == mtime_ns):
+                summary["unchanged"] += 1
+                continue
+            candidates.append((path, size, mtime_ns, previous))
+        summary["scan_seconds"] = round(time.perf_counter() - start, 3)
+        
+        # Hash the files whose size or timestamp changed, a touched file keeps its result
+        with ThreadPoolExecutor(max_workers=max(1, self.config["scan_workers"])) as executor:
+            hashes = list(executor.map(self._hash_or_none, [path for path, _, _, _ in candidates]))
+        touched = []
+        pending = []
+        for (path, size, mtime_ns, previous), digest in zip(candidates, hashes):
+            if digest is None:
+                continue
+            if (not force and previous is not None and previous["status"] == IngestManifest.PROCESSED
+                    and previous["mode"] == mode and previous["content_hash"] == digest
+                    and previous["output"] and os.path.exists(previous["output"])):
+                touched.append((path, size, mtime_ns))
+                continue
+            is_new = previous is None or previous["status"] == IngestManifest.DELETED
+            summary["new" if is_new else "changed"] += 1
+            pending.append({
+                "path": path, "size": size, "mtime_ns": mtime_ns, "content_hash": digest, "mode": mode,
+                # A failed file keeps its previous result until it is processed again
+                "output": previous["output"] if previous is not None else None
+            })
+        if touched:
+            self.manifest.touch(touched)
+            summary["touched"] = len(touched)
+        
+        # Files that disappeared, unless their directory could not be listed
+        unlisted = tuple(directory + os.sep for directory in scan_errors)
+        deleted = [
+            entry for path, entry in known.items()
+            if entry["status"] != IngestManifest.DELETED and path not in seen
+            and (recursive or os.path.dirname(path) == root) and not (unlisted and path.startswith(unlisted))
+        ]
+        for entry in deleted:
+            if entry["output"]:
+                Path(entry["output"]).unlink(missing_ok=True)
+        if deleted:
+            self.manifest.mark_deleted([entry["path"] for entry in deleted])
+            summary["deleted"] = len(deleted)
+        
+        logger.info(
+            f"Scanned {summary['scanned']} files in {root} in {summary['scan_seconds']}s: "
+            f"{summary['new']} new, {summary['changed']} changed, {summary['deleted']} deleted, "
+            f"{summary['unchanged'] + summary['touched']} unchanged"
+        )
+        
+        processing_config = {
+            "mode": mode,
+            "execution_mode": self.config["execution_mode"],
+            "max_workers": self.config["max_workers"]
+        }
+        batch_size = max(1, self.config["batch_size"])
+        for batch_start in range(0, len(pending), batch_size):
+            batch = pending[batch_start:batch_start + batch_size]
+            results = self.doc_service.process_documents([entry["path"] for entry in batch], processing_config)
+            for entry in batch:
+                documents = results[entry["path"]]
+                failure = next(
+                    (doc.metadata.get("error") or "Processing failed" for doc in documents
+                     if doc.metadata.get("extraction_status") in FAILED_STATUSES),
+                    None
+                )
+                if failure is None:
+                    output_path = output_root / f"{os.path.relpath(entry['path'], root)}.json"
+                    try:
+                        self._write_output(output_path, documents)
+                        entry["output"] = str(output_path)
+                        # The partial result is kept, the file is processed again on the next run
+                        if has_failures(documents):
+                            failure = "Image extraction failed for some images"
+                    except OSError as e:
+                        failure = f"Cannot write result: {str(e)}"
+                entry["status"] = IngestManifest.PROCESSED if failure is None else IngestManifest.FAILED
+                entry["error"] = failure
+                summary["processed" if failure is None else "failed"] += 1
+            self.manifest.record(root, batch)
+            logger.info(f"Ingested {batch_start + len(batch)}/{len(pending)} files from {root}")
+        
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+        return summary
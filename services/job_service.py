@@ -0,0 +1,213 @@
+from typing import List, Dict, Any, Optional, Callable
+import logging
+import queue
+import threading
+import time
+import uuid
+from langchain_core.documents import Document
+from config.settings import JOB_CONFIG
+from .document_service import DocumentService
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+    pass
+
+class Job:
+    """A batch of documents processed in the background"""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    
+    FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+    
+    def __init__(self, file_paths: List[str], on_finished: Optional[Callable[["Job"], None]] = None,
+                 mode: str = "full"):
+        """
+        Initialize job
+
+        Args:
+            file_paths: Paths of the documents to process
+            on_finished: Callback run once the job ends in any state (e.g. temp file cleanup)
+            mode: Processing mode, "full" or "text_only"
+        """
+        self.id = uuid.uuid4().hex
+        self.file_paths = file_paths
+        self.mode = mode
+        self.status = self.QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.processed_files = 0
+        self.results: Dict[str, List[Document]] = {}
+        self.error: Optional[str] = None
+        self.on_finished = on_finished
+        self.cancel_event = threading.Event()
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED_STATES
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status without results"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "total_files": len(self.file_paths),
+            "processed_files": self.processed_files,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+class JobManager:
+    """In-process worker pool running DocumentService jobs from a bounded queue"""
+    
+    def __init__(self, doc_service: Optional[DocumentService] = None, max_workers: Optional[int] = None,
+                 max_queue_size: Optional[int] = None, result_ttl: Optional[int] = None):
+        """
+        Initialize job manager
+
+        Args:
+            doc_service: Service used to process documents
+            max_workers: Number of worker threads (default: JOB_CONFIG["max_workers"])
+            max_queue_size: Jobs allowed to wait for a worker (default: JOB_CONFIG["max_queue_size"])
+            result_ttl: Seconds finished jobs are kept (default: JOB_CONFIG["result_ttl_seconds"])
+        """
+        self.doc_service = doc_service or DocumentService()
+        self.max_workers = max_workers or JOB_CONFIG["max_workers"]
+        self.result_ttl = JOB_CONFIG["result_ttl_seconds"] if result_ttl is None else result_ttl
+        self.queue: "queue.Queue[Job]" = queue.Queue(
+            maxsize=JOB_CONFIG["max_queue_size"] if max_queue_size is None else max_queue_size
+        )
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+    
+    def _ensure_workers(self):
+        """Start worker threads on first use"""
+        with self._lock:
+            if self._workers:
+                return
+            for idx in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{idx}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+    
+    def _prune_jobs(self):
+        """Forget finished jobs older than the result TTL"""
+        if not self.result_ttl:
+            return
+        expiry = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self.jobs.items()
+                           if job.finished and job.finished_at < expiry]:
+                del self.jobs[job_id]
+    
+    def submit(self, file_paths: List[str], on_finished: Optional[Callable[[Job], None]] = None,
+               mode: str = "full") -> Job:
+        """
+        Queue documents for background processing
+
+        Args:
+            file_paths: Paths of the documents to process
+            on_finished: Callback run once the job ends in any state
+            mode: Processing mode, "full" or "text_only"
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        self._ensure_workers()
+        self._prune_jobs()
+        
+        job = Job(file_paths, on_finished, mode)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            raise JobQueueFullError(f"Job queue is full ({self.queue.maxsize} jobs waiting)")
+        
+        with self._lock:
+            self.jobs[job.id] = job
+        logger.info(f"Queued job {job.id} with {len(file_paths)} files")
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return job by id, or None if unknown"""
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job
+
+        A queued job never starts. A running job stops before its next file;
+        the file currently being parsed is finished and discarded.
+
+        Returns:
+            Optional[Job]: The job, or None if unknown
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == Job.QUEUED:
+            # The worker that dequeues it will run the cleanup callback
+            job.status = Job.CANCELLED
+            job.finished_at = time.time()
+        logger.info(f"Cancellation requested for job {job_id}")
+        return job
+    
+    def _worker_loop(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run_job(job)
+            except Exception as e:
+                logger.error(f"Job {job.id} crashed: {str(e)}", exc_info=True)
+            finally:
+                self.queue.task_done()
+    
+    def _run_job(self, job: Job):
+        """Process a job's files one at a time so cancellation takes effect between files"""
+        try:
+            if job.cancel_event.is_set():
+                return
+            
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            logger.info(f"Starting job {job.id}")
+            
+            for file_path in job.file_paths:
+                if job.cancel_event.is_set():
+                    break
+                job.results.update(self.doc_service.process_documents([file_path], {"mode": job.mode}))
+                job.processed_files += 1
+            
+            if job.cancel_event.is_set():
+                job.status = Job.CANCELLED
+                job.results = {}
+            else:
+                job.status = Job.COMPLETED
+            logger.info(f"Job {job.id} {job.status}")
+        
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+            job.status = Job.FAILED
+            job.error = str(e)
+        
+        finally:
+            job.finished_at = job.finished_at or time.time()
+            if job.on_finished:
+                try:
+                    job.on_finished(job)
+                except Exception as e:
+                    logger.warning(f"Cleanup for job {job.id} failed: {str(e)}")
@@ -0,0 +1,460 @@
+from typing import Optional, Dict, Any, Iterator, List
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from langchain_core.documents import Document
+from loaders.base import BaseDocumentLoader
+from config.settings import RESULT_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def content_hash(loader: BaseDocumentLoader, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the document a loader reads, in memory or from disk"""
+    if loader.in_memory:
+        return hashlib.sha256(loader.data).hexdigest()
+    digest = hashlib.sha256()
+    with open(loader.file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+def serialize_documents(documents: List[Document]) -> str:
+    """Documents as a JSON array of page_content/metadata objects (tuples come back as lists, as in API responses)"""
+    return json.dumps(
+        [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+        ensure_ascii=False,
+        default=str
+    )
+
+def deserialize_documents(value: str) -> List[Document]:
+    """Inverse of serialize_documents"""
+    return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in json.loads(value)]
+
+class DocumentResultCache(ABC):
+    """Persistent cache of parsed documents
+    
+    An entry holds the serialized Document list of one file, keyed on the
+    hash of its content, the loader class and VERSION, and the processing
+    options that change the output (mode, loader configuration, vision
+    settings). Entries expire after ``ttl_seconds`` and the least recently
+    used ones are evicted once ``max_entries`` or ``max_bytes`` is exceeded.
+    Backends only store and evict serialized values.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None, enabled: Optional[bool] = None):
+        """
+        Initialize cache
+        
+        Args:
+            max_entries: Maximum number of cached documents, 0 for unlimited
+            max_bytes: Maximum total size of cached results, 0 for unlimited
+            ttl_seconds: Lifetime of an entry in seconds, 0 to never expire
+            enabled: Set to False to bypass the cache entirely
+        """
+        config = RESULT_CACHE_CONFIG
+        self.max_entries = config["max_entries"] if max_entries is None else max_entries
+        self.max_bytes = config["max_bytes"] if max_bytes is None else max_bytes
+        self.ttl_seconds = config["ttl_seconds"] if ttl_seconds is None else ttl_seconds
+        self.enabled = config["enabled"] if enabled is None else enabled
+        
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        
+        if self.enabled:
+            try:
+                self._init_storage()
+            except Exception as e:
+                # A broken cache must never break processing
+                logger.warning(f"Document result cache disabled, failed to open storage: {str(e)}")
+                self.enabled = False
+    
+    @staticmethod
+    def make_key(loader: BaseDocumentLoader) -> str:
+        """
+        Build cache key for the document a loader would parse
+        
+        Args:
+            loader: Loader created for the document
+        
+        Returns:
+            str: Hex digest identifying content, loader version and options
+        """
+        loader_class = type(loader)
+        digest = hashlib.sha256()
+        digest.update(content_hash(loader).encode("ascii"))
+        digest.update(json.dumps(
+            {
+                "loader": f"{loader_class.__module__}.{loader_class.__qualname__}",
+                "version": loader_class.VERSION,
+                "options": loader.cache_options()
+            },
+            sort_keys=True,
+            default=str
+        ).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[List[Document]]:
+        """Return cached documents for key marked with cache "hit" metadata, or None on miss"""
+        if not self.enabled:
+            return None
+        
+        try:
+            value = self._read(key, time.time())
+        except Exception as e:
+            logger.warning(f"Document result cache read failed: {str(e)}")
+            value = None
+        
+        with self._lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        
+        if value is None:
+            return None
+        documents = deserialize_documents(value)
+        for doc in documents:
+            doc.metadata["cache"] = "hit"
+        return documents
+    
+    def set(self, key: str, documents: List[Document]):
+        """Store documents for key and apply eviction"""
+        if not self.enabled:
+            return
+        
+        value = serialize_documents(documents)
+        now = time.time()
+        try:
+            self._write(key, value, now)
+            evicted = self._evict(now)
+            with self._lock:
+                self.writes += 1
+                self.evictions += evicted
+        except Exception as e:
+            logger.warning(f"Document result cache write failed: {str(e)}")
+    
+    def _over_limits(self, count: int, total: int) -> bool:
+        """Whether count entries of total bytes exceed max_entries or max_bytes"""
+        return bool((self.max_entries and count > self.max_entries) or
+                    (self.max_bytes and total > self.max_bytes))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        stats = {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": 0,
+            "bytes": 0
+        }
+        if self.enabled:
+            try:
+                stats["entries"], stats["bytes"] = self._usage()
+            except Exception as e:
+                logger.warning(f"Document result cache stats failed: {str(e)}")
+        return stats
+    
+    @abstractmethod
+    def _init_storage(self):
+        """Create the backing storage"""
+        pass
+    
+    @abstractmethod
+    def _read(self, key: str, now: float) -> Optional[str]:
+        """Return the serialized value of a live entry and mark it as used, or None"""
+        pass
+    
+    @abstractmethod
+    def _write(self, key: str, value: str, now: float):
+        """Store a serialized value"""
+        pass
+    
+    @abstractmethod
+    def _evict(self, now: float) -> int:
+        """Remove expired entries, then least recently used ones over the limits, return the count"""
+        pass
+    
+    @abstractmethod
+    def _usage(self) -> tuple:
+        """Number of entries and their total size in bytes"""
+        pass
+    
+    @abstractmethod
+    def clear(self):
+        """Remove all cached results"""
+        pass
+
+class SQLiteResultCache(DocumentResultCache):
+    """Document result cache in a single SQLite database file"""
+    
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        """
+        Initialize cache
+        
+        Args:
+            path: SQLite database file (default: RESULT_CACHE_CONFIG["path"])
+            **kwargs: Limits, see DocumentResultCache
+        """
+        self.path = Path(path or RESULT_CACHE_CONFIG["path"])
+        super().__init__(**kwargs)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (one per operation, safe across threads and processes)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _init_storage(self):
+        """Create database file and schema"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS document_results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_document_results_accessed ON document_results (accessed_at)"
+            )
+    
+    def _read(self, key: str, now: float) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM document_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM document_results WHERE key = ?", (key,))
+                return None
+            if row:
+                conn.execute("UPDATE document_results SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0] if row else None
+    
+    def _write(self, key: str, value: str, now: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO document_results (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now)
+            )
+    
+    def _evict(self, now: float) -> int:
+        with self._connect() as conn:
+            evicted = 0
+            if self.ttl_seconds:
+                evicted += conn.execute(
+                    "DELETE FROM document_results WHERE created_at < ?", (now - self.ttl_seconds,)
+                ).rowcount
+            
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM document_results"
+            ).fetchone()
+            if not self._over_limits(count, total):
+                return evicted
+            
+            # Walk entries from least to most recently used until within limits
+            stale_keys = []
+            for key, size in conn.execute("SELECT key, size FROM document_results ORDER BY accessed_at ASC"):
+                if not self._over_limits(count, total):
+                    break
+                stale_keys.append((key,))
+                count -= 1
+                total -= size
+            conn.executemany("DELETE FROM document_results WHERE key = ?", stale_keys)
+            return evicted + len(stale_keys)
+    
+    def _usage(self) -> tuple:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM document_results"
+            ).fetchone()
+    
+    def clear(self):
+        """Remove all cached results"""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM document_results")
+
+class DirectoryResultCache(DocumentResultCache):
+    """Document result cache with one JSON file per entry
+    
+    Files are written atomically (temp file + rename) and their modification
+    time is bumped on every hit, so it serves as the last access time for LRU
+    eviction. The creation time for the TTL is kept in the file itself.
+    
+    Listing the directory costs O(entries), so it is not done on every write:
+    the entry count and size are tracked from this process's writes and the
+    directory is only scanned (evicting as needed) when the tracked usage
+    exceeds the limits or every RESCAN_WRITES writes, which also picks up
+    entries written by other processes and those past their TTL.
+    """
+    
+    RESCAN_WRITES = 1000
+    
+    def __init__(self, directory: Optional[str] = None, **kwargs):
+        """
+        Initialize cache
+        
+        Args:
+            directory: Cache directory (default: RESULT_CACHE_CONFIG["directory"])
+            **kwargs: Limits, see DocumentResultCache
+        """
+        self.directory = Path(directory or RESULT_CACHE_CONFIG["directory"])
+        self._tracked_usage: Optional[tuple] = None  # (count, total bytes) since the last scan
+        self._writes_since_scan = 0
+        super().__init__(**kwargs)
+    
+    def _entry_path(self, key: str) -> Path:
+        """Entries are spread over 256 subdirectories by key prefix"""
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def _iter_entries(self) -> Iterator[os.DirEntry]:
+        """All entry files"""
+        with os.scandir(self.directory) as subdirs:
+            for subdir in subdirs:
+                if not subdir.is_dir():
+                    continue
+                with os.scandir(subdir.path) as entries:
+                    yield from (entry for entry in entries if entry.name.endswith(".json"))
+    
+    def _init_storage(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def _read(self, key: str, now: float) -> Optional[str]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        if self.ttl_seconds and now - entry["created_at"] > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path, (now, now))
+        return entry["value"]
+    
+    def _write(self, key: str, value: str, now: float):
+        path = self._entry_path(key)
+        path.parent.mkdir(exist_ok=True)
+        try:
+            previous_size = path.stat().st_size
+        except FileNotFoundError:
+            previous_size = None
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created_at": now, "value": value}, f, ensure_ascii=False)
+                f.flush()
+                size = os.fstat(f.fileno()).st_size
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        
+        with self._lock:
+            self._writes_since_scan += 1
+            if self._tracked_usage is not None:
+                count, total = self._tracked_usage
+                self._tracked_usage = (count + (previous_size is None), total + size - (previous_size or 0))
+    
+    def _evict(self, now: float) -> int:
+        with self._lock:
+            if self._tracked_usage is not None and self._writes_since_scan < self.RESCAN_WRITES \
+                    and not self._over_limits(*self._tracked_usage):
+                return 0
+        
+        entries = []
+        for entry in self._iter_entries():
+            try:
+                stat_result = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+        
+        evicted = 0
+        count = len(entries)
+        total = sum(size for _, size, _ in entries)
+        if self.ttl_seconds:
+            # The last access is never before creation, so entries unused for the whole
+            # TTL have expired; older entries that were used recently expire on read
+            for accessed_at, size, path in entries:
+                if accessed_at < now - self.ttl_seconds:
+                    Path(path).unlink(missing_ok=True)
+                    evicted += 1
+                    count -= 1
+                    total -= size
+            entries = [entry for entry in entries if entry[0] >= now - self.ttl_seconds]
+        
+        # Remove entries from least to most recently used until within limits
+        if self._over_limits(count, total):
+            for _, size, path in sorted(entries):
+                if not self._over_limits(count, total):
+                    break
+                Path(path).unlink(missing_ok=True)
+                evicted += 1
+                count -= 1
+                total -= size
+        
+        with self._lock:
+            self._tracked_usage = (count, total)
+            self._writes_since_scan = 0
+        return evicted
+    
+    def _usage(self) -> tuple:
+        count = total = 0
+        for entry in self._iter_entries():
+            count += 1
+            total += entry.stat().st_size
+        return count, total
+    
+    def clear(self):
+        """Remove all cached results"""
+        if not self.enabled:
+            return
+        for entry in list(self._iter_entries()):
+            Path(entry.path).unlink(missing_ok=True)
+        with self._lock:
+            self._tracked_usage = (0, 0)
+            self._writes_since_scan = 0
+
+RESULT_CACHE_BACKENDS = {
+    "sqlite": SQLiteResultCache,
+    "directory": DirectoryResultCache,
+}
+
+_default_cache: Optional[DocumentResultCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_result_cache() -> DocumentResultCache:
+    """Return the process-wide cache of the configured backend"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            backend = RESULT_CACHE_CONFIG["backend"]
+            if backend not in RESULT_CACHE_BACKENDS:
+                raise ValueError(f"Unsupported result cache backend: {backend}")
+            _default_cache = RESULT_CACHE_BACKENDS[backend]()
+        return _default_cache
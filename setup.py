@@ -12,8 +12,8 @@ setup(
         "aiofiles",
         "requests",
         "PyMuPDF",
-        "python-docx",
-        "python-pptx",
+        "python-docx>=1.0.0",
+        "python-pptx>=1.0.0",
         "pandas",
         "openpyxl",
         "pyyaml",
@@ -0,0 +1,38 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+import api.app as app_module
+from services.document_service import DocumentService
+from services.result_cache import SQLiteResultCache
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    service = DocumentService(result_cache=SQLiteResultCache(str(tmp_path / "results.db"), enabled=False))
+    monkeypatch.setattr(app_module, "doc_service", service)
+    return TestClient(app_module.app)
+
+def _uploads():
+    return [
+        ("files", ("report.txt", b"first upload\n", "text/plain")),
+        ("files", ("report.txt", b"second upload\n", "text/plain")),
+        ("files", ("notes.txt", b"notes\n", "text/plain"))
+    ]
+
+def test_result_names_are_unique_in_upload_order():
+    names = app_module._result_names(["/t/1/report.pdf", "/t/2/report.pdf", "/t/3/report (2).pdf", "/t/4/a"])
+    assert list(names.values()) == ["report.pdf", "report (2).pdf", "report (2) (2).pdf", "a"]
+
+def test_duplicate_upload_names_keep_every_result(client):
+    response = client.post("/process", files=_uploads(), data={"mode": "text_only"})
+    
+    assert response.status_code == 200
+    results = response.json()
+    assert list(results) == ["report.txt", "report (2).txt", "notes.txt"]
+    assert "first upload" in results["report.txt"][0]["content"]
+    assert "second upload" in results["report (2).txt"][0]["content"]
+
+def test_stream_records_use_the_same_names(client):
+    response = client.post("/process/stream", files=_uploads(), data={"mode": "text_only"})
+    
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["file"] for record in records] == ["report.txt", "report (2).txt", "notes.txt"]
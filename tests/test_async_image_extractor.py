@@ -0,0 +1,199 @@
+import asyncio
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from PIL import Image
+from processors.async_image_extractor import AsyncExtractorRunner, AsyncImageExtractor, TokenBucket
+from processors.image_extractor import ImageExtractor
+from processors.vision_cache import VisionCache
+
+class StubAPI(ThreadingHTTPServer):
+    """Chat completions endpoint answering with scripted (status, headers, delay) responses"""
+    
+    daemon_threads = True
+    
+    def __init__(self, script):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.script = list(script)
+        self.requests = []
+    
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+class StubHandler(BaseHTTPRequestHandler):
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, time.monotonic()))
+        status, headers, delay = self.server.script.pop(0) if self.server.script else (200, {}, 0)
+        time.sleep(delay)
+        if status == 200:
+            body = {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": f"described {len(self.server.requests)}"}}],
+                "usage": {"prompt_tokens": 8, "completion_tokens": 2, "total_tokens": 10}
+            }
+        else:
+            body = {"error": {"message": f"stub status {status}", "type": "stub"}}
+        payload = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            for name, value in {"Content-Type": "application/json", **headers}.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client timed out and closed the connection
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_api():
+    servers = []
+    
+    def start(*script):
+        server = StubAPI(script)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def _png(color=(200, 30, 30)) -> io.BytesIO:
+    output = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(output, format="PNG")
+    return io.BytesIO(output.getvalue())
+
+def _extract(server, image=None, **kwargs):
+    options = {"max_retries": 3, "backoff_base": 0.01, "backoff_max": 1.0, "timeout": 5.0,
+               "requests_per_minute": 0, "tokens_per_minute": 0, **kwargs}
+    
+    async def run():
+        extractor = AsyncImageExtractor(api_key="test", base_url=server.base_url, use_cache=False, **options)
+        try:
+            return await extractor.extract_info(image or _png())
+        finally:
+            await extractor.aclose()
+    
+    return asyncio.run(run())
+
+def test_rate_limit_waits_for_retry_after(stub_api):
+    server = stub_api((429, {"Retry-After": "0.5"}, 0), (200, {}, 0))
+    
+    result = _extract(server)
+    
+    assert result == {"status": "success", "content": "described 2"}
+    assert server.requests[0][0] == "/v1/chat/completions"
+    assert server.requests[1][1] - server.requests[0][1] >= 0.45
+
+def test_server_errors_are_retried(stub_api):
+    server = stub_api((500, {}, 0), (503, {}, 0), (200, {}, 0))
+    
+    assert _extract(server)["status"] == "success"
+    assert len(server.requests) == 3
+
+def test_gives_up_after_max_retries(stub_api):
+    server = stub_api(*[(503, {}, 0)] * 5)
+    
+    result = _extract(server, max_retries=2)
+    
+    assert result["status"] == "error"
+    assert len(server.requests) == 3
+
+def test_client_errors_are_not_retried(stub_api):
+    server = stub_api((400, {}, 0), (200, {}, 0))
+    
+    assert _extract(server)["status"] == "error"
+    assert len(server.requests) == 1
+
+def test_slow_calls_time_out_and_are_retried(stub_api):
+    server = stub_api((200, {}, 2.0), (200, {}, 0))
+    
+    started = time.monotonic()
+    result = _extract(server, timeout=0.3)
+    
+    assert result == {"status": "success", "content": "described 2"}
+    assert time.monotonic() - started < 1.5
+
+def test_timeout_without_retries_is_an_error(stub_api):
+    server = stub_api((200, {}, 2.0))
+    
+    started = time.monotonic()
+    result = _extract(server, timeout=0.3, max_retries=0)
+    
+    assert result["status"] == "error"
+    assert time.monotonic() - started < 1.5
+
+def test_token_bucket_limits_the_rate():
+    async def run():
+        bucket = TokenBucket(120)  # 2 tokens per second
+        started = time.monotonic()
+        for _ in range(120):
+            await bucket.acquire()
+        burst = time.monotonic() - started
+        await bucket.acquire(1)
+        await bucket.acquire(1)
+        return burst, time.monotonic() - started
+    
+    burst, total = asyncio.run(run())
+    
+    assert burst < 0.1
+    assert 0.9 <= total < 1.5
+
+def test_token_bucket_refunds_and_caps_requests():
+    async def run():
+        bucket = TokenBucket(60)
+        await bucket.acquire(1000)  # Larger than the bucket, served as a full bucket
+        drained = bucket.tokens
+        bucket.refund(30)
+        return drained, bucket.tokens
+    
+    drained, refunded = asyncio.run(run())
+    
+    assert drained < 1
+    assert 30 <= refunded < 31
+    assert TokenBucket(0).capacity == 0
+
+def test_unused_token_reservation_is_refunded(stub_api):
+    server = stub_api((200, {}, 0))
+    
+    async def run():
+        extractor = AsyncImageExtractor(api_key="test", base_url=server.base_url, use_cache=False,
+                                        requests_per_minute=0, tokens_per_minute=100000)
+        try:
+            await extractor.extract_info(_png())
+            return extractor.token_bucket.tokens
+        finally:
+            await extractor.aclose()
+    
+    # The stub reports 10 tokens used, the estimate reserved up front includes 1000 completion tokens
+    assert asyncio.run(run()) > 100000 - 100
+
+def test_image_extractor_sends_batches_through_the_runner(stub_api, tmp_path):
+    server = stub_api((429, {"Retry-After": "0.1"}, 0))
+    runner = AsyncExtractorRunner(api_key="test", base_url=server.base_url, use_cache=False, max_retries=2,
+                                  backoff_base=0.01, requests_per_minute=0, tokens_per_minute=0)
+    try:
+        extractor = ImageExtractor(api_key="test", cache=VisionCache(str(tmp_path / "vision.db")), async_runner=runner)
+        red, blue = _png(), _png((30, 30, 200))
+        
+        first = extractor.extract_many([red, blue, _png()])
+        second = extractor.extract_many([red, blue])
+    finally:
+        runner.close()
+    
+    assert [result["status"] for result in first] == ["success"] * 3
+    assert first[0] == first[2]
+    assert second == first[:2]
+    # One throttled call, one retry and the second image, the repeat and the second batch come from the cache
+    assert len(server.requests) == 3
@@ -0,0 +1,67 @@
+import os
+import time
+import pytest
+from services import document_service
+from services.document_service import DocumentService
+from services.result_cache import SQLiteResultCache
+
+@pytest.fixture
+def misbehaving_files(tmp_path, monkeypatch):
+    """Workers exit on crash.txt, hang on hang.txt and raise on broken.txt"""
+    cache = SQLiteResultCache(str(tmp_path / "results.db"), enabled=False)
+    monkeypatch.setattr(document_service, "get_result_cache", lambda: cache)
+    process_document = DocumentService.process_document
+    
+    def misbehave(self, file_path, mode="full", *args, **kwargs):
+        name = os.path.basename(file_path)
+        if name == "crash.txt":
+            os._exit(3)
+        if name == "hang.txt":
+            time.sleep(60)
+        if name == "broken.txt":
+            raise RuntimeError("parser exploded")
+        return process_document(self, file_path, mode, *args, **kwargs)
+    
+    # Worker processes are forked, so they inherit the patched method
+    monkeypatch.setattr(DocumentService, "process_document", misbehave)
+    
+    paths = {}
+    for name in ("a.txt", "crash.txt", "b.txt", "hang.txt", "broken.txt", "c.txt"):
+        paths[name] = tmp_path / name
+        paths[name].write_text(f"content of {name}\n", encoding="utf-8")
+    return {name: str(path) for name, path in paths.items()}
+
+def test_bad_files_do_not_take_down_the_batch(misbehaving_files):
+    file_paths = list(misbehaving_files.values())
+    config = {"execution_mode": "process", "mode": "text_only", "max_workers": 2, "file_timeout": 2,
+              "start_method": "fork"}
+    
+    started = time.monotonic()
+    results = DocumentService().process_documents(file_paths, config)
+    
+    assert time.monotonic() - started < 20
+    assert list(results) == file_paths
+    for name in ("a.txt", "b.txt", "c.txt"):
+        documents = results[misbehaving_files[name]]
+        assert [doc.page_content for doc in documents] == [f"content of {name}\n"]
+        assert "extraction_status" not in documents[0].metadata
+    
+    failures = {name: results[misbehaving_files[name]] for name in ("crash.txt", "hang.txt", "broken.txt")}
+    for name, documents in failures.items():
+        assert len(documents) == 1
+        assert documents[0].metadata["source"] == misbehaving_files[name]
+        assert documents[0].metadata["extraction_status"] == "failed"
+    assert failures["crash.txt"][0].metadata["error"] == "Worker process crashed (exit code 3)"
+    assert failures["hang.txt"][0].metadata["error"] == "Processing timed out after 2s"
+    assert failures["broken.txt"][0].metadata["error"] == "parser exploded"
+
+def test_process_mode_returns_the_serial_result_shape(misbehaving_files):
+    file_paths = [misbehaving_files["a.txt"], misbehaving_files["b.txt"]]
+    config = {"mode": "text_only", "max_workers": 2, "file_timeout": 0, "start_method": "fork"}
+    
+    serial = DocumentService().process_documents(file_paths, {**config, "execution_mode": "serial"})
+    in_processes = DocumentService().process_documents(file_paths, {**config, "execution_mode": "process"})
+    
+    assert list(in_processes) == list(serial) == file_paths
+    assert {path: [(doc.page_content, doc.metadata) for doc in documents] for path, documents in in_processes.items()} == \
+        {path: [(doc.page_content, doc.metadata) for doc in documents] for path, documents in serial.items()}
@@ -0,0 +1,54 @@
+from openpyxl import Workbook
+from loaders.excel_loader import ExcelLoader
+
+def _write_workbook(path, sheets):
+    """One sheet per (title, rows), the first row is the header"""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets:
+        worksheet = workbook.create_sheet(title)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(str(path))
+
+def _sales_rows(count):
+    return [["region", "units", "price"]] + [[f"region {index}", index, index + 0.5] for index in range(1, count + 1)]
+
+def test_numeric_sheet_rows_are_upcast_like_iterrows(tmp_path):
+    _write_workbook(tmp_path / "numbers.xlsx", [("Numbers", [["units", "price"], [1, 1.5], [2, 2.5]])])
+    
+    documents = ExcelLoader(str(tmp_path / "numbers.xlsx")).load()
+    
+    assert documents[0].page_content.splitlines()[-2:] == ["1.0 | 1.5", "2.0 | 2.5"]
+
+def test_rows_per_document_repeats_the_header(tmp_path):
+    _write_workbook(tmp_path / "sales.xlsx", [("North", _sales_rows(5)), ("South", _sales_rows(2))])
+    
+    documents = ExcelLoader(str(tmp_path / "sales.xlsx"), config={"rows_per_document": 2}).load()
+    
+    assert [(doc.metadata["sheet"], doc.metadata["row_range"]) for doc in documents] == [
+        ("North", [1, 2]), ("North", [3, 4]), ("North", [5, 5]), ("South", [1, 2])
+    ]
+    for doc in documents:
+        lines = doc.page_content.splitlines()
+        assert lines[1:4] == [f"=== Sheet: {doc.metadata['sheet']} ===", "", "region | units | price"]
+        assert doc.metadata["columns"] == 3
+    assert documents[2].page_content.splitlines()[-1] == "region 5 | 5 | 5.5"
+
+def test_streaming_matches_the_pandas_path(tmp_path):
+    _write_workbook(tmp_path / "sales.xlsx", [("North", _sales_rows(7)), ("South", _sales_rows(3))])
+    
+    chunked = ExcelLoader(str(tmp_path / "sales.xlsx"), config={"rows_per_document": 3}).load()
+    streamed = ExcelLoader(str(tmp_path / "sales.xlsx"), config={"rows_per_document": 3, "streaming": True}).load()
+    
+    assert len(streamed) == 4
+    assert [(doc.page_content, doc.metadata) for doc in streamed] == [(doc.page_content, doc.metadata) for doc in chunked]
+
+def test_streaming_without_rows_per_document_uses_streaming_chunk_size(tmp_path):
+    _write_workbook(tmp_path / "sales.xlsx", [("North", _sales_rows(5))])
+    
+    documents = ExcelLoader(
+        str(tmp_path / "sales.xlsx"), config={"streaming": True, "streaming_rows_per_document": 4}
+    ).load()
+    
+    assert [doc.metadata["row_range"] for doc in documents] == [[1, 4], [5, 5]]
@@ -0,0 +1,36 @@
+import io
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from processors.image_dedup import ImageDeduplicator
+
+def _text_image(text: str, scale: float = 1.0, image_format: str = "PNG") -> bytes:
+    image = Image.new("RGB", (800, 200), "white")
+    ImageDraw.Draw(image).text((20, 80), text, fill="black", font=ImageFont.load_default(size=40))
+    if scale != 1.0:
+        image = image.resize((int(800 * scale), int(200 * scale)), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue()
+
+Q3 = "Total revenue: $12,400,000 in Q3 2024"
+Q4 = "Total revenue: $19,800,000 in Q4 2024"
+
+def test_identical_images_share_a_result():
+    image = _text_image(Q3)
+    assert ImageDeduplicator().group([image, _text_image(Q4), image, None]) == [0, 1, 0, 3]
+
+def test_text_images_with_different_figures_are_not_merged_by_default():
+    assert ImageDeduplicator().group([_text_image(Q3), _text_image(Q4)]) == [0, 1]
+
+def test_near_duplicate_matching_resolves_text():
+    deduplicator = ImageDeduplicator({"max_distance": 6})
+    rescaled_copy = _text_image(Q3, scale=0.9, image_format="JPEG")
+    assert deduplicator.group([_text_image(Q3), _text_image(Q4), rescaled_copy]) == [0, 1, 0]
+
+def test_near_duplicate_matching_rejects_coarse_hashes():
+    with pytest.raises(ValueError):
+        ImageDeduplicator({"max_distance": 3, "hash_size": 8})
+
+def test_disabled_deduplicator_keeps_every_image():
+    image = _text_image(Q3)
+    assert ImageDeduplicator({"enabled": False}).group([image, image]) == [0, 1]
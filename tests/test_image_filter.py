@@ -0,0 +1,41 @@
+import io
+from PIL import Image, ImageDraw, ImageFont
+from processors.image_filter import ImageFilter
+
+def _encode(image: Image.Image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def _text_image(text: str, size=(800, 200), font_size: int = 40) -> bytes:
+    image = Image.new("RGB", size, "white")
+    ImageDraw.Draw(image).text((20, size[1] // 2 - font_size // 2), text, fill="black",
+                               font=ImageFont.load_default(size=font_size))
+    return _encode(image)
+
+def test_text_images_are_kept():
+    image_filter = ImageFilter({"enabled": True})
+    assert image_filter.check_image(_text_image("Total revenue: $12,400,000 in Q3 2024")) is None
+    assert image_filter.check_image(_text_image("Approved - J. Smith", size=(1200, 300), font_size=30)) is None
+
+def test_blank_image_is_skipped():
+    reason = ImageFilter({"enabled": True}).check_image(_encode(Image.new("RGB", (400, 300), "white")))
+    assert reason.startswith("blank")
+
+def test_transparent_image_counts_as_blank():
+    reason = ImageFilter({"enabled": True}).check_image(_encode(Image.new("RGBA", (400, 300), (0, 0, 0, 0))))
+    assert reason.startswith("blank")
+
+def test_small_and_separator_images_are_skipped():
+    image_filter = ImageFilter({"enabled": True})
+    assert image_filter.check_dimensions(16, 400).startswith("too_small")
+    assert image_filter.check_dimensions(2000, 40).startswith("separator")
+    assert image_filter.check_dimensions(800, 200) is None
+
+def test_small_on_page_is_skipped():
+    image_filter = ImageFilter({"enabled": True})
+    assert image_filter.check_page_area((0, 0, 10, 10), (0, 0, 612, 792)).startswith("small_on_page")
+    assert image_filter.check_page_area((0, 0, 300, 200), (0, 0, 612, 792)) is None
+
+def test_disabled_filter_keeps_every_image():
+    assert ImageFilter({"enabled": False}).check_image(_encode(Image.new("RGB", (400, 300), "white"))) is None
@@ -0,0 +1,105 @@
+import json
+import os
+from langchain_core.documents import Document
+from services.ingest_service import DirectoryIngestor, IngestManifest
+
+class FakeDocumentService:
+    """Returns one Document per file, images listed in `image_errors` fail"""
+    
+    def __init__(self):
+        self.processed = []
+        self.image_errors = set()
+    
+    def process_documents(self, file_paths, config=None):
+        self.processed.extend(file_paths)
+        results = {}
+        for file_path in file_paths:
+            image = {"extraction_status": "success"}
+            if os.path.basename(file_path) in self.image_errors:
+                image = {"extraction_status": "error", "error": "429"}
+            with open(file_path, encoding="utf-8") as f:
+                content = f.read()
+            results[file_path] = [Document(page_content=content, metadata={"source": file_path, "images": [image]})]
+        return results
+
+def _ingestor(tmp_path):
+    service = FakeDocumentService()
+    ingestor = DirectoryIngestor(
+        IngestManifest(str(tmp_path / "manifest.db")),
+        service,
+        config={"output_dir": str(tmp_path / "out"), "execution_mode": "serial", "scan_workers": 2}
+    )
+    return ingestor, service
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+def test_unchanged_files_are_skipped_and_deletions_recorded(tmp_path):
+    root = tmp_path / "docs"
+    _write(root / "a.txt", "alpha")
+    _write(root / "sub" / "b.md", "beta")
+    _write(root / "ignored.bin", "binary")
+    ingestor, service = _ingestor(tmp_path)
+    
+    first = ingestor.ingest(str(root), mode="text_only")
+    assert (first["new"], first["processed"]) == (2, 2)
+    
+    service.processed.clear()
+    second = ingestor.ingest(str(root), mode="text_only")
+    assert (second["unchanged"], second["processed"]) == (2, 0)
+    assert service.processed == []
+    
+    _write(root / "a.txt", "alpha, revised")
+    (root / "sub" / "b.md").unlink()
+    third = ingestor.ingest(str(root), mode="text_only")
+    assert (third["changed"], third["deleted"]) == (1, 1)
+    entries = ingestor.manifest.get_files(str(root))
+    assert entries[str(root / "sub" / "b.md")]["status"] == IngestManifest.DELETED
+    output = entries[str(root / "a.txt")]["output"]
+    assert json.loads(open(output, encoding="utf-8").read())[0]["page_content"] == "alpha, revised"
+
+def test_image_failures_are_retried(tmp_path):
+    root = tmp_path / "docs"
+    _write(root / "scan.txt", "scan")
+    ingestor, service = _ingestor(tmp_path)
+    service.image_errors.add("scan.txt")
+    
+    first = ingestor.ingest(str(root))
+    assert first["failed"] == 1
+    assert ingestor.manifest.get_files(str(root))[str(root / "scan.txt")]["status"] == IngestManifest.FAILED
+    
+    service.image_errors.clear()
+    second = ingestor.ingest(str(root))
+    assert (second["unchanged"], second["processed"]) == (0, 1)
+
+def test_directories_with_the_same_name_do_not_share_results(tmp_path):
+    first_root = tmp_path / "a" / "docs"
+    second_root = tmp_path / "b" / "docs"
+    _write(first_root / "report.txt", "first")
+    _write(second_root / "report.txt", "second")
+    ingestor, _ = _ingestor(tmp_path)
+    
+    ingestor.ingest(str(first_root))
+    ingestor.ingest(str(second_root))
+    (second_root / "report.txt").unlink()
+    ingestor.ingest(str(second_root))
+    
+    assert ingestor.default_output_dir(str(first_root)) != ingestor.default_output_dir(str(second_root))
+    output = ingestor.manifest.get_files(str(first_root))[str(first_root / "report.txt")]["output"]
+    assert json.loads(open(output, encoding="utf-8").read())[0]["page_content"] == "first"
+
+def test_touched_files_are_not_processed_again(tmp_path):
+    root = tmp_path / "docs"
+    _write(root / "a.txt", "alpha")
+    ingestor, service = _ingestor(tmp_path)
+    ingestor.ingest(str(root))
+    
+    stat_result = os.stat(root / "a.txt")
+    os.utime(root / "a.txt", ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10 ** 9))
+    service.processed.clear()
+    summary = ingestor.ingest(str(root))
+    
+    assert (summary["touched"], summary["processed"]) == (1, 0)
+    assert service.processed == []
+    assert ingestor.ingest(str(root))["unchanged"] == 1
@@ -0,0 +1,111 @@
+import hashlib
+import io
+import random
+import fitz
+from PIL import Image
+from config.settings import PDF_LOADER_CONFIG
+from loaders.pdf_loader import PDFLoader
+from loaders.unit_store import UnitResultStore
+
+def _png(color) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(output, format="PNG")
+    return output.getvalue()
+
+def _write_mixed_font_pdf(path, pages=2):
+    """Pages with bold and italic spans inside lines, an image and a footer"""
+    pdf_doc = fitz.open()
+    for page_num in range(pages):
+        page = pdf_doc.new_page()
+        page.insert_htmlbox(
+            fitz.Rect(40, 40, 550, 200),
+            f"<p>Hello <b>World</b> again, page {page_num}.</p><p>Second paragraph with <i>italic</i> words.</p>"
+        )
+        page.insert_image(fitz.Rect(72, 300, 272, 500), stream=_png((200, 0, 0)))
+        page.insert_text((72, 600), "Footer line")
+    pdf_doc.save(str(path))
+    pdf_doc.close()
+
+def _load(path, monkeypatch, layout_mode):
+    monkeypatch.setitem(PDF_LOADER_CONFIG, "layout_mode", layout_mode)
+    return PDFLoader(str(path), mode="text_only").load()
+
+def test_dict_layout_is_the_default():
+    assert PDF_LOADER_CONFIG["layout_mode"] == "dict"
+
+def test_layout_modes_differ_only_in_span_spacing(tmp_path, monkeypatch):
+    _write_mixed_font_pdf(tmp_path / "mixed.pdf")
+    
+    by_dict = _load(tmp_path / "mixed.pdf", monkeypatch, "dict")
+    by_blocks = _load(tmp_path / "mixed.pdf", monkeypatch, "blocks")
+    
+    # dict joins spans with a space after their own trailing space
+    assert by_dict[0].page_content.splitlines()[0] == "Hello  World  again, page 0."
+    assert by_blocks[0].page_content.splitlines()[0] == "Hello World again, page 0."
+    assert len(by_dict) == len(by_blocks) == 2
+    for dict_doc, blocks_doc in zip(by_dict, by_blocks):
+        assert dict_doc.page_content.split() == blocks_doc.page_content.split()
+        assert dict_doc.page_content.count("\n") == blocks_doc.page_content.count("\n")
+        assert [image["bbox"] for image in dict_doc.metadata["images"]] == \
+            [image["bbox"] for image in blocks_doc.metadata["images"]]
+    assert '<image id="002" status="unprocessed"/>' in by_blocks[1].page_content
+
+class FakeExtractor:
+    """Vision extractor stand-in, describes an image by its content hash"""
+    
+    max_concurrency = 2
+    
+    def extract_many(self, image_inputs):
+        return [
+            {"status": "success", "content": f"image {hashlib.sha256(image.getvalue()).hexdigest()[:8]}"}
+            for image in image_inputs
+        ]
+
+def _noise_png(seed: int) -> bytes:
+    rng = random.Random(seed)
+    image = Image.frombytes("L", (64, 64), bytes(rng.randrange(256) for _ in range(64 * 64)))
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="PNG")
+    return output.getvalue()
+
+def _write_image_pdf(path, pages=9):
+    """Pages with 0, 1 or 2 images, the first image repeats on the last page"""
+    pdf_doc = fitz.open()
+    for page_num in range(pages):
+        page = pdf_doc.new_page()
+        page.insert_text((72, 72), f"Page {page_num} heading")
+        for slot in range(page_num % 3):
+            seed = 0 if page_num == pages - 1 and slot == 0 else page_num * 10 + slot
+            page.insert_image(fitz.Rect(72, 100 + slot * 220, 272, 300 + slot * 220), stream=_noise_png(seed))
+        page.insert_text((72, 760), f"Page {page_num} footer")
+    pdf_doc.save(str(path))
+    pdf_doc.close()
+
+def _load_full(path, tmp_path, name):
+    loader = PDFLoader(str(path))
+    loader.unit_store = UnitResultStore(str(tmp_path / f"{name}.db"))
+    loader.image_extractor = FakeExtractor()
+    return loader.load()
+
+def test_sharded_parsing_matches_the_serial_path(tmp_path, monkeypatch):
+    _write_image_pdf(tmp_path / "report.pdf")
+    monkeypatch.setitem(PDF_LOADER_CONFIG, "min_pages_per_shard", 2)
+    shard_runs = []
+    collect_sharded = PDFLoader._collect_pages_sharded
+    
+    def spy(self, total_pages, workers):
+        shard_runs.append((total_pages, workers))
+        return collect_sharded(self, total_pages, workers)
+    
+    monkeypatch.setattr(PDFLoader, "_collect_pages_sharded", spy)
+    
+    monkeypatch.setitem(PDF_LOADER_CONFIG, "shard_workers", 0)
+    serial = _load_full(tmp_path / "report.pdf", tmp_path, "serial")
+    monkeypatch.setitem(PDF_LOADER_CONFIG, "shard_workers", 3)
+    sharded = _load_full(tmp_path / "report.pdf", tmp_path, "sharded")
+    
+    assert shard_runs == [(9, 3)]
+    assert [(doc.page_content, doc.metadata) for doc in sharded] == [(doc.page_content, doc.metadata) for doc in serial]
+    image_ids = [line for doc in serial for line in doc.page_content.splitlines() if line.startswith("<image")]
+    assert image_ids == [f'<image id="{index:03d}">' for index in range(1, 10)]
+    assert sum(len(doc.metadata["images"]) for doc in sharded) == 9
@@ -0,0 +1,37 @@
+from pptx import Presentation
+from pptx.util import Inches
+from loaders.ppt_loader import PPTLoader
+
+def _deck() -> Presentation:
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Quarterly results"
+    text_frame = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(4), Inches(1)).text_frame
+    text_frame.text = "Revenue up\vMargin flat"
+    text_frame.add_paragraph().text = "Outlook: stable"
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(3), Inches(4), Inches(1)).table
+    for row, values in enumerate((("Region", "Sales"), ("EMEA", "12.4"))):
+        for col, value in enumerate(values):
+            table.cell(row, col).text = value
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(Inches(6), Inches(1), Inches(2), Inches(1)).text_frame.text = "Grouped note"
+    prs.slides.add_slide(prs.slide_layouts[6])
+    return prs
+
+def test_slide_xml_matches_python_pptx_shapes():
+    prs = _deck()
+    loader = PPTLoader("unused.pptx", mode="text_only")
+    loader.image_map = loader._extract_images(prs)
+    
+    for number, slide in enumerate(prs.slides, 1):
+        assert loader._process_slide_xml(slide, number) == loader._process_slide(slide, number)
+
+def test_slide_xml_renders_text_tables_and_groups():
+    prs = _deck()
+    loader = PPTLoader("unused.pptx", mode="text_only")
+    loader.image_map = loader._extract_images(prs)
+    
+    content = loader._process_slide_xml(prs.slides[0], 1)
+    
+    for text in ("Quarterly results", "Revenue up", "Outlook: stable", "EMEA", "12.4", "Grouped note"):
+        assert text in content
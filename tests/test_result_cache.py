@@ -0,0 +1,53 @@
+from langchain_core.documents import Document
+from services.document_service import DocumentService
+from services.result_cache import SQLiteResultCache, DirectoryResultCache
+
+def _service(tmp_path) -> DocumentService:
+    return DocumentService(result_cache=SQLiteResultCache(str(tmp_path / "results.db"), enabled=True))
+
+def test_cache_hit_reports_the_current_path(tmp_path):
+    first = tmp_path / "upload_1" / "report.txt"
+    second = tmp_path / "archive" / "copy of report.txt"
+    for path in (first, second):
+        path.parent.mkdir()
+        path.write_text("same content\n", encoding="utf-8")
+    service = _service(tmp_path)
+    
+    service.process_document(str(first), "text_only")
+    documents = service.process_document(str(second), "text_only", document_id="archive-report")
+    
+    assert documents[0].metadata["cache"] == "hit"
+    assert documents[0].metadata["source"] == str(second)
+    assert documents[0].metadata["file_name"] == "copy of report.txt"
+    assert documents[0].metadata["document_id"] == "archive-report"
+
+def test_cache_hit_drops_the_document_id_of_the_cached_call(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("notes\n", encoding="utf-8")
+    service = _service(tmp_path)
+    
+    service.process_document(str(path), "text_only", document_id="first")
+    documents = service.process_document(str(path), "text_only")
+    
+    assert documents[0].metadata["cache"] == "hit"
+    assert "document_id" not in documents[0].metadata
+
+def test_directory_cache_evicts_least_recently_used(tmp_path):
+    cache = DirectoryResultCache(str(tmp_path / "results"), max_entries=3, max_bytes=0, ttl_seconds=0, enabled=True)
+    for index in range(5):
+        cache.set(f"{index:02d}" + "0" * 62, [Document(page_content=f"document {index}")])
+    
+    assert cache._usage()[0] == 3
+    assert cache.get("00" + "0" * 62) is None
+    assert cache.get("04" + "0" * 62)[0].page_content == "document 4"
+
+def test_directory_cache_does_not_scan_on_every_write(tmp_path, monkeypatch):
+    cache = DirectoryResultCache(str(tmp_path / "results"), max_entries=1000, max_bytes=0, ttl_seconds=0, enabled=True)
+    scans = []
+    iter_entries = cache._iter_entries
+    monkeypatch.setattr(cache, "_iter_entries", lambda: scans.append(1) or iter_entries())
+    
+    for index in range(50):
+        cache.set(f"{index:02d}" + "0" * 62, [Document(page_content=f"document {index}")])
+    
+    assert len(scans) == 1
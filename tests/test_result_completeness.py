@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+from loaders.base import has_failures
+from services.document_service import DocumentService
+
+def _document(**metadata) -> Document:
+    return Document(page_content="text", metadata=metadata)
+
+def test_complete_documents_are_cached():
+    documents = [
+        _document(images=[{"extraction_status": "success"}, {"extraction_status": "skipped"}]),
+        _document(images=[{"status": "unprocessed"}]),
+        _document()
+    ]
+    assert DocumentService._is_complete(documents)
+
+def test_failed_document_is_not_complete():
+    assert not DocumentService._is_complete([_document(extraction_status="failed", error="boom")])
+
+def test_vision_error_status_is_not_complete():
+    # Rate-limited or timed-out vision calls are reported as "error" by the extractor
+    assert not DocumentService._is_complete([_document(images=[{"extraction_status": "error", "error": "429"}])])
+
+def test_failed_image_status_is_not_complete():
+    assert not DocumentService._is_complete([_document(images=[{"status": "failed", "error": "timeout"}])])
+
+def test_image_with_error_key_is_not_complete():
+    assert not DocumentService._is_complete([_document(images=[{"bbox": (0, 0, 1, 1), "error": "render failed"}])])
+
+def test_has_failures_ignores_non_dict_images():
+    assert not has_failures([_document(images=["001"])])
@@ -0,0 +1,112 @@
+import csv
+import io
+import os
+from loaders.log_checkpoint import LogCheckpointStore
+from loaders.text_loader import TextLoader
+
+def _chunks(data: bytes, csv_records: bool, chunk_bytes: int, start: int = 0, end=None):
+    loader = TextLoader("unused.txt")
+    return list(loader._iter_chunks(io.BytesIO(data), csv_records, start, end, chunk_bytes))
+
+def test_chunks_end_on_line_boundaries_and_cover_the_input():
+    data = b"".join(f"line {index} {'x' * (index % 7)}\n".encode() for index in range(200))
+    chunks = _chunks(data, False, 64)
+    
+    assert b"".join(chunk for _, chunk in chunks) == data
+    assert all(chunk.endswith(b"\n") for _, chunk in chunks)
+    offsets = [offset for offset, _ in chunks]
+    assert offsets == [0] + [offset + len(chunk) for offset, chunk in chunks[:-1]]
+
+def test_last_chunk_without_trailing_newline_is_kept():
+    chunks = _chunks(b"first\nsecond\nno newline", False, 4)
+    assert b"".join(chunk for _, chunk in chunks) == b"first\nsecond\nno newline"
+    assert chunks[-1][1].endswith(b"no newline")
+
+def test_csv_chunks_never_split_quoted_fields():
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["id", "comment"])
+    for index in range(50):
+        writer.writerow([index, f"multi-line\ncomment \"{index}\"\nend"])
+    data = output.getvalue().encode()
+    
+    chunks = _chunks(data, True, 40)
+    
+    assert b"".join(chunk for _, chunk in chunks) == data
+    for _, chunk in chunks:
+        assert chunk.count(b'"') % 2 == 0
+        rows = list(csv.reader(io.StringIO(chunk.decode())))
+        assert all(len(row) == 2 for row in rows)
+
+def test_chunks_stop_at_end_offset():
+    data = b"a\nbb\nccc\ndddd\n"
+    chunks = _chunks(data, False, 3, start=2, end=9)
+    assert b"".join(chunk for _, chunk in chunks) == b"bb\nccc\n"
+    assert chunks[0][0] == 2
+
+def _tail(path, store):
+    loader = TextLoader(str(path), config={"incremental": True})
+    loader.checkpoint_store = store
+    return loader.load()
+
+def _tailed_log(tmp_path):
+    """A .log read once up to its three lines, with its checkpoint store"""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"boot\nready\nrequest 1\n")
+    store = LogCheckpointStore(str(tmp_path / "checkpoints.db"))
+    documents = _tail(path, store)
+    assert [(doc.page_content, doc.metadata["checkpoint"]) for doc in documents] == [("boot\nready\nrequest 1\n", "initial")]
+    return path, store
+
+def test_log_tail_reads_only_appended_lines(tmp_path):
+    path, store = _tailed_log(tmp_path)
+    with open(path, "ab") as f:
+        f.write(b"request 2\nrequest 3\npartial")
+    
+    documents = _tail(path, store)
+    
+    assert [doc.page_content for doc in documents] == ["request 2\nrequest 3\n"]
+    assert documents[0].metadata["checkpoint"] == "resumed"
+    assert (documents[0].metadata["line_start"], documents[0].metadata["line_end"]) == (4, 5)
+    assert _tail(path, store) == []
+    
+    # The partial line is read once it is complete
+    with open(path, "ab") as f:
+        f.write(b" line\n")
+    assert [doc.page_content for doc in _tail(path, store)] == ["partial line\n"]
+
+def test_rotated_log_is_read_from_the_start(tmp_path):
+    path, store = _tailed_log(tmp_path)
+    os.rename(path, tmp_path / "app.log.1")
+    path.write_bytes(b"boot\nready\nrequest 1\nrequest 2\n")
+    
+    documents = _tail(path, store)
+    
+    assert [doc.page_content for doc in documents] == ["boot\nready\nrequest 1\nrequest 2\n"]
+    assert documents[0].metadata["checkpoint"] == "rotated"
+    assert documents[0].metadata["line_start"] == 1
+
+def test_truncated_log_is_read_from_the_start(tmp_path):
+    path, store = _tailed_log(tmp_path)
+    inode = os.stat(path).st_ino
+    with open(path, "wb") as f:  # Same inode, like copytruncate
+        f.write(b"new\n")
+    assert os.stat(path).st_ino == inode
+    
+    documents = _tail(path, store)
+    
+    assert [doc.page_content for doc in documents] == ["new\n"]
+    assert documents[0].metadata["checkpoint"] == "truncated"
+
+def test_log_with_rewritten_prefix_is_read_from_the_start(tmp_path):
+    path, store = _tailed_log(tmp_path)
+    # Truncated and written past the old offset again before the next run
+    with open(path, "r+b") as f:
+        f.write(b"BOOT\nREADY\nrequest 9\nrequest 10\n")
+    
+    documents = _tail(path, store)
+    
+    assert [doc.page_content for doc in documents] == ["BOOT\nREADY\nrequest 9\nrequest 10\n"]
+    assert documents[0].metadata["checkpoint"] == "rewritten"
+    assert _tail(path, store) == []
+
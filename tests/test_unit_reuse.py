@@ -0,0 +1,179 @@
+import hashlib
+import io
+import random
+import fitz
+from docx import Document as DocxDocument
+from docx.shared import Inches
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches as SlideInches
+from loaders.pdf_loader import PDFLoader
+from loaders.ppt_loader import PPTLoader
+from loaders.word_loader import WordLoader
+from loaders.unit_store import UnitResultStore
+
+class FakeExtractor:
+    """Vision extractor stand-in, describes an image by its content hash"""
+    
+    max_concurrency = 4
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def extract_many(self, image_inputs):
+        self.calls += len(image_inputs)
+        return [
+            {"status": "success", "content": f"image {hashlib.sha256(image.getvalue()).hexdigest()[:8]}"}
+            for image in image_inputs
+        ]
+
+def _noise_png(seed: int) -> bytes:
+    rng = random.Random(seed)
+    image = Image.frombytes("L", (64, 64), bytes(rng.randrange(256) for _ in range(64 * 64)))
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="PNG")
+    return output.getvalue()
+
+def _write_pdf(path, pages):
+    """One page per (text, image seed), every page has one image"""
+    pdf_doc = fitz.open()
+    for text, seed in pages:
+        page = pdf_doc.new_page()
+        page.insert_text((72, 72), text)
+        page.insert_image(fitz.Rect(72, 100, 272, 300), stream=_noise_png(seed))
+    pdf_doc.save(str(path))
+    pdf_doc.close()
+
+def _load(path, store, document_id="report"):
+    loader = PDFLoader(str(path))
+    loader.document_id = document_id
+    loader.unit_store = store
+    loader.image_extractor = FakeExtractor()
+    documents = loader.load()
+    return documents, loader.image_extractor.calls
+
+def _without_reuse_metadata(documents):
+    return [
+        (doc.page_content, {key: value for key, value in doc.metadata.items() if not key.startswith("unit")})
+        for doc in documents
+    ]
+
+def test_revision_reuses_unchanged_pages(tmp_path):
+    store = UnitResultStore(str(tmp_path / "units.db"))
+    _write_pdf(tmp_path / "v1.pdf", [("cover", 1), ("summary", 2), ("appendix", 3)])
+    # v2 inserts a page in front and revises the summary, image numbers shift by one
+    _write_pdf(tmp_path / "v2.pdf", [("new intro", 4), ("cover", 1), ("summary revised", 2), ("appendix", 3)])
+    
+    _, v1_calls = _load(tmp_path / "v1.pdf", store)
+    reused, reuse_calls = _load(tmp_path / "v2.pdf", store)
+    fresh, fresh_calls = _load(tmp_path / "v2.pdf", UnitResultStore(str(tmp_path / "fresh.db")))
+    
+    assert v1_calls == 3
+    assert fresh_calls == 4
+    assert reuse_calls == 2
+    assert [doc.metadata["unit_reused"] for doc in reused] == [False, True, False, True]
+    assert reused[0].metadata["units_reused"] == 2
+    assert _without_reuse_metadata(reused) == _without_reuse_metadata(fresh)
+    assert '<image id="002">' in reused[1].page_content
+    assert '<image id="004">' in reused[3].page_content
+
+def test_repeated_pages_get_their_own_image_numbers(tmp_path):
+    store = UnitResultStore(str(tmp_path / "units.db"))
+    _write_pdf(tmp_path / "v1.pdf", [("boilerplate", 7), ("body", 8)])
+    _write_pdf(tmp_path / "v2.pdf", [("boilerplate", 7), ("body", 8), ("boilerplate", 7)])
+    
+    _load(tmp_path / "v1.pdf", store)
+    reused, _ = _load(tmp_path / "v2.pdf", store)
+    fresh, _ = _load(tmp_path / "v2.pdf", UnitResultStore(str(tmp_path / "fresh.db")))
+    
+    assert [doc.metadata["unit_reused"] for doc in reused] == [True, True, True]
+    assert '<image id="001">' in reused[0].page_content
+    assert '<image id="003">' in reused[2].page_content
+    assert _without_reuse_metadata(reused) == _without_reuse_metadata(fresh)
+
+def test_reuse_page_does_not_modify_the_stored_unit():
+    loader = PDFLoader("unused.pdf")
+    unit = {
+        "content_parts": [
+            {"type": "text", "content": "cover", "position": 0},
+            {"type": "image", "image_index": 1, "position": 1, "content": '<image id="001">\nlogo\n</image>'}
+        ],
+        "images": [{"bbox": [0, 0, 1, 1], "extraction_status": "success"}],
+        "first_image_index": 1
+    }
+    
+    first_parts, _ = loader._reuse_page(unit, 3)
+    second_parts, second_images = loader._reuse_page(unit, 5)
+    
+    assert first_parts[1]["content"].startswith('<image id="003">')
+    assert second_parts[1]["content"].startswith('<image id="005">')
+    assert unit["content_parts"][1]["image_index"] == 1
+    assert first_parts is not second_parts
+    assert second_images[0]["bbox"] == (0, 0, 1, 1)
+
+def test_pages_with_failed_images_are_not_stored():
+    loader = PDFLoader("unused.pdf")
+    loader._page_fingerprints = ["a", "b", "c"]
+    parts = [{"type": "image", "image_index": 1, "position": 0}]
+    
+    loader._record_page_unit(0, list(parts), [{"extraction_status": "error", "error": "429"}])
+    loader._record_page_unit(1, list(parts), [{"bbox": (0, 0, 1, 1), "error": "render failed"}])
+    loader._record_page_unit(2, list(parts), [{"extraction_status": "success"}])
+    
+    assert list(loader._page_units) == ["c"]
+
+def _load_with(loader_class, path, store, document_id="report"):
+    loader = loader_class(str(path))
+    loader.document_id = document_id
+    loader.unit_store = store
+    loader.image_extractor = FakeExtractor()
+    documents = loader.load()
+    return documents, loader.image_extractor.calls
+
+def _write_deck(path, slides):
+    """One slide per (title, image seed), seed None for a slide without picture"""
+    prs = Presentation()
+    for title, seed in slides:
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = title
+        if seed is not None:
+            slide.shapes.add_picture(io.BytesIO(_noise_png(seed)), SlideInches(1), SlideInches(2), SlideInches(2))
+    prs.save(str(path))
+
+def _write_docx(path, sections):
+    """One heading-delimited section per (heading, text, image seed)"""
+    docx_doc = DocxDocument()
+    docx_doc.add_heading("Report", 0)
+    for heading, text, seed in sections:
+        docx_doc.add_heading(heading, 1)
+        docx_doc.add_paragraph(text)
+        docx_doc.add_paragraph().add_run("figure ").add_picture(io.BytesIO(_noise_png(seed)), width=Inches(1))
+    docx_doc.save(str(path))
+
+def test_revision_reuses_unchanged_slides(tmp_path):
+    store = UnitResultStore(str(tmp_path / "units.db"))
+    _write_deck(tmp_path / "v1.pptx", [("Agenda", 1), ("Results", 2), ("Outlook", 3)])
+    _write_deck(tmp_path / "v2.pptx", [("Agenda", 1), ("Inserted", 4), ("Results revised", 2), ("Outlook", 3)])
+    
+    _load_with(PPTLoader, tmp_path / "v1.pptx", store)
+    reused, reuse_calls = _load_with(PPTLoader, tmp_path / "v2.pptx", store)
+    fresh, fresh_calls = _load_with(PPTLoader, tmp_path / "v2.pptx", UnitResultStore(str(tmp_path / "fresh.db")))
+    
+    assert (reuse_calls, fresh_calls) == (2, 4)
+    assert (reused[0].metadata["units_reused"], reused[0].metadata["units_recomputed"]) == (2, 2)
+    assert _without_reuse_metadata(reused) == _without_reuse_metadata(fresh)
+
+def test_revision_reuses_unchanged_sections(tmp_path):
+    store = UnitResultStore(str(tmp_path / "units.db"))
+    sections = [("Scope", "Scope text", 1), ("Findings", "Findings text", 2), ("Next steps", "Plan", 3)]
+    _write_docx(tmp_path / "v1.docx", sections)
+    _write_docx(tmp_path / "v2.docx", [("Intro", "New", 4)] + sections[:1]
+                + [("Findings", "Findings text, revised", 2)] + sections[2:])
+    
+    _load_with(WordLoader, tmp_path / "v1.docx", store)
+    reused, reuse_calls = _load_with(WordLoader, tmp_path / "v2.docx", store)
+    fresh, fresh_calls = _load_with(WordLoader, tmp_path / "v2.docx", UnitResultStore(str(tmp_path / "fresh.db")))
+    
+    assert (reuse_calls, fresh_calls) == (2, 4)
+    assert reused[0].metadata["units_reused"] == 3
+    assert _without_reuse_metadata(reused) == _without_reuse_metadata(fresh)
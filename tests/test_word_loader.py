@@ -0,0 +1,70 @@
+from docx import Document as DocxDocument
+from docx.text.paragraph import Paragraph
+from loaders.word_loader import WordLoader
+
+def _loader(docx_doc) -> WordLoader:
+    loader = WordLoader("unused.docx", mode="text_only")
+    loader._index_image_references(docx_doc)
+    return loader
+
+def test_paragraph_text_matches_python_docx():
+    docx_doc = DocxDocument()
+    paragraph = docx_doc.add_paragraph("Name:")
+    run = paragraph.add_run("\tJ. Smith")
+    run.add_break()
+    paragraph.add_run("Approved")
+    docx_doc.add_paragraph("")
+    
+    loader = _loader(docx_doc)
+    texts = [loader._process_paragraph(p) for p in docx_doc.paragraphs]
+    
+    assert texts == [p.text for p in docx_doc.paragraphs]
+    assert texts[0] == "Name:\tJ. Smith\nApproved"
+
+def _merged_table_doc(rows: int = 12, columns: int = 4):
+    """Every 4th row spans its first two columns, the last column merges vertically in groups of 3"""
+    docx_doc = DocxDocument()
+    table = docx_doc.add_table(rows=rows, cols=columns)
+    for row_index, tr in enumerate(table._tbl.tr_lst):
+        tcs = tr.tc_lst
+        if row_index % 4 == 0:
+            tcs[0].get_or_add_tcPr().grid_span = 2
+            tr.remove(tcs[1])
+            tcs = tr.tc_lst
+        for col_index, tc in enumerate(tcs):
+            if col_index == len(tcs) - 1:
+                tc.get_or_add_tcPr().vMerge_val = "continue" if row_index % 3 else "restart"
+                if row_index % 3:
+                    continue
+            Paragraph(tc.p_lst[0], table).add_run(f"r{row_index} c{col_index}")
+    return docx_doc
+
+def _row_cells_text(loader: WordLoader, table) -> str:
+    """Reference rendering through python-docx row.cells"""
+    rows = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            cell_text = [loader._process_paragraph(p) for p in cell.paragraphs]
+            cells.append(" ".join(text for text in cell_text if text.strip()))
+        rows.append(" | ".join(cells))
+    return "\n".join(rows)
+
+def test_table_walk_matches_row_cells_with_merged_cells():
+    docx_doc = _merged_table_doc()
+    loader = _loader(docx_doc)
+    table = docx_doc.tables[0]
+    
+    assert loader._process_table(table) == _row_cells_text(loader, table)
+
+def test_table_walk_repeats_spanned_and_merged_cells():
+    docx_doc = _merged_table_doc()
+    loader = _loader(docx_doc)
+    
+    rows = loader._process_table(docx_doc.tables[0]).split("\n")
+    
+    # gridSpan=2 repeats the cell for both grid columns, vMerge continues the cell above
+    assert rows[0].split(" | ")[:2] == ["r0 c0", "r0 c0"]
+    assert rows[1].split(" | ")[-1] == "r0 c2"
+    assert rows[2].split(" | ")[-1] == "r0 c2"
+    assert rows[3].split(" | ")[-1] == "r3 c3"